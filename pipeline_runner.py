@@ -13,8 +13,19 @@ import sys
 import glob
 import shutil
 import json
-
-from src.core.runner_utils import StepRunner, ManifestManager
+import time
+import atexit
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.runner_utils import StepRunner, ManifestManager, load_manifest
+from src.core.step_worker import WorkerPool
+from src.core.step_cache import StepCache
+from src.core.blender_validator import BlenderValidator
+from src.core.asset_validator import validate_asset
+from src.core.tracing import TraceRecorder, span
+from src.core.prop_dedup import PropDedupIndex, crop_signature
+from src.pipelines.dag import StepGraph, DagExecutor, ResourceSlots
 
 # Configuration: Conda Environment Paths
 CONDA_ROOT = "/home/zhangxin/miniconda3"
@@ -37,11 +48,16 @@ SCRIPTS = {
     "trellis2": os.path.join(PROJECT_ROOT, "src/steps/assets/run_trellis2_local.py"),
     "sam3d_objects": os.path.join(PROJECT_ROOT, "src/steps/assets/run_sam3d_objects_local.py"),
     "sam3d_body": os.path.join(PROJECT_ROOT, "src/steps/assets/run_sam3d_body_local.py"),
+    # GPU-free stand-in backend for dry runs and tests
+    "stub": os.path.join(PROJECT_ROOT, "src/steps/assets/run_stub_backend.py"),
     "package": os.path.join(PROJECT_ROOT, "src/steps/export/package_asset_gbt.py"),
     "report": os.path.join(PROJECT_ROOT, "src/steps/report/generate_report.py"),
     "check_import": os.path.join(PROJECT_ROOT, "scripts/check_import.py"),
 }
 
+# Backends whose scripts implement load_model/run_job and can run in a warm worker
+WORKER_BACKENDS = ("trellis2", "sam3d_objects", "stub")
+
 
 def _signals_incomplete(signals, required_keys):
     """Return True when any required signal is missing."""
@@ -92,6 +108,11 @@ def _collect_run_log_paths(run_result):
     return paths
 
 
+def _record_step_resources(ctx, asset_id, step_id, run_result):
+    if run_result is not None and run_result.resources:
+        ctx.manifest.record_step_resources(asset_id, step_id, run_result.resources)
+
+
 def _validate_required_outputs(asset_type, asset_dir):
     if asset_type == "human":
         mesh_ok = any(
@@ -155,14 +176,39 @@ def _parse_import_check_result(stdout_text):
     return {"import_ok": False, "error": "invalid_or_missing_import_check_json"}
 
 
-def _run_glb_import_check(glb_path):
+def _run_structural_checks(asset_dir):
+    """Millisecond-level GLB/PLY structure checks, keyed by file name."""
+    results = {}
+    for name in ("mesh.glb", "splat.ply"):
+        path = os.path.join(asset_dir, name)
+        if not os.path.exists(path):
+            continue
+        report = validate_asset(path)
+        results[name] = {key: report[key] for key in ("ok", "errors", "warnings", "stats", "nonfinite_values", "truncated", "elapsed_ms")}
+        status = "通过" if report["ok"] else f"未通过 ({', '.join(report['errors'])})"
+        print(f"   🔎 结构预检 {name}: {status}，耗时 {report['elapsed_ms']:.1f}ms")
+    return results
+
+
+def _blender_command():
     blender_cmd = shutil.which("blender")
+    return [blender_cmd] if blender_cmd else None
+
+
+def _run_glb_import_check(glb_path, validator=None, blender_cmd=None):
+    """Import-check a GLB, via the session's long-lived Blender when available."""
+    if validator is not None:
+        result = validator.check(glb_path)
+        if result is not None:
+            return result
+
+    blender_cmd = blender_cmd or _blender_command()
     if not blender_cmd:
         return {"import_ok": False, "error": "blender_not_found"}
 
     try:
         completed = subprocess.run(
-            [blender_cmd, "-b", "-P", SCRIPTS["check_import"], "--", glb_path],
+            blender_cmd + ["-b", "-P", SCRIPTS["check_import"], "--", glb_path],
             check=False,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -236,14 +282,19 @@ def select_asset_type_and_backend(signals, forced_asset_type, forced_backend):
     return asset_type, backend_selected, signals_incomplete
 
 
-def main():
+def build_arg_parser():
     parser = argparse.ArgumentParser(description="Movie Asset Hybrid Pipeline Orchestrator")
-    parser.add_argument("--input", required=True, help="Path to input image")
+    input_group = parser.add_mutually_exclusive_group(required=True)
+    input_group.add_argument("--input", help="Path to input image")
+    input_group.add_argument("--input_dir", "--input-dir", dest="input_dir", help="Batch mode: process every image in this directory")
+    input_group.add_argument("--input_list", "--input-list", dest="input_list", help="Batch mode: text file with one image path per line")
+    parser.add_argument("--max_sessions", type=int, default=2, help="Batch mode: number of frames processed concurrently")
+    parser.add_argument("--top_k_per_shot", type=int, default=0, help="Batch mode: only process the K best-quality frames of every shot (sharpness/exposure/noise/subject size)")
     parser.add_argument("--output_root", default="outputs/pipeline_demo", help="Root output directory")
     parser.add_argument("--skip_scene", action="store_true", help="Skip expensive scene generation")
     parser.add_argument(
         "--asset_gen_backend",
-        choices=["trellis2", "sam3d_objects", "sam3d_body", "auto"],
+        choices=["trellis2", "sam3d_objects", "sam3d_body", "stub", "auto"],
         default="auto",
         help="3D asset generation backend for props (default: auto)",
     )
@@ -256,109 +307,200 @@ def main():
     parser.add_argument("--skip_geometry", action="store_true", help="Skip DUSt3R geometry reconstruction")
     parser.add_argument("--roi_hint", type=str, default=None, help="Hint bounding box for prop extraction, format 'x,y,w,h'")
     parser.add_argument("--disable_skin_rejection", action="store_true", help="Disable the skin color rejection mechanism")
-    args = parser.parse_args()
-
-    input_path = os.path.abspath(args.input)
-    if not os.path.exists(input_path):
-        print(f"错误: 输入文件 {input_path} 不存在。")
-        return
-
-    session_id = os.path.splitext(os.path.basename(input_path))[0]
-    output_dir = os.path.join(args.output_root, session_id)
-    os.makedirs(output_dir, exist_ok=True)
-    logs_root = os.path.join(output_dir, "logs")
-
-    # 0. Initialize Global Manifest & Step Runner
-    runner = StepRunner(SCRIPTS)
-    manifest = ManifestManager(
-        path=os.path.join(output_dir, "manifest.json"),
-        session_id=session_id,
-        input_path=input_path,
-        sys_argv=sys.argv
-    )
-
-    print(f"\n" + "="*60)
-    print(f"🎬 [电影资产化自动化管线] 任务启动")
-    print(f"任务 ID   : {session_id}")
-    print(f"输入路径 : {input_path}")
-    print(f"工作目录 : {output_dir}")
-    print("="*60)
-    
-    print("\n📜 [任务目标与流程总览]")
-    print(f"本项目旨在将 2D 电影素材转换为工业级 3D 资产。当前任务计划如下：")
-    steps_plan = []
-    if not args.skip_scene: steps_plan.append("1. 场景扩展 (ml-sharp): 补全图像边缘，为光照分析提供完整参考。")
-    if not args.skip_geometry: steps_plan.append("2. 几何重建 (DUSt3R): 恢复场景全局空间几何与深度关系。")
-    steps_plan.append("3. 光照估算 (Lighting): 提取环境光照探针，确保生成的 3D 资产色彩融入一致。")
-    steps_plan.append("4. 资产采集 (Harvester): 利用 SAM 自动识别并重光照提取前景物体。")
-    steps_plan.append("5. 3D 核心生成: 根据物体特征选择最优 AI 后端（TRELLIS.2/SAM3D）生成模型。")
-    steps_plan.append("6. 工业标准标准化: 按照 GB/T 36369 封装并执行 DCC (Blender) 导入校验。")
-    for s in steps_plan: print(f"   {s}")
-    print("-" * 60)
-
-    # 1. Scene Gen
-    scene_run_logs = []
-    if not args.skip_scene:
-        print(f"\n[节点 1: 场景扩展] 正在通过 AI 补全画面边缘，构建更完整的光照参考环境...")
-        scene_result = runner.run("场景扩展生成 (ml-sharp)", "scene_gen",
-                                  ["--input-path", input_path, "--output-path", os.path.join(output_dir, "scene_visual")],
+    parser.add_argument("--grabcut_working_res", type=int, default=None, help="Long-side resolution for coarse-to-fine GrabCut in harvesting (0 = full-res GrabCut; default: harvester default)")
+    parser.add_argument("--use_workers", action="store_true", help="Keep one warm model worker per backend instead of reloading the model for every asset")
+    parser.add_argument("--worker_idle_timeout", type=float, default=600.0, help="Seconds a warm worker may stay idle before shutting down")
+    parser.add_argument("--no_cache", "--no-cache", dest="no_cache", action="store_true", help="Disable the content-addressed step result cache")
+    parser.add_argument("--cache_dir", default=None, help="Step cache directory (default: <output_root>/.step_cache)")
+    parser.add_argument("--cache_max_gb", type=float, default=50.0, help="Step cache size cap in GB (LRU eviction)")
+    parser.add_argument("--lighting_cache_dir", default=None, help="Lighting probe cache shared across runs/output roots (default: the step cache)")
+    parser.add_argument("--lighting_full_hash", action="store_true", help="Key cached lighting probes on the full scene PLY hash instead of size + mtime + sampled blocks")
+    parser.add_argument("--lighting_probe_grid", type=int, default=0, help="Also build a spatial SH light probe grid (voxels along the longest scene axis, 0 = off) next to lighting_probe.json")
+    parser.add_argument("--dedup_props", action="store_true", help="Generate near-identical props harvested from different frames only once; the others are linked to the representative asset")
+    parser.add_argument("--fast_validation", action="store_true", help="Only run the GLB/PLY structural check and skip the Blender import check")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted session from its manifest.json, skipping verified outputs")
+    parser.add_argument("--manifest_journal", action="store_true", help="Append manifest updates to a journal and compact manifest.json only at checkpoints")
+    parser.add_argument("--gpu_slots", type=int, default=1, help="Max concurrent GPU steps (scene gen, geometry, 3D backends)")
+    parser.add_argument("--cpu_slots", type=int, default=4, help="Max concurrent CPU steps (lighting, harvest, packaging, checks)")
+    return parser
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp")
+TERMINAL_ASSET_STATUSES = {"success", "failed", "linked"}
+
+
+def build_runner(args):
+    worker_pool = None
+    if args.use_workers:
+        worker_pool = WorkerPool(
+            WORKER_BACKENDS,
+            idle_timeout=args.worker_idle_timeout,
+            log_dir=os.path.join(args.output_root, "logs", "workers"),
+        )
+    step_cache = None
+    step_caches = {}
+    if not args.no_cache:
+        step_cache = StepCache(
+            args.cache_dir or os.path.join(args.output_root, ".step_cache"),
+            max_bytes=int(args.cache_max_gb * 1024 ** 3),
+        )
+        if args.lighting_cache_dir:
+            step_caches["lighting"] = StepCache(args.lighting_cache_dir, max_bytes=int(args.cache_max_gb * 1024 ** 3))
+    return StepRunner(SCRIPTS, worker_pool=worker_pool, cache=step_cache, step_caches=step_caches)
+
+
+class SessionContext:
+    """Per-frame state shared by the step nodes of one pipeline session."""
+
+    def __init__(self, args, input_path, output_dir, runner, manifest):
+        self.args = args
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.logs_root = os.path.join(output_dir, "logs")
+        self.runner = runner
+        self.manifest = manifest
+        self.lighting_json = os.path.join(output_dir, "lighting_probe.json")
+        self.lighting_cache = None
+        self.step_logs = {}
+        self.asset_jobs = {}
+        self.graph = None
+        self.resumed_steps = set()
+        self.tracer = None
+        self.blender_validator = None
+        self.dedup_index = None
+
+
+def _resume_scene_steps(ctx):
+    """Scene-level steps whose outputs from a previous run can be reused as-is."""
+    if not ctx.manifest.resumed:
+        return set()
+    scene_ok, _, _ = _validate_required_outputs("scene", ctx.output_dir)
+    if not scene_ok:
+        return set()
+    reusable = {"scene_gen"}
+    if glob.glob(os.path.join(ctx.output_dir, "dust3r", "**", "*"), recursive=True):
+        reusable.add("geometry")
+    if os.path.exists(ctx.lighting_json):
+        reusable.add("lighting")
+    return reusable
+
+
+def _resume_harvest_done(ctx):
+    harvest_manifest_path = os.path.join(ctx.output_dir, "props", "harvest_manifest.json")
+    if not ctx.manifest.resumed or not os.path.exists(harvest_manifest_path):
+        return False
+    try:
+        with open(harvest_manifest_path, 'r') as f:
+            items = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+    return all(os.path.exists(item.get("path", "")) for item in items)
+
+
+def _cli_snapshot(args):
+    return {
+        "asset_gen_backend": args.asset_gen_backend,
+        "asset_type": args.asset_type,
+        "skip_scene": args.skip_scene,
+        "skip_geometry": args.skip_geometry,
+        "roi_hint": args.roi_hint,
+        "disable_skin_rejection": args.disable_skin_rejection,
+        "grabcut_working_res": args.grabcut_working_res,
+    }
+
+
+# 1. Scene Gen
+def _node_scene_gen(ctx):
+    print(f"\n[节点 1: 场景扩展] 正在通过 AI 补全画面边缘，构建更完整的光照参考环境...")
+    scene_result = ctx.runner.run("场景扩展生成 (ml-sharp)", "scene_gen",
+                                  ["--input-path", ctx.input_path, "--output-path", os.path.join(ctx.output_dir, "scene_visual")],
                                   ENVS["sharp"],
                                   extra_env={"PYTHONPATH": "modules/ml-sharp/src"},
-                                  log_dir=logs_root,
+                                  log_dir=ctx.logs_root,
                                   step_id="scene_gen",
-                                  asset_id="scene_001")
-        scene_run_logs.extend(_collect_run_log_paths(scene_result))
-        if scene_result.success:
-            print(f"✅ [结论] 场景扩展完成。")
-        else:
-            print(f"⚠️ [结论] 场景扩展异常，管线将尝试在降级模式下继续执行。")
+                                  asset_id="scene_001",
+                                  cache_inputs=[ctx.input_path],
+                                  cache_outputs=[os.path.join(ctx.output_dir, "scene_visual")])
+    ctx.step_logs["scene_gen"] = _collect_run_log_paths(scene_result)
+    _record_step_resources(ctx, "scene_001", "scene_gen", scene_result)
+    if scene_result.success:
+        print(f"✅ [结论] 场景扩展完成。")
     else:
-        print("⏭️ 跳过场景生成步骤 (skip_scene)")
+        print(f"⚠️ [结论] 场景扩展异常，管线将尝试在降级模式下继续执行。")
 
-    # 2. Geometry
-    if not args.skip_geometry and not args.skip_scene:
-        print(f"\n[节点 2: 空间几何重建] 正在分析场景深度与 3D 关联，点云恢复中...")
-        geometry_result = runner.run("空间几何重建 (DUSt3R)", "geometry",
-                                     ["--input", input_path, "--output", os.path.join(output_dir, "dust3r")],
+
+# 2. Geometry (independent of ml-sharp output, may overlap with scene gen / lighting)
+def _node_geometry(ctx):
+    print(f"\n[节点 2: 空间几何重建] 正在分析场景深度与 3D 关联，点云恢复中...")
+    geometry_result = ctx.runner.run("空间几何重建 (DUSt3R)", "geometry",
+                                     ["--input", ctx.input_path, "--output", os.path.join(ctx.output_dir, "dust3r")],
                                      ENVS["dust3r"],
                                      extra_env={"PYTHONPATH": "modules/dust3r"},
-                                     log_dir=logs_root,
+                                     log_dir=ctx.logs_root,
                                      step_id="geometry",
-                                     asset_id="scene_001")
-        scene_run_logs.extend(_collect_run_log_paths(geometry_result))
-        if geometry_result.success:
-            print(f"✅ [结论] 空间几何关联已确立。")
-        else:
-            print(f"⚠️ [结论] 几何重建失败，可能会影响后续资产的缩放准确度。")
+                                     asset_id="scene_001",
+                                     cache_inputs=[ctx.input_path],
+                                     cache_outputs=[os.path.join(ctx.output_dir, "dust3r")])
+    ctx.step_logs["geometry"] = _collect_run_log_paths(geometry_result)
+    _record_step_resources(ctx, "scene_001", "geometry", geometry_result)
+    if geometry_result.success:
+        print(f"✅ [结论] 空间几何关联已确立。")
     else:
-        print("⏭️ 跳过几何重建周期 (skip_geometry)")
+        print(f"⚠️ [结论] 几何重建失败，可能会影响后续资产的缩放准确度。")
+
 
-    # 3. Lighting
+# 3. Lighting
+def _node_lighting(ctx):
     print(f"\n[节点 3: 光照估计] 正在提取画面中的 HDR 环境特征，用于资产重光照一致性...")
-    scene_visual_dir = os.path.join(output_dir, "scene_visual")
+    scene_visual_dir = os.path.join(ctx.output_dir, "scene_visual")
     potential_plys = glob.glob(os.path.join(scene_visual_dir, "**", "*.ply"), recursive=True)
     potential_ply = potential_plys[0] if potential_plys else None
 
-    lighting_json = os.path.join(output_dir, "lighting_probe.json")
     if potential_ply:
-        lighting_result = runner.run("环境光照估算 (Lighting)", "lighting",
-                                     ["--input", potential_ply, "--output", lighting_json],
-                                     ENVS["base"],
-                                     log_dir=logs_root,
-                                     step_id="lighting",
-                                     asset_id="scene_001")
-        scene_run_logs.extend(_collect_run_log_paths(lighting_result))
+        lighting_args = ["--input", potential_ply, "--output", ctx.lighting_json]
+        lighting_outputs = [ctx.lighting_json]
+        if ctx.args.lighting_probe_grid > 0:
+            lighting_args.extend(["--probe_grid", str(ctx.args.lighting_probe_grid)])
+            lighting_outputs.append(os.path.splitext(ctx.lighting_json)[0] + "_grid.npz")
+        lighting_result = ctx.runner.run("环境光照估算 (Lighting)", "lighting",
+                                         lighting_args,
+                                         ENVS["base"],
+                                         log_dir=ctx.logs_root,
+                                         step_id="lighting",
+                                         asset_id="scene_001",
+                                         cache_inputs=[potential_ply],
+                                         cache_outputs=lighting_outputs,
+                                         # Multi-hundred-MB scene PLYs: sampled fingerprint unless asked otherwise.
+                                         cache_fingerprint="sha256" if ctx.args.lighting_full_hash else "sampled")
+        if ctx.runner.step_caches.get("lighting", ctx.runner.cache) is not None:
+            ctx.lighting_cache = {
+                "cached": lighting_result.cached,
+                "fingerprint": "sha256" if ctx.args.lighting_full_hash else "sampled",
+            }
+        ctx.step_logs["lighting"] = _collect_run_log_paths(lighting_result)
+        _record_step_resources(ctx, "scene_001", "lighting", lighting_result)
         print(f"✅ [结论] 环境光照特征提取成功。")
     else:
         print(f"⚠️ [结论] 未找到场景点云 PLY 文件，光照分析降级使用默认值。")
-        with open(lighting_json, 'w') as f:
-            json.dump({"ambient_light": {"r": 1.0, "g": 1.0, "b": 1.0}}, f)
-        with open(lighting_json, 'w') as f:
+        with open(ctx.lighting_json, 'w') as f:
             json.dump({"ambient_light": {"r": 1.0, "g": 1.0, "b": 1.0}}, f)
 
-    # Scene required-file validation (recorded as dedicated manifest asset)
-    scene_asset_dir = output_dir
-    manifest.record_asset_start(
+
+# Scene required-file validation (recorded as dedicated manifest asset)
+def _node_scene_record(ctx):
+    args = ctx.args
+    scene_run_logs = []
+    for step_id in ("scene_gen", "geometry", "lighting"):
+        scene_run_logs.extend(ctx.step_logs.get(step_id, []))
+
+    scene_asset_dir = ctx.output_dir
+    scene_steps_run = {"scene_gen", "geometry", "lighting"} & set(ctx.graph.nodes)
+    if ctx.manifest.resumed and not scene_steps_run and ctx.manifest.verify_asset_outputs("scene_001"):
+        print("⏭️ [续跑] 场景资产 scene_001 已校验通过，沿用上次结果。")
+        return
+    # Keep logs of steps that were reused from the interrupted run.
+    scene_run_logs = ctx.manifest.get_asset_run_logs("scene_001") + scene_run_logs
+    ctx.manifest.record_asset_start(
         asset_id="scene_001",
         asset_type="scene",
         backend_selected="ml-sharp",
@@ -371,22 +513,23 @@ def main():
                 "asset_type": args.asset_type,
                 "roi_hint": args.roi_hint,
                 "disable_skin_rejection": args.disable_skin_rejection,
+                "grabcut_working_res": args.grabcut_working_res,
             },
             "backend": {
                 "scene_gen": {"env": "sharp"},
                 "geometry": {"env": "dust3r"},
-                "lighting": {"env": "base"},
+                "lighting": {"env": "base", **({"cache": ctx.lighting_cache} if ctx.lighting_cache else {})},
             },
             "model": {"tag": None, "seed": None},
         },
     )
-    manifest.append_asset_run_logs("scene_001", scene_run_logs)
+    ctx.manifest.append_asset_run_logs("scene_001", scene_run_logs)
     scene_ok, scene_missing, scene_outputs = _validate_required_outputs("scene", scene_asset_dir)
     if scene_ok:
-        manifest.record_asset_success("scene_001", outputs=scene_outputs, run_log_paths=scene_run_logs)
+        ctx.manifest.record_asset_success("scene_001", outputs=scene_outputs, run_log_paths=scene_run_logs)
     else:
         scene_log = _write_error_log(scene_asset_dir, f"Missing required scene outputs: {', '.join(scene_missing)}")
-        manifest.record_asset_failure(
+        ctx.manifest.record_asset_failure(
             asset_id="scene_001",
             error_type="OutputValidationError",
             message=f"Missing required scene outputs: {', '.join(scene_missing)}",
@@ -394,259 +537,779 @@ def main():
             outputs=scene_outputs,
         )
 
-    # 4. Harvesting
+
+# 4. Harvesting, then expand one generation + finalize node pair per harvested asset
+def _node_harvest(ctx):
+    args = ctx.args
     print(f"\n[节点 4: 前景资产采集] 正在执行语义分割，识别画面中的关键资产目标并进行颜色校正...")
     harvest_args = [
-        "--input", input_path,
-        "--output_dir", os.path.join(output_dir, "props"),
-        "--lighting_probe", lighting_json
+        "--input", ctx.input_path,
+        "--output_dir", os.path.join(ctx.output_dir, "props"),
+        "--lighting_probe", ctx.lighting_json
     ]
     if args.roi_hint:
         harvest_args.extend(["--roi_hint", args.roi_hint])
     if args.disable_skin_rejection:
         harvest_args.append("--disable_skin_rejection")
+    if args.grabcut_working_res is not None:
+        harvest_args.extend(["--grabcut_working_res", str(args.grabcut_working_res)])
+    if ctx.runner.cache is not None:
+        # Face detections are keyed by frame content: ROI/skin re-runs of a frame reuse them.
+        harvest_args.extend(["--face_cache_dir", os.path.join(ctx.runner.cache.root, ".face_cache")])
+
+    if _resume_harvest_done(ctx):
+        print("⏭️ [续跑] 采集清单及其资产图像已存在，跳过资产采集。")
+    else:
+        _run_harvest(ctx, harvest_args)
+
+    # 5. Iterating Asset Manifest and Routing
+    prop_dir = os.path.join(ctx.output_dir, "props")
+    harvest_manifest_path = os.path.join(prop_dir, "harvest_manifest.json")
+
+    if not os.path.exists(harvest_manifest_path):
+        print("❌ No harvest manifest found. Skipping Generation.")
+        return
+
+    with open(harvest_manifest_path, 'r') as f:
+        harvest_manifest = json.load(f)
+
+    print(f"🧩 采集清单加载完成，共发现 {len(harvest_manifest)} 个潜在资产目标。")
+
+    links, candidates = {}, {}
+    if ctx.dedup_index is not None:
+        with span("dedup", cat="asset", items=len(harvest_manifest)):
+            links, candidates = _dedup_harvest_items(ctx, harvest_manifest)
+
+    pending_links = []
+    for item in harvest_manifest:
+        if links.get(item['id']):
+            pending_links.append((item, candidates[item['id']], links[item['id']]))
+            continue
+        _queue_asset(ctx, item, deps=["harvest"])
+    if pending_links:
+        ctx.graph.add("dedup_links:1", partial(_node_dedup_links, ctx, pending_links, 1),
+                      deps=["harvest"], dependents=["report"])
+
+
+def _queue_asset(ctx, item, deps):
+    """Route one harvested item and add its generation + finalize node pair."""
+    with span("routing", cat="asset", asset_id=item['id']):
+        job = _route_asset(ctx, item)
+    asset_id = job["asset_id"]
+    if job.get("resumed"):
+        _resolve_dedup(ctx, asset_id, True)
+        return
+    ctx.asset_jobs[asset_id] = job
+    ctx.graph.add(f"asset_gen:{asset_id}", partial(_node_asset_gen, ctx, job),
+                  deps=deps, resource="gpu")
+    ctx.graph.add(f"finalize:{asset_id}", partial(_node_asset_finalize, ctx, job),
+                  deps=[f"asset_gen:{asset_id}"], resource="cpu", dependents=["report"])
+
+
+def _resolve_dedup(ctx, asset_id, success):
+    if ctx.dedup_index is not None:
+        ctx.dedup_index.resolve(os.path.basename(ctx.output_dir), asset_id, success)
+
+
+def _node_dedup_links(ctx, pending_links, round_no):
+    """Record linked duplicates once their representative (in another session) succeeded.
+
+    Blocks (without a resource slot) until at least one representative is resolved. A
+    failed representative gets its duplicates re-assigned: linked to another live
+    representative or generated here. Unresolved links carry over to the next round node,
+    so the node returns and newly queued generations can start.
+    """
+    waiting = [candidate for _, candidate, _ in pending_links]
+    resolved = {id(candidate): outcome for candidate, outcome in ctx.dedup_index.wait_any(waiting)}
+    remaining = []
+    for item, candidate, link in pending_links:
+        outcome = resolved.get(id(candidate))
+        if outcome is None:
+            remaining.append((item, candidate, link))
+        elif outcome == "success":
+            _record_linked_asset(ctx, item, link)
+        else:
+            print(f"   ♻️ 资产 {item['id']} 的代表资产 {link['session_id']}/{link['asset_id']} 生成失败，重新分配。")
+            relinked = ctx.dedup_index.relink(candidate)
+            if relinked is None:
+                _queue_asset(ctx, item, deps=[f"dedup_links:{round_no}"])
+            else:
+                remaining.append((item, candidate, relinked))
+    if remaining:
+        ctx.graph.add(f"dedup_links:{round_no + 1}", partial(_node_dedup_links, ctx, remaining, round_no + 1),
+                      deps=[f"dedup_links:{round_no}"], dependents=["report"])
 
-    harvest_result = runner.run(
+
+def _run_harvest(ctx, harvest_args):
+    harvest_result = ctx.runner.run(
         "资产掩码提取与重光照 (Harvester)",
         "harvest",
         harvest_args,
         ENVS["base"],
-        log_dir=logs_root,
+        log_dir=ctx.logs_root,
         step_id="harvest",
         asset_id="scene_001",
+        cache_inputs=[ctx.input_path, ctx.lighting_json],
+        cache_outputs=[os.path.join(ctx.output_dir, "props")],
     )
+    _record_step_resources(ctx, "scene_001", "harvest", harvest_result)
     if harvest_result.success:
         print(f"✅ [结论] 资产采集与重光照预处理成功。")
     else:
         print(f"❌ [结论] 核心资产提取失败，管线关键节点中断。")
-        return
-    manifest.append_asset_run_logs("scene_001", _collect_run_log_paths(harvest_result))
+        raise RuntimeError("harvest step failed")
+    ctx.manifest.append_asset_run_logs("scene_001", _collect_run_log_paths(harvest_result))
 
-    # 5. Iterating Asset Manifest and Routing
-    prop_dir = os.path.join(output_dir, "props")
-    harvest_manifest_path = os.path.join(prop_dir, "harvest_manifest.json")
 
-    asset_counters = {"prop": 0, "human": 0}
+def _dedup_harvest_items(ctx, harvest_manifest):
+    """Match harvested crops against representatives of this run (see src/core/prop_dedup.py).
 
-    if os.path.exists(harvest_manifest_path):
-        with open(harvest_manifest_path, 'r') as f:
-            harvest_manifest = json.load(f)
+    Returns ({asset_id: None | link}, {asset_id: candidate}).
+    """
+    session_id = os.path.basename(ctx.output_dir)
+    candidates = {item['id']: _dedup_candidate(item, session_id, ctx.input_path) for item in harvest_manifest}
 
-        print(f"🧩 采集清单加载完成，共发现 {len(harvest_manifest)} 个潜在资产目标。")
+    links = ctx.dedup_index.assign(list(candidates.values()))
+    linked = sum(1 for link in links.values() if link)
+    if linked:
+        print(f"🔗 跨帧去重：{linked}/{len(harvest_manifest)} 个资产与已有代表资产为同一道具，待代表资产生成成功后关联。")
+    return links, candidates
 
-        for item in harvest_manifest:
-            asset_id = item['id']
-            relit_file = item['path']  # Absolute path from harvester
-            signals = item.get('signals', {})
 
-            asset_type, backend_selected, signals_incomplete = select_asset_type_and_backend(
-                signals=signals,
-                forced_asset_type=args.asset_type,
-                forced_backend=args.asset_gen_backend,
-            )
-            if asset_type not in {"prop", "human"}:
-                asset_type = "prop"
-
-            asset_counters[asset_type] += 1
-            unified_asset_dir = os.path.join(output_dir, "assets", f"{asset_type}_{asset_counters[asset_type]:03d}")
-            os.makedirs(unified_asset_dir, exist_ok=True)
-
-            print(f"   >>> 正在处理资产: {asset_id} | 类型映射: {asset_type} | 选定后端: {backend_selected}")
-
-            parameters_snapshot = {
-                "cli": {
-                    "asset_gen_backend": args.asset_gen_backend,
-                    "asset_type": args.asset_type,
-                    "skip_scene": args.skip_scene,
-                    "skip_geometry": args.skip_geometry,
-                    "roi_hint": args.roi_hint,
-                    "disable_skin_rejection": args.disable_skin_rejection,
-                },
-                "backend": {
-                    "selected": backend_selected,
-                    "signals_incomplete": args.asset_type == "prop" and signals_incomplete,
-                    "asset_output_dir": unified_asset_dir,
-                },
-                "model": {
-                    "tag": "hf" if backend_selected == "sam3d_objects" else None,
-                    "seed": 1 if backend_selected == "trellis2" else (42 if backend_selected == "sam3d_objects" else None),
-                },
-                "source_image": relit_file,
-            }
-            manifest.record_asset_start(
-                asset_id=asset_id,
-                asset_type=asset_type,
-                backend_selected=backend_selected,
-                signals=signals,
-                parameters_snapshot=parameters_snapshot,
-            )
+def _dedup_candidate(item, session_id, input_path):
+    return {
+        "asset_id": item['id'],
+        "session_id": session_id,
+        "source_image": item.get('source_image', input_path),
+        "area_ratio": item.get('signals', {}).get('area_ratio'),
+        # Older harvest manifests carry no signature: compute it from the crop.
+        "signature": item.get('dedup') or (crop_signature(item['path']) if os.path.exists(item['path']) else None),
+    }
 
-            # Run 3D Gen backend
-            success = False
-            run_log_paths = []
-            try:
-                if backend_selected == "trellis2":
-                    run_result = runner.run(
-                        f"高保真 3D 资产生成 ({asset_id})",
-                        "trellis2",
-                        ["--input", relit_file, "--output", unified_asset_dir],
-                        ENVS["trellis2"],
-                        extra_env={"PYTHONPATH": "modules/TRELLIS.2", "ATTN_BACKEND": "naive"},
-                        log_dir=logs_root,
-                        step_id="asset_gen",
-                        asset_id=asset_id,
-                    )
-                elif backend_selected == "sam3d_objects":
-                    run_result = runner.run(
-                        f"通用 3D 模型生成 ({asset_id})",
-                        "sam3d_objects",
-                        ["--input", relit_file, "--output", unified_asset_dir],
-                        ENVS["sam3d_objects"],
-                        extra_env={"PYTHONPATH": "modules/sam-3d-objects"},
-                        log_dir=logs_root,
-                        step_id="asset_gen",
-                        asset_id=asset_id,
-                    )
-                elif backend_selected == "sam3d_body":
-                    run_result = runner.run(
-                        f"人体 3D 重建 ({asset_id})",
-                        "sam3d_body",
-                        ["--image", relit_file, "--output_dir", unified_asset_dir],
-                        ENVS["base"],
-                        log_dir=logs_root,
-                        step_id="asset_gen",
-                        asset_id=asset_id,
-                    )
-                else:
-                    print(f"❌ 未识别的生成后端: {backend_selected}")
-                    run_result = None
-                success = bool(run_result and run_result.success)
-                run_log_paths = _collect_run_log_paths(run_result)
-                manifest.append_asset_run_logs(asset_id, run_log_paths)
-            except Exception as e:
-                print(f"❌ 后端执行异常 {backend_selected}: {e}")
-
-            outputs = [relit_file]
-            if not success:
-                failure_json, failure_log = _load_failure_metadata(unified_asset_dir)
-                if failure_json:
-                    outputs.append(failure_json)
-                outputs.extend(_collect_existing(unified_asset_dir, ["mesh.glb", "mesh.obj", "splat.ply", "preview.png", "params.json", "failure.json"]))
-                error_log = failure_log or _write_error_log(unified_asset_dir, f"{backend_selected} failed to run for asset {asset_id}")
-                manifest.record_asset_failure(
-                    asset_id=asset_id,
-                    error_type="BackendExecutionError",
-                    message=f"{backend_selected} failed to run",
-                    log_path=error_log,
-                    outputs=outputs,
-                )
-                continue
 
-            # Validate required files immediately after backend completion
-            valid, missing, generated_outputs = _validate_required_outputs(asset_type, unified_asset_dir)
-            outputs.extend(generated_outputs)
-            if asset_type == "human" and not valid:
-                error_log = _write_error_log(
-                    unified_asset_dir,
-                    f"Human required deliverables validation failed for {asset_id}. Missing: {', '.join(missing)}",
-                )
-                outputs.extend(_collect_existing(unified_asset_dir, ["failure.json"]))
-                manifest.record_asset_failure(
-                    asset_id=asset_id,
-                    error_type="OutputValidationError",
-                    message=f"Human required deliverables missing: {', '.join(missing)}",
-                    log_path=error_log,
-                    outputs=outputs,
-                )
+def _seed_dedup_index(dedup_index, session_id, output_dir, input_path):
+    """Register the generated and linked assets of a completed session, which the batch skips,
+    so later frames still link to its props instead of generating them again."""
+    try:
+        assets = load_manifest(os.path.join(output_dir, "manifest.json")).get("assets", [])
+        with open(os.path.join(output_dir, "props", "harvest_manifest.json"), 'r') as f:
+            harvest_items = {item['id']: item for item in json.load(f)}
+    except (OSError, json.JSONDecodeError):
+        return
+    # Representatives first, so links of the same session can find them.
+    for status in ("success", "linked"):
+        for asset in assets:
+            item = harvest_items.get(asset.get("asset_id"))
+            if item is None or asset.get("status") != status:
                 continue
+            candidate = _dedup_candidate(item, session_id, input_path)
+            if candidate["signature"]:
+                dedup_index.register(candidate, linked_to=asset.get("linked_to") if status == "linked" else None)
+
+
+def _record_linked_asset(ctx, item, link):
+    asset_id = item['id']
+    signals = item.get('signals', {})
+    asset_type, backend_selected, _ = select_asset_type_and_backend(
+        signals=signals,
+        forced_asset_type=ctx.args.asset_type,
+        forced_backend=ctx.args.asset_gen_backend,
+    )
+    if asset_type not in {"prop", "human"}:
+        asset_type = "prop"
+    print(f"   🔗 资产 {asset_id} 关联至 {link['session_id']}/{link['asset_id']}（dHash 距离 {link['hamming']}，颜色相似度 {link['hist_similarity']}）。")
+    ctx.manifest.record_asset_linked(
+        asset_id=asset_id,
+        asset_type=asset_type,
+        backend_selected=backend_selected,
+        signals=signals,
+        linked_to=link,
+        outputs=[item['path']],
+    )
 
-            if not valid:
-                error_log = _write_error_log(
-                    unified_asset_dir,
-                    f"Asset validation failed for {asset_id}. Missing: {', '.join(missing)}",
-                )
-                outputs.extend(_collect_existing(unified_asset_dir, ["failure.json"]))
-                manifest.record_asset_failure(
-                    asset_id=asset_id,
-                    error_type="OutputValidationError",
-                    message=f"Missing required outputs: {', '.join(missing)}",
-                    log_path=error_log,
-                    outputs=outputs,
-                )
-                continue
 
-            # Optional packaging for splat/ply based outputs
-            splat_path = os.path.join(unified_asset_dir, "splat.ply")
-            if os.path.exists(splat_path):
-                pkg_success = runner.run(
-                    f"资产规范化封装 (Packaging: {asset_id})", "package",
-                    ["--input", splat_path, "--id", asset_id],
-                    ENVS["base"],
-                    log_dir=logs_root,
-                    step_id="package",
-                    asset_id=asset_id,
-                )
-                manifest.append_asset_run_logs(asset_id, _collect_run_log_paths(pkg_success))
-                if not pkg_success.success:
-                    error_log = _write_error_log(unified_asset_dir, "Standardization failed")
-                    manifest.record_asset_failure(
-                        asset_id=asset_id,
-                        error_type="PackagingError",
-                        message="Standardization failed",
-                        log_path=error_log,
-                        outputs=outputs,
-                    )
-                    continue
-
-            primary_output = _select_primary_output(unified_asset_dir)
-            import_check = {}
-            if primary_output and primary_output.endswith("mesh.glb"):
-                print(f"   正在执行 DCC (Blender) 导入兼容性校验: {asset_id}...")
-                import_result = _run_glb_import_check(primary_output)
-                import_check = {
-                    "import_ok": bool(import_result.get("import_ok")),
-                    "stats": import_result.get("stats", {}),
-                }
-                if import_result.get("error"):
-                    import_check["error"] = import_result["error"]
-                if import_result.get("returncode") is not None:
-                    import_check["returncode"] = import_result["returncode"]
-                if import_check["import_ok"]:
-                    print("   ✅ 导入校验通过。")
-                else:
-                    print(f"   ❌ 导入校验失败: {import_check.get('error', 'unknown_error')}")
-            else:
-                import_check = {
-                    "skipped": True,
-                    "reason": "glb_missing_degraded_to_ply",
-                }
-                if primary_output:
-                    import_check["selected_output"] = os.path.basename(primary_output)
-                print(f"   ⚠️ GLB 文件缺失或降级为 PLY；已跳过 DCC 导入校验。")
+def _route_asset(ctx, item):
+    args = ctx.args
+    asset_id = item['id']
+    relit_file = item['path']  # Absolute path from harvester
+    signals = item.get('signals', {})
+
+    asset_type, backend_selected, signals_incomplete = select_asset_type_and_backend(
+        signals=signals,
+        forced_asset_type=args.asset_type,
+        forced_backend=args.asset_gen_backend,
+    )
+    if asset_type not in {"prop", "human"}:
+        asset_type = "prop"
+
+    # Named after the asset, not the routing order: linked duplicates and resumed assets
+    # must not shift the directory of the others between runs.
+    unified_asset_dir = os.path.join(ctx.output_dir, "assets", asset_id)
+    os.makedirs(unified_asset_dir, exist_ok=True)
+
+    job = {
+        "asset_id": asset_id,
+        "asset_type": asset_type,
+        "backend_selected": backend_selected,
+        "relit_file": relit_file,
+        "asset_dir": unified_asset_dir,
+        "success": False,
+    }
+
+    previous = ctx.manifest.get_asset(asset_id) if ctx.manifest.resumed else None
+    if (
+        previous is not None
+        and previous.get("backend_selected") == backend_selected
+        and previous.get("parameters_snapshot", {}).get("backend", {}).get("asset_output_dir") == unified_asset_dir
+        and ctx.manifest.verify_asset_outputs(asset_id)
+    ):
+        print(f"   ⏭️ [续跑] 资产 {asset_id} 已成功且输出校验一致，跳过。")
+        job.update({"success": True, "resumed": True})
+        return job
+
+    print(f"   >>> 正在处理资产: {asset_id} | 类型映射: {asset_type} | 选定后端: {backend_selected}")
+
+    parameters_snapshot = {
+        "cli": _cli_snapshot(args),
+        "backend": {
+            "selected": backend_selected,
+            "signals_incomplete": args.asset_type == "prop" and signals_incomplete,
+            "asset_output_dir": unified_asset_dir,
+        },
+        "model": {
+            "tag": "hf" if backend_selected == "sam3d_objects" else None,
+            "seed": 1 if backend_selected == "trellis2" else (42 if backend_selected == "sam3d_objects" else None),
+        },
+        "source_image": relit_file,
+    }
+    ctx.manifest.record_asset_start(
+        asset_id=asset_id,
+        asset_type=asset_type,
+        backend_selected=backend_selected,
+        signals=signals,
+        parameters_snapshot=parameters_snapshot,
+    )
+    return job
+
 
-            manifest.update_asset_fields(asset_id, {"import_check": import_check})
+def _node_asset_gen(ctx, job):
+    """Run the 3D generation backend for one asset (GPU slot)."""
+    asset_id = job["asset_id"]
+    backend_selected = job["backend_selected"]
+    relit_file = job["relit_file"]
+    unified_asset_dir = job["asset_dir"]
+    runner = ctx.runner
+    logs_root = ctx.logs_root
 
-            manifest.record_asset_success(
+    # Run 3D Gen backend
+    success = False
+    try:
+        if backend_selected == "trellis2":
+            run_result = runner.run(
+                f"高保真 3D 资产生成 ({asset_id})",
+                "trellis2",
+                ["--input", relit_file, "--output", unified_asset_dir],
+                ENVS["trellis2"],
+                extra_env={"PYTHONPATH": "modules/TRELLIS.2", "ATTN_BACKEND": "naive"},
+                log_dir=logs_root,
+                step_id="asset_gen",
+                asset_id=asset_id,
+                cache_inputs=[relit_file],
+                cache_outputs=[unified_asset_dir],
+            )
+        elif backend_selected == "sam3d_objects":
+            run_result = runner.run(
+                f"通用 3D 模型生成 ({asset_id})",
+                "sam3d_objects",
+                ["--input", relit_file, "--output", unified_asset_dir],
+                ENVS["sam3d_objects"],
+                extra_env={"PYTHONPATH": "modules/sam-3d-objects"},
+                log_dir=logs_root,
+                step_id="asset_gen",
+                asset_id=asset_id,
+                cache_inputs=[relit_file],
+                cache_outputs=[unified_asset_dir],
+            )
+        elif backend_selected == "stub":
+            run_result = runner.run(
+                f"Stub 3D 资产生成 ({asset_id})",
+                "stub",
+                ["--input", relit_file, "--output", unified_asset_dir],
+                ENVS["base"],
+                log_dir=logs_root,
+                step_id="asset_gen",
+                asset_id=asset_id,
+                cache_inputs=[relit_file],
+                cache_outputs=[unified_asset_dir],
+            )
+        elif backend_selected == "sam3d_body":
+            run_result = runner.run(
+                f"人体 3D 重建 ({asset_id})",
+                "sam3d_body",
+                ["--image", relit_file, "--output_dir", unified_asset_dir],
+                ENVS["base"],
+                log_dir=logs_root,
+                step_id="asset_gen",
+                asset_id=asset_id,
+                cache_inputs=[relit_file],
+                cache_outputs=[unified_asset_dir],
+            )
+        else:
+            print(f"❌ 未识别的生成后端: {backend_selected}")
+            run_result = None
+        success = bool(run_result and run_result.success)
+        run_log_paths = _collect_run_log_paths(run_result)
+        _record_step_resources(ctx, asset_id, "asset_gen", run_result)
+        ctx.manifest.append_asset_run_logs(asset_id, run_log_paths)
+    except Exception as e:
+        print(f"❌ 后端执行异常 {backend_selected}: {e}")
+    job["success"] = success
+
+
+def _node_asset_finalize(ctx, job):
+    """Validate, package and import-check one generated asset (CPU slot)."""
+    try:
+        _finalize_asset(ctx, job)
+    finally:
+        # Duplicates linked to this asset in other sessions wait for the outcome.
+        asset = ctx.manifest.get_asset(job["asset_id"])
+        _resolve_dedup(ctx, job["asset_id"], bool(asset and asset.get("status") == "success"))
+
+
+def _finalize_asset(ctx, job):
+    manifest = ctx.manifest
+    asset_id = job["asset_id"]
+    asset_type = job["asset_type"]
+    backend_selected = job["backend_selected"]
+    unified_asset_dir = job["asset_dir"]
+
+    outputs = [job["relit_file"]]
+    if not job["success"]:
+        failure_json, failure_log = _load_failure_metadata(unified_asset_dir)
+        if failure_json:
+            outputs.append(failure_json)
+        outputs.extend(_collect_existing(unified_asset_dir, ["mesh.glb", "mesh.obj", "splat.ply", "preview.png", "params.json", "failure.json"]))
+        error_log = failure_log or _write_error_log(unified_asset_dir, f"{backend_selected} failed to run for asset {asset_id}")
+        manifest.record_asset_failure(
+            asset_id=asset_id,
+            error_type="BackendExecutionError",
+            message=f"{backend_selected} failed to run",
+            log_path=error_log,
+            outputs=outputs,
+        )
+        return
+
+    # Validate required files immediately after backend completion
+    with span("validation", cat="asset", asset_id=asset_id):
+        valid, missing, generated_outputs = _validate_required_outputs(asset_type, unified_asset_dir)
+    outputs.extend(generated_outputs)
+    if asset_type == "human" and not valid:
+        error_log = _write_error_log(
+            unified_asset_dir,
+            f"Human required deliverables validation failed for {asset_id}. Missing: {', '.join(missing)}",
+        )
+        outputs.extend(_collect_existing(unified_asset_dir, ["failure.json"]))
+        manifest.record_asset_failure(
+            asset_id=asset_id,
+            error_type="OutputValidationError",
+            message=f"Human required deliverables missing: {', '.join(missing)}",
+            log_path=error_log,
+            outputs=outputs,
+        )
+        return
+
+    if not valid:
+        error_log = _write_error_log(
+            unified_asset_dir,
+            f"Asset validation failed for {asset_id}. Missing: {', '.join(missing)}",
+        )
+        outputs.extend(_collect_existing(unified_asset_dir, ["failure.json"]))
+        manifest.record_asset_failure(
+            asset_id=asset_id,
+            error_type="OutputValidationError",
+            message=f"Missing required outputs: {', '.join(missing)}",
+            log_path=error_log,
+            outputs=outputs,
+        )
+        return
+
+    # Optional packaging for splat/ply based outputs
+    splat_path = os.path.join(unified_asset_dir, "splat.ply")
+    if os.path.exists(splat_path):
+        with span("packaging", cat="asset", asset_id=asset_id):
+            pkg_success = ctx.runner.run(
+                f"资产规范化封装 (Packaging: {asset_id})", "package",
+                ["--input", splat_path, "--id", asset_id],
+                ENVS["base"],
+                log_dir=ctx.logs_root,
+                step_id="package",
+                asset_id=asset_id,
+                cache_inputs=[splat_path],
+                cache_outputs=[os.path.splitext(splat_path)[0] + ".json"],
+            )
+        manifest.append_asset_run_logs(asset_id, _collect_run_log_paths(pkg_success))
+        _record_step_resources(ctx, asset_id, "package", pkg_success)
+        if not pkg_success.success:
+            error_log = _write_error_log(unified_asset_dir, "Standardization failed")
+            manifest.record_asset_failure(
                 asset_id=asset_id,
+                error_type="PackagingError",
+                message="Standardization failed",
+                log_path=error_log,
                 outputs=outputs,
-                run_log_paths=manifest.get_asset_run_logs(asset_id),
             )
+            return
+
+    primary_output = _select_primary_output(unified_asset_dir)
+    with span("structural_check", cat="asset", asset_id=asset_id):
+        structural_check = _run_structural_checks(unified_asset_dir)
+    if structural_check:
+        manifest.update_asset_fields(asset_id, {"structural_check": structural_check})
+    primary_structure = structural_check.get(os.path.basename(primary_output)) if primary_output else None
+
+    import_check = {}
+    if primary_structure is not None and not primary_structure["ok"]:
+        import_check = {
+            "import_ok": False,
+            "error": f"structural_check_failed: {', '.join(primary_structure['errors'])}",
+            "skipped_blender": True,
+        }
+        print(f"   ❌ 结构预检未通过，跳过 Blender 导入校验: {', '.join(primary_structure['errors'])}")
+    elif ctx.args.fast_validation:
+        import_check = {
+            "skipped": True,
+            "reason": "fast_validation",
+            "stats": primary_structure["stats"] if primary_structure else {},
+        }
+        print(f"   ⚡ 快速校验模式：结构预检通过，跳过 Blender 导入校验。")
+    elif primary_output and primary_output.endswith("mesh.glb"):
+        print(f"   正在执行 DCC (Blender) 导入兼容性校验: {asset_id}...")
+        with span("import_check", cat="asset", asset_id=asset_id):
+            import_result = _run_glb_import_check(primary_output, validator=ctx.blender_validator)
+        import_check = {
+            "import_ok": bool(import_result.get("import_ok")),
+            "stats": import_result.get("stats", {}),
+        }
+        if import_result.get("error"):
+            import_check["error"] = import_result["error"]
+        if import_result.get("returncode") is not None:
+            import_check["returncode"] = import_result["returncode"]
+        if import_check["import_ok"]:
+            print("   ✅ 导入校验通过。")
+        else:
+            print(f"   ❌ 导入校验失败: {import_check.get('error', 'unknown_error')}")
     else:
-        print("❌ No harvest manifest found. Skipping Generation.")
+        import_check = {
+            "skipped": True,
+            "reason": "glb_missing_degraded_to_ply",
+        }
+        if primary_output:
+            import_check["selected_output"] = os.path.basename(primary_output)
+        print(f"   ⚠️ GLB 文件缺失或降级为 PLY；已跳过 DCC 导入校验。")
+
+    manifest.update_asset_fields(asset_id, {"import_check": import_check})
+
+    manifest.record_asset_success(
+        asset_id=asset_id,
+        outputs=outputs,
+        run_log_paths=manifest.get_asset_run_logs(asset_id),
+    )
 
-    # 6. Report
-    manifest.save()
-    report_result = runner.run(
+
+# 6. Report
+def _node_report(ctx):
+    ctx.manifest.save()
+    report_result = ctx.runner.run(
         "可视化质量审核报告生成", "report",
-        ["--output_root", output_dir, "--input_image", input_path],
+        ["--output_root", ctx.output_dir, "--input_image", ctx.input_path],
         ENVS["base"],
-        log_dir=logs_root,
+        log_dir=ctx.logs_root,
         step_id="report",
         asset_id="scene_001",
     )
-    manifest.append_asset_run_logs("scene_001", _collect_run_log_paths(report_result))
+    ctx.manifest.append_asset_run_logs("scene_001", _collect_run_log_paths(report_result))
+    _record_step_resources(ctx, "scene_001", "report", report_result)
+
+    print(f"\n🔗 任务完成。审核报告已生成至: {os.path.join(ctx.output_dir, 'report.html')}")
+
 
-    print(f"\n🔗 任务完成。审核报告已生成至: {os.path.join(output_dir, 'report.html')}")
+def build_session_graph(ctx):
+    """Declare the per-frame step DAG.
+
+    scene_gen ─┬─> lighting ─┐
+    geometry ──┴─────────────┴─> scene_record ─> harvest ─> asset_gen:* ─> finalize:* ─> report
+                                                         └─> dedup_links:* (--dedup_props) ─┘
+    """
+    args = ctx.args
+    graph = StepGraph()
+    ctx.graph = graph
+
+    ctx.resumed_steps = _resume_scene_steps(ctx)
+    scene_deps = []
+    if args.skip_scene:
+        print("⏭️ 跳过场景生成步骤 (skip_scene)")
+    elif "scene_gen" in ctx.resumed_steps:
+        print("⏭️ [续跑] 场景扩展输出已校验通过，跳过场景生成。")
+    else:
+        graph.add("scene_gen", partial(_node_scene_gen, ctx), resource="gpu")
+        scene_deps.append("scene_gen")
+
+    if args.skip_geometry or args.skip_scene:
+        print("⏭️ 跳过几何重建周期 (skip_geometry)")
+    elif "geometry" in ctx.resumed_steps:
+        print("⏭️ [续跑] 几何重建输出已存在，跳过 DUSt3R。")
+    else:
+        graph.add("geometry", partial(_node_geometry, ctx), resource="gpu")
+        scene_deps.append("geometry")
+
+    if "lighting" in ctx.resumed_steps:
+        print("⏭️ [续跑] 光照探针已存在，跳过光照估算。")
+    else:
+        lighting_deps = ["scene_gen"] if "scene_gen" in graph else []
+        graph.add("lighting", partial(_node_lighting, ctx), deps=lighting_deps, resource="cpu")
+        scene_deps.append("lighting")
+    graph.add("scene_record", partial(_node_scene_record, ctx), deps=scene_deps)
+    graph.add("harvest", partial(_node_harvest, ctx), deps=["scene_record"], resource="cpu")
+    graph.add("report", partial(_node_report, ctx), deps=["harvest"], resource="cpu")
+    return graph
+
+
+def _session_paths(args, input_path):
+    session_id = os.path.splitext(os.path.basename(input_path))[0]
+    return session_id, os.path.join(args.output_root, session_id)
+
+
+def run_session(args, input_path, runner, slots, dedup_index=None):
+    session_id, output_dir = _session_paths(args, input_path)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 0. Initialize Global Manifest
+    manifest = ManifestManager(
+        path=os.path.join(output_dir, "manifest.json"),
+        session_id=session_id,
+        input_path=input_path,
+        sys_argv=sys.argv,
+        journal=args.manifest_journal,
+        resume=args.resume,
+    )
+    ctx = SessionContext(args, input_path, output_dir, runner, manifest)
+    if args.dedup_props:
+        # Batch mode passes one index shared by all sessions of the run.
+        ctx.dedup_index = dedup_index if dedup_index is not None else PropDedupIndex()
+    blender_cmd = _blender_command()
+    if blender_cmd:
+        # Started lazily on the first GLB; shared by all finalize nodes of the session.
+        ctx.blender_validator = BlenderValidator(blender_cmd, SCRIPTS["check_import"])
+    ctx.tracer = TraceRecorder(os.path.join(output_dir, "trace.json"), process_name=f"pipeline_runner [{session_id}]",
+                               sink_path=os.path.join(ctx.logs_root, "trace_sink.jsonl"))
+
+    print(f"\n" + "="*60)
+    print(f"🎬 [电影资产化自动化管线] 任务启动")
+    print(f"任务 ID   : {session_id}")
+    print(f"输入路径 : {input_path}")
+    print(f"工作目录 : {output_dir}")
+    print("="*60)
+    
+    print("\n📜 [任务目标与流程总览]")
+    print(f"本项目旨在将 2D 电影素材转换为工业级 3D 资产。当前任务计划如下：")
+    steps_plan = []
+    if not args.skip_scene: steps_plan.append("1. 场景扩展 (ml-sharp): 补全图像边缘，为光照分析提供完整参考。")
+    if not args.skip_geometry: steps_plan.append("2. 几何重建 (DUSt3R): 恢复场景全局空间几何与深度关系。")
+    steps_plan.append("3. 光照估算 (Lighting): 提取环境光照探针，确保生成的 3D 资产色彩融入一致。")
+    steps_plan.append("4. 资产采集 (Harvester): 利用 SAM 自动识别并重光照提取前景物体。")
+    steps_plan.append("5. 3D 核心生成: 根据物体特征选择最优 AI 后端（TRELLIS.2/SAM3D）生成模型。")
+    steps_plan.append("6. 工业标准标准化: 按照 GB/T 36369 封装并执行 DCC (Blender) 导入校验。")
+    for s in steps_plan: print(f"   {s}")
+    print("-" * 60)
+
+    graph = build_session_graph(ctx)
+    try:
+        with ctx.tracer.span(f"session {session_id}", cat="session"):
+            summary = DagExecutor(slots, tracer=ctx.tracer).run(graph)
+    finally:
+        if ctx.dedup_index is not None:
+            # Representatives whose finalize never ran (crash, skipped node) count as failed.
+            ctx.dedup_index.abandon(session_id)
+        manifest.close()
+        ctx.tracer.save()
+        if ctx.blender_validator is not None:
+            ctx.blender_validator.close()
+    print(f"⏱️ 会话 {session_id} 墙钟耗时 {summary.wall_time_s:.2f}s（各步骤串行累计 {summary.busy_time_s:.2f}s）")
+    return ctx, summary
+
+
+def _select_quality_frames(args, candidates):
+    """Keep the best `top_k_per_shot` frames of every shot and write the ranked index."""
+    from src.metrics.frame_quality import INDEX_FILENAME, score_frames, select_top_k, write_index
+
+    records = score_frames([c for c in candidates if os.path.exists(c)])
+    os.makedirs(args.output_root, exist_ok=True)
+    index = write_index(records, os.path.join(args.output_root, INDEX_FILENAME))
+    selected = [record["path"] for record in select_top_k(records, args.top_k_per_shot)]
+    print(f"🎞️ 帧质量筛选: {index['frame_count']} 帧 / {index['shot_count']} 个镜头 -> 保留 {len(selected)} 帧。")
+    return selected
+
+
+def collect_batch_inputs(args):
+    if args.input_dir:
+        candidates = [
+            os.path.join(args.input_dir, name)
+            for name in sorted(os.listdir(args.input_dir))
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+    else:
+        with open(args.input_list, "r", encoding="utf-8") as f:
+            candidates = [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+    if args.top_k_per_shot > 0:
+        candidates = _select_quality_frames(args, candidates)
+
+    inputs = []
+    seen_sessions = {}
+    for candidate in candidates:
+        input_path = os.path.abspath(candidate)
+        if not os.path.exists(input_path):
+            print(f"⚠️ 输入文件 {input_path} 不存在，已跳过。")
+            continue
+        session_id, _ = _session_paths(args, input_path)
+        if session_id in seen_sessions:
+            print(f"⚠️ {input_path} 与 {seen_sessions[session_id]} 会话 ID 重复 ({session_id})，已跳过。")
+            continue
+        seen_sessions[session_id] = input_path
+        inputs.append(input_path)
+    return inputs
+
+
+def _session_completed(output_dir):
+    """A session is done when its manifest lists assets that all reached a terminal state."""
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    if not os.path.exists(manifest_path) or not os.path.exists(os.path.join(output_dir, "report.html")):
+        return False
+    try:
+        assets = load_manifest(manifest_path).get("assets", [])
+    except (OSError, json.JSONDecodeError):
+        return False
+    return bool(assets) and all(asset.get("status") in TERMINAL_ASSET_STATUSES for asset in assets)
+
+
+def _count_asset_statuses(output_dir):
+    counts = {}
+    try:
+        assets = load_manifest(os.path.join(output_dir, "manifest.json")).get("assets", [])
+    except (OSError, json.JSONDecodeError):
+        return counts
+    for asset in assets:
+        if asset.get("asset_type") == "scene":
+            continue
+        status = asset.get("status", "unknown")
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def run_batch(args, inputs, runner, slots):
+    """Process many frames with one shared StepRunner and one shared set of resource slots."""
+    started_at = time.time()
+    print(f"\n📦 [批处理模式] 共 {len(inputs)} 帧，并发会话数 {args.max_sessions}")
+    dedup_index = PropDedupIndex() if args.dedup_props else None
+    if dedup_index is not None:
+        for input_path in inputs:
+            session_id, output_dir = _session_paths(args, input_path)
+            if _session_completed(output_dir):
+                _seed_dedup_index(dedup_index, session_id, output_dir, input_path)
+
+    def _process(input_path):
+        session_id, output_dir = _session_paths(args, input_path)
+        record = {"session_id": session_id, "input": input_path, "output_dir": output_dir}
+        if _session_completed(output_dir):
+            print(f"⏭️ 会话 {session_id} 已全部完成，跳过 (断点续跑)。")
+            record.update({"status": "skipped", "wall_time_s": 0.0, "assets": _count_asset_statuses(output_dir)})
+            return record, None
+        try:
+            _, summary = run_session(args, input_path, runner, slots, dedup_index=dedup_index)
+        except Exception as exc:
+            print(f"❌ 会话 {session_id} 异常终止: {exc}")
+            record.update({"status": "failed", "error": f"{type(exc).__name__}: {exc}", "wall_time_s": 0.0})
+            return record, None
+        failed_nodes = [node.name for node in summary.failed()]
+        record.update({
+            "status": "failed" if failed_nodes else "completed",
+            "wall_time_s": round(summary.wall_time_s, 3),
+            "failed_steps": failed_nodes,
+            "assets": _count_asset_statuses(output_dir),
+        })
+        return record, summary
+
+    with ThreadPoolExecutor(max_workers=max(1, args.max_sessions)) as pool:
+        results = list(pool.map(_process, inputs))
+
+    step_totals = {}
+    for _, summary in results:
+        if summary is None:
+            continue
+        for node in summary.graph.nodes.values():
+            step_id = node.name.split(":", 1)[0]
+            totals = step_totals.setdefault(step_id, {"count": 0, "total_s": 0.0, "failed": 0})
+            totals["count"] += 1
+            totals["total_s"] = round(totals["total_s"] + node.duration_s, 3)
+            if node.status == "failed":
+                totals["failed"] += 1
+
+    sessions = [record for record, _ in results]
+    wall_time_s = time.time() - started_at
+    processed = [record for record in sessions if record["status"] != "skipped"]
+    asset_total = sum(sum(record.get("assets", {}).values()) for record in processed)
+    hours = wall_time_s / 3600.0 if wall_time_s > 0 else 0.0
+    batch_manifest = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started_at)),
+        "wall_time_s": round(wall_time_s, 3),
+        "max_sessions": args.max_sessions,
+        "slots": slots.limits,
+        "counts": {
+            "total": len(sessions),
+            "completed": sum(1 for record in sessions if record["status"] == "completed"),
+            "skipped": sum(1 for record in sessions if record["status"] == "skipped"),
+            "failed": sum(1 for record in sessions if record["status"] == "failed"),
+        },
+        "throughput": {
+            "frames_per_hour": round(len(processed) / hours, 2) if hours else None,
+            "assets_per_hour": round(asset_total / hours, 2) if hours else None,
+        },
+        "failures": [
+            {"session_id": record["session_id"], "error": record.get("error"), "failed_steps": record.get("failed_steps", [])}
+            for record in sessions if record["status"] == "failed"
+        ],
+        "step_totals": step_totals,
+        "sessions": sessions,
+    }
+    os.makedirs(args.output_root, exist_ok=True)
+    batch_manifest_path = os.path.join(args.output_root, "batch_manifest.json")
+    with open(batch_manifest_path, "w", encoding="utf-8") as f:
+        json.dump(batch_manifest, f, indent=4, ensure_ascii=False)
+    print(f"\n📦 批处理完成: {batch_manifest['counts']}，耗时 {wall_time_s:.2f}s。汇总清单: {batch_manifest_path}")
+    return batch_manifest
+
+
+def main():
+    args = build_arg_parser().parse_args()
+
+    if args.input:
+        input_path = os.path.abspath(args.input)
+        if not os.path.exists(input_path):
+            print(f"错误: 输入文件 {input_path} 不存在。")
+            return
+        inputs = None
+    else:
+        inputs = collect_batch_inputs(args)
+        if not inputs:
+            print("错误: 批处理模式未找到任何有效输入帧。")
+            return
+
+    runner = build_runner(args)
+    atexit.register(runner.close)
+    slots = ResourceSlots({"gpu": args.gpu_slots, "cpu": args.cpu_slots})
+    if inputs is None:
+        run_session(args, input_path, runner, slots)
+    else:
+        run_batch(args, inputs, runner, slots)
 
 
 if __name__ == "__main__":
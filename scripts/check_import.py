@@ -2,22 +2,29 @@
 Blender 资产导入校验脚本
 Author: zhangxin
 功能：在后台启动 Blender 尝试导入生成的 GLB/PLY 资产，检测几何完整性并提取顶点、面数等统计信息。
-输入：3D 资产文件路径。
-输出：标准输出中的 JSON 校验结果。
+输入：3D 资产文件路径；或 --server 模式下从标准输入逐行读取路径（常驻 Blender，避免每个资产重复启动）。
+输出：标准输出中的 JSON 校验结果（server 模式下每行以 CHECK_IMPORT_RESULT 前缀标记）。
 依赖：Blender Python API (bpy)。
 """
 import sys
 import json
 import bpy
 
-def _emit_result(import_ok, stats=None, error=None):
+# Server mode: Blender itself prints import logs to stdout, so results are
+# tagged and the client ignores every line without the prefix.
+SERVER_READY = "CHECK_IMPORT_READY"
+SERVER_RESULT_PREFIX = "CHECK_IMPORT_RESULT "
+SERVER_QUIT = "__quit__"
+
+
+def _result(import_ok, stats=None, error=None):
     payload = {
         "import_ok": bool(import_ok),
         "stats": stats or {},
     }
     if error:
         payload["error"] = str(error)
-    print(json.dumps(payload, ensure_ascii=False))
+    return payload
 
 
 def _collect_mesh_stats():
@@ -38,7 +45,8 @@ def _collect_mesh_stats():
     }
 
 
-def test_import(file_path):
+def check_file(file_path):
+    """Import one file into an empty scene and return the result payload."""
     # clear scene
     bpy.ops.wm.read_factory_settings(use_empty=True)
 
@@ -52,25 +60,46 @@ def test_import(file_path):
             stats = _collect_mesh_stats()
 
             has_geometry = stats["vertices"] > 0
-            _emit_result(import_ok=has_geometry, stats=stats)
-            return has_geometry
+            return _result(import_ok=has_geometry, stats=stats)
 
         else:
-            _emit_result(import_ok=False, error="unsupported_file_format")
-            return False
+            return _result(import_ok=False, error="unsupported_file_format")
 
     except Exception as e:
-        _emit_result(import_ok=False, error=str(e))
-        return False
+        return _result(import_ok=False, error=str(e))
+
+
+def test_import(file_path):
+    payload = check_file(file_path)
+    print(json.dumps(payload, ensure_ascii=False))
+    return payload["import_ok"]
+
+
+def serve():
+    """Read one asset path per stdin line and stream one tagged JSON result per path."""
+    print(SERVER_READY, flush=True)
+    for line in sys.stdin:
+        file_path = line.strip()
+        if not file_path:
+            continue
+        if file_path == SERVER_QUIT:
+            break
+        payload = check_file(file_path)
+        payload["path"] = file_path
+        print(SERVER_RESULT_PREFIX + json.dumps(payload, ensure_ascii=False), flush=True)
+
 
 if __name__ == "__main__":
     # Blender arguments can be messy, look for '--' to find script arguments
     argv = sys.argv
     if '--' not in argv:
-        print("Usage: blender -b -P check_import.py -- <path_to_3d_file>")
+        print("Usage: blender -b -P check_import.py -- <path_to_3d_file> | --server")
         sys.exit(1)
         
     script_args = argv[argv.index('--') + 1:]
+    if script_args and script_args[0] == "--server":
+        serve()
+        sys.exit(0)
     if not script_args:
         print("Usage: blender -b -P check_import.py -- <path_to_3d_file>")
         sys.exit(1)
@@ -10,34 +10,21 @@ import numpy as np
 from pathlib import Path
 from collections import defaultdict
 import argparse
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core.optical_flow import flow_magnitude
 
 
 def compute_optical_flow_magnitude(frame1: np.ndarray, frame2: np.ndarray) -> float:
     """
-    计算两帧之间的光流幅度（使用 Farneback 算法）
+    计算两帧之间的光流幅度（使用 Farneback 算法，缩小到 0.25 倍计算）
     返回平均光流幅度（像素/帧）
     """
-    # 转灰度
-    gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-    gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
-    
-    # 缩小尺寸加快计算
-    scale = 0.25
-    gray1 = cv2.resize(gray1, None, fx=scale, fy=scale)
-    gray2 = cv2.resize(gray2, None, fx=scale, fy=scale)
-    
-    # 计算光流
-    flow = cv2.calcOpticalFlowFarneback(
-        gray1, gray2, None,
-        pyr_scale=0.5, levels=3, winsize=15,
-        iterations=3, poly_n=5, poly_sigma=1.2, flags=0
-    )
-    
-    # 计算幅度
-    magnitude = np.sqrt(flow[..., 0]**2 + flow[..., 1]**2)
-    
-    # 返回平均幅度（还原到原始尺度）
-    return float(np.mean(magnitude)) / scale
+    return flow_magnitude(frame1, frame2, scale=0.25)
 
 
 def detect_scene_change(frame1: np.ndarray, frame2: np.ndarray, threshold: float = 30.0) -> bool:
@@ -1,15 +1,29 @@
 """
 Author: zhangxin
 Description: 从视频素材中提取高质关键帧，用于 3D 重建管线的输入。
+             默认每隔 N 帧保存一帧；--top_k 模式下每隔 N 帧取一个候选，按帧质量
+             (src/metrics/frame_quality.py) 评分，每个镜头只保存分数最高的 K 帧。
 """
 import cv2
 import os
+import sys
 import argparse
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.metrics.frame_quality import DEFAULT_SHOT_THRESHOLD, score_frame
+
+SCORE_CHUNK = 32
+
 
 def extract_frames(video_path, output_dir, interval=30):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    
+
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         print(f"Error: Could not open video {video_path}")
@@ -21,23 +35,91 @@ def extract_frames(video_path, output_dir, interval=30):
         ret, frame = cap.read()
         if not ret:
             break
-        
+
         if count % interval == 0:
             frame_name = os.path.join(output_dir, f"frame_{saved_count:04d}.png")
             cv2.imwrite(frame_name, frame)
             saved_count += 1
             print(f"Saved: {frame_name}")
-        
+
         count += 1
-    
+
     cap.release()
     print(f"Done. Extracted {saved_count} frames.")
 
+
+def _candidate_chunks(cap, interval):
+    """Yield lists of (frame_number, frame) candidates, SCORE_CHUNK at a time."""
+    chunk, count = [], 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if count % interval == 0:
+            chunk.append((count, frame))
+            if len(chunk) == SCORE_CHUNK:
+                yield chunk
+                chunk = []
+        count += 1
+    if chunk:
+        yield chunk
+
+
+def extract_best_frames(video_path, output_dir, interval=5, top_k=3, workers=None,
+                        shot_threshold=DEFAULT_SHOT_THRESHOLD):
+    """Keep the `top_k` best-scoring candidates of every shot.
+
+    Candidates are scored in chunks by a thread pool; only the current shot's best
+    `top_k` frames stay in memory. Files are named frame_<video frame number>.png.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Error: Could not open video {video_path}")
+        return []
+
+    saved, best, shot, prev_hist = [], [], 0, None
+
+    def flush():
+        for _, frame_number, frame in sorted(best, key=lambda item: item[1]):
+            frame_name = os.path.join(output_dir, f"frame_{frame_number:06d}.png")
+            cv2.imwrite(frame_name, frame)
+            saved.append(frame_name)
+            print(f"Saved: {frame_name} (shot {shot})")
+
+    with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as pool:
+        for chunk in _candidate_chunks(cap, interval):
+            scored = pool.map(lambda item: score_frame(item[1]), chunk)
+            for (frame_number, frame), (metrics, hist) in zip(chunk, scored):
+                if prev_hist is not None and cv2.compareHist(prev_hist, hist, cv2.HISTCMP_BHATTACHARYYA) > shot_threshold:
+                    flush()
+                    best, shot = [], shot + 1
+                prev_hist = hist
+                # Min-heap on score keeps the shot's top_k candidates.
+                entry = (metrics["score"], frame_number, frame)
+                if len(best) < top_k:
+                    heapq.heappush(best, entry)
+                elif entry[:2] > best[0][:2]:
+                    heapq.heapreplace(best, entry)
+    flush()
+
+    cap.release()
+    print(f"Done. Kept {len(saved)} frames from {shot + 1} shots.")
+    return saved
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Extract frames from video")
     parser.add_argument("--video", required=True, help="Path to video file")
     parser.add_argument("--output", required=True, help="Path to output directory")
-    parser.add_argument("--interval", type=int, default=30, help="Frame interval for sampling")
-    
+    parser.add_argument("--interval", type=int, default=30, help="Frame interval for sampling (candidate interval with --top_k)")
+    parser.add_argument("--top_k", type=int, default=0, help="Keep the K best-quality candidates per shot instead of every Nth frame")
+    parser.add_argument("--workers", type=int, default=None, help="Scoring threads for --top_k")
+
     args = parser.parse_args()
-    extract_frames(args.video, args.output, args.interval)
+    if args.top_k > 0:
+        extract_best_frames(args.video, args.output, args.interval, args.top_k, args.workers)
+    else:
+        extract_frames(args.video, args.output, args.interval)
@@ -0,0 +1,287 @@
+"""
+GLB / PLY 资产结构快速校验
+Author: zhangxin
+功能：不加载完整几何，直接解析 glTF 二进制容器（JSON 块 + BIN 块 accessor）与 PLY（含 3DGS）文件头，
+      统计顶点/面/高斯点数量，检查文件截断与 accessor 越界，并通过内存映射分块扫描浮点数据中的 NaN/Inf。
+      毫秒级完成，作为 Blender 导入校验前的预检（未通过的资产不再启动 Blender），或在快速模式下替代 Blender。
+输入：.glb / .ply 文件路径。
+输出：校验字典 {ok, format, errors, warnings, stats, nonfinite_values, truncated, elapsed_ms}。
+依赖：numpy（src/core/ply_io.py）。
+"""
+import os
+import json
+import time
+import struct
+
+import numpy as np
+
+from src.core.ply_io import read_ply_header, memmap_element, PlyFormatError
+
+GLB_MAGIC = b"glTF"
+GLB_CHUNK_JSON = 0x4E4F534A
+GLB_CHUNK_BIN = 0x004E4942
+GLTF_COMPONENT_SIZES = {5120: 1, 5121: 1, 5122: 2, 5123: 2, 5125: 4, 5126: 4}
+GLTF_TYPE_COMPONENTS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+GLTF_FLOAT = 5126
+GLTF_MODE_TRIANGLES, GLTF_MODE_TRIANGLE_STRIP, GLTF_MODE_TRIANGLE_FAN = 4, 5, 6
+GS_REQUIRED_PROPERTIES = ("opacity", "scale_0", "rot_0")
+
+# Rows scanned per step when looking for NaN/Inf, bounds the temporary bool arrays.
+SCAN_CHUNK_ROWS = 1 << 20
+
+
+def _new_report(path, fmt):
+    return {
+        "ok": False,
+        "format": fmt,
+        "path": path,
+        "errors": [],
+        "warnings": [],
+        "stats": {},
+        "nonfinite_values": 0,
+        "truncated": False,
+        "elapsed_ms": 0.0,
+    }
+
+
+def _count_nonfinite(array):
+    """Count NaN/Inf entries of a (possibly memory-mapped) float array, chunk by chunk."""
+    total = 0
+    for start in range(0, len(array), SCAN_CHUNK_ROWS):
+        block = array[start:start + SCAN_CHUNK_ROWS]
+        total += int(block.size - np.count_nonzero(np.isfinite(block)))
+    return total
+
+
+# ---------------------------------------------------------------------------
+# GLB
+# ---------------------------------------------------------------------------
+
+def _read_glb_chunks(f, declared_length, report):
+    json_chunk, bin_range = None, None
+    offset = 12
+    while offset + 8 <= declared_length:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            report["truncated"] = True
+            break
+        chunk_length, chunk_type = struct.unpack("<II", header)
+        data_offset = offset + 8
+        if data_offset + chunk_length > declared_length:
+            report["errors"].append("chunk_exceeds_declared_length")
+            break
+        if chunk_type == GLB_CHUNK_JSON and json_chunk is None:
+            json_chunk = f.read(chunk_length)
+        elif chunk_type == GLB_CHUNK_BIN and bin_range is None:
+            bin_range = (data_offset, chunk_length)
+        offset = data_offset + chunk_length
+    return json_chunk, bin_range
+
+
+def _accessor_layout(doc, index, bin_length, report):
+    """(byte offset inside BIN, element size, stride, components) or None if unusable."""
+    accessor = doc["accessors"][index]
+    components = GLTF_TYPE_COMPONENTS.get(accessor.get("type"))
+    component_size = GLTF_COMPONENT_SIZES.get(accessor.get("componentType"))
+    if components is None or component_size is None:
+        report["errors"].append(f"accessor_{index}_bad_type")
+        return None
+    if "bufferView" not in accessor:
+        return None  # all zeros (or sparse only): nothing to range-check or scan
+    views = doc.get("bufferViews", [])
+    if accessor["bufferView"] >= len(views):
+        report["errors"].append(f"accessor_{index}_bad_buffer_view")
+        return None
+    view = views[accessor["bufferView"]]
+    buffers = doc.get("buffers", [])
+    buffer_index = view.get("buffer", 0)
+    if buffer_index >= len(buffers):
+        report["errors"].append(f"buffer_view_{accessor['bufferView']}_bad_buffer")
+        return None
+    if buffer_index != 0 or "uri" in buffers[buffer_index]:
+        if "external_buffers_not_checked" not in report["warnings"]:
+            report["warnings"].append("external_buffers_not_checked")
+        return None
+
+    element_size = components * component_size
+    stride = view.get("byteStride") or element_size
+    count = accessor.get("count", 0)
+    view_offset, view_length = view.get("byteOffset", 0), view.get("byteLength", 0)
+    accessor_offset = accessor.get("byteOffset", 0)
+    needed = accessor_offset + (stride * (count - 1) + element_size if count else 0)
+    if needed > view_length:
+        report["errors"].append(f"accessor_{index}_out_of_range")
+        return None
+    if view_offset + view_length > bin_length:
+        report["errors"].append(f"buffer_view_{accessor['bufferView']}_out_of_range")
+        return None
+    return view_offset + accessor_offset, element_size, stride, components
+
+
+def validate_glb(path, scan_nonfinite=True):
+    report = _new_report(path, "glb")
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12:
+            report["errors"].append("file_too_small")
+            report["truncated"] = True
+            return report
+        magic, version, declared_length = struct.unpack("<4sII", header)
+        if magic != GLB_MAGIC:
+            report["errors"].append("bad_magic")
+            return report
+        if version != 2:
+            report["errors"].append(f"unsupported_version_{version}")
+            return report
+        if file_size < declared_length:
+            report["truncated"] = True
+        json_chunk, bin_range = _read_glb_chunks(f, min(declared_length, file_size), report)
+
+    if json_chunk is None:
+        report["errors"].append("missing_json_chunk")
+        return report
+    try:
+        doc = json.loads(json_chunk.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        report["errors"].append("invalid_json_chunk")
+        return report
+
+    buffers = doc.get("buffers", [])
+    bin_offset, bin_length = bin_range or (0, 0)
+    if buffers and "uri" not in buffers[0] and buffers[0].get("byteLength", 0) > bin_length:
+        report["errors"].append("bin_chunk_shorter_than_buffer")
+
+    accessors = doc.get("accessors", [])
+    layouts = {}
+    for index in range(len(accessors)):
+        layouts[index] = _accessor_layout(doc, index, bin_length, report)
+
+    vertices = faces = primitives = 0
+    for mesh in doc.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            primitives += 1
+            position = primitive.get("attributes", {}).get("POSITION")
+            if position is None or position >= len(accessors):
+                report["errors"].append("primitive_without_position")
+                continue
+            vertex_count = accessors[position].get("count", 0)
+            vertices += vertex_count
+            index_count = vertex_count
+            if "indices" in primitive:
+                if primitive["indices"] >= len(accessors):
+                    report["errors"].append("primitive_bad_indices")
+                    continue
+                index_count = accessors[primitive["indices"]].get("count", 0)
+            mode = primitive.get("mode", GLTF_MODE_TRIANGLES)
+            if mode == GLTF_MODE_TRIANGLES:
+                faces += index_count // 3
+            elif mode in (GLTF_MODE_TRIANGLE_STRIP, GLTF_MODE_TRIANGLE_FAN):
+                faces += max(0, index_count - 2)
+
+    report["stats"] = {
+        "meshes": len(doc.get("meshes", [])),
+        "primitives": primitives,
+        "vertices": vertices,
+        "faces": faces,
+        "materials": len(doc.get("materials", [])),
+        "accessors": len(accessors),
+        "bin_bytes": bin_length,
+    }
+
+    if scan_nonfinite and bin_range and not report["truncated"]:
+        float_accessors = [
+            index for index, accessor in enumerate(accessors)
+            if layouts.get(index) and accessor.get("componentType") == GLTF_FLOAT and accessor.get("count", 0) > 0
+        ]
+        if float_accessors:
+            mapped = np.memmap(path, dtype=np.uint8, mode="r", offset=bin_offset, shape=(bin_length,))
+            for index in float_accessors:
+                offset, _, stride, components = layouts[index]
+                view = np.ndarray(shape=(accessors[index]["count"], components), dtype="<f4", buffer=mapped,
+                                  offset=offset, strides=(stride, 4))
+                report["nonfinite_values"] += _count_nonfinite(view)
+            del mapped
+
+    if report["truncated"]:
+        report["errors"].append("truncated")
+    if report["nonfinite_values"]:
+        report["errors"].append("nonfinite_values")
+    if vertices == 0:
+        report["errors"].append("no_geometry")
+    return report
+
+
+# ---------------------------------------------------------------------------
+# PLY (meshes, point clouds and 3D Gaussian splats)
+# ---------------------------------------------------------------------------
+
+def validate_ply(path, scan_nonfinite=True):
+    report = _new_report(path, "ply")
+    try:
+        header = read_ply_header(path)
+    except PlyFormatError as exc:
+        report["errors"].append(f"bad_header: {exc}")
+        report["truncated"] = "before 'end_header'" in str(exc)
+        return report
+
+    vertex = header.element("vertex")
+    counts = {element.name: element.count for element in header.elements}
+    names = set(vertex.property_names()) if vertex else set()
+    is_splat = all(prop in names for prop in GS_REQUIRED_PROPERTIES)
+    report["stats"] = {
+        "encoding": header.format,
+        "kind": "3dgs" if is_splat else ("mesh" if counts.get("face") else "points"),
+        "vertices": counts.get("vertex", 0),
+        "faces": counts.get("face", 0),
+        "splats": counts.get("vertex", 0) if is_splat else 0,
+        "properties": len(names),
+    }
+
+    if not header.is_binary:
+        report["warnings"].append("ascii_ply_not_scanned")
+    else:
+        expected = header.data_offset + header.fixed_data_size()
+        if header.file_size < expected:
+            report["truncated"] = True
+        elif header.elements and all(element.fixed_size for element in header.elements) and header.file_size > expected:
+            report["warnings"].append("trailing_bytes")
+
+        if scan_nonfinite and vertex is not None and not report["truncated"] and vertex.fixed_size:
+            data = memmap_element(header, "vertex")
+            float_fields = [prop.name for prop in vertex.properties if prop.dtype in ("f4", "f8")]
+            for start in range(0, len(data), SCAN_CHUNK_ROWS):
+                block = data[start:start + SCAN_CHUNK_ROWS]
+                for name in float_fields:
+                    report["nonfinite_values"] += _count_nonfinite(block[name])
+            del data
+
+    if report["truncated"]:
+        report["errors"].append("truncated")
+    if report["nonfinite_values"]:
+        report["errors"].append("nonfinite_values")
+    if report["stats"]["vertices"] == 0:
+        report["errors"].append("no_geometry")
+    return report
+
+
+def validate_asset(path, scan_nonfinite=True):
+    """Structural check of a .glb or .ply file; unsupported formats return ok=None."""
+    started = time.perf_counter()
+    extension = os.path.splitext(path)[1].lower()
+    if not os.path.isfile(path):
+        report = _new_report(path, extension.lstrip("."))
+        report["errors"].append("missing_file")
+    elif extension == ".glb":
+        report = validate_glb(path, scan_nonfinite=scan_nonfinite)
+    elif extension == ".ply":
+        report = validate_ply(path, scan_nonfinite=scan_nonfinite)
+    else:
+        report = _new_report(path, extension.lstrip("."))
+        report["ok"] = None
+        report["warnings"].append("unsupported_format")
+        return report
+    report["ok"] = not report["errors"]
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000.0, 3)
+    return report
@@ -0,0 +1,108 @@
+"""
+常驻 Blender 导入校验客户端
+Author: zhangxin
+功能：以 server 模式启动一个后台 Blender（scripts/check_import.py -- --server），通过 stdin 逐个发送资产路径，
+      从 stdout 读取带前缀的 JSON 结果，在整个会话内复用同一个 Blender 进程，省去每个资产数秒的启动开销。
+      进程启动失败、崩溃或超时时返回 None，由调用方回退到一次性 `blender -b -P` 模式；下次调用会自动重启。
+输入：Blender 命令（可为 [python, fake_blender.py] 等替身）、校验脚本路径、GLB 路径。
+输出：与一次性模式相同的校验字典 {import_ok, stats, error?}。
+依赖：Python 标准库。
+"""
+import os
+import json
+import queue
+import threading
+import subprocess
+
+# Protocol of scripts/check_import.py (not importable here: it imports bpy).
+SERVER_READY = "CHECK_IMPORT_READY"
+SERVER_RESULT_PREFIX = "CHECK_IMPORT_RESULT "
+SERVER_QUIT = "__quit__"
+
+
+class BlenderValidator:
+    """One background Blender serving import checks; safe to share between threads."""
+
+    def __init__(self, blender_cmd, script_path, startup_timeout=120.0, check_timeout=300.0):
+        self.blender_cmd = list(blender_cmd)
+        self.script_path = script_path
+        self.startup_timeout = startup_timeout
+        self.check_timeout = check_timeout
+        self.process = None
+        self.lines = None
+        self.checks_done = 0
+        # Set when the server cannot even start; later checks go straight to one-shot mode.
+        self.disabled = False
+        self.lock = threading.Lock()
+
+    def _start(self):
+        cmd = self.blender_cmd + ["-b", "-P", self.script_path, "--", "--server"]
+        self.process = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, bufsize=1,
+        )
+        self.lines = queue.Queue()
+        threading.Thread(target=self._pump, args=(self.process, self.lines), daemon=True).start()
+        self._read_until(lambda line: line == SERVER_READY, self.startup_timeout)
+
+    @staticmethod
+    def _pump(process, lines):
+        for line in process.stdout:
+            lines.put(line.rstrip("\n"))
+        lines.put(None)  # EOF: Blender exited
+
+    def _read_until(self, accept, timeout):
+        while True:
+            try:
+                line = self.lines.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("blender validator did not respond in time")
+            if line is None:
+                raise RuntimeError(f"blender validator exited (code {self.process.poll()})")
+            if accept(line):
+                return line
+
+    def check(self, file_path):
+        """Validate one file; None means the server is unusable and the caller should fall back."""
+        file_path = os.path.abspath(file_path)
+        with self.lock:
+            if self.disabled:
+                return None
+            try:
+                if self.process is None or self.process.poll() is not None:
+                    try:
+                        self._start()
+                    except (OSError, RuntimeError, TimeoutError):
+                        self.disabled = True
+                        raise
+                self.process.stdin.write(file_path + "\n")
+                self.process.stdin.flush()
+                line = self._read_until(lambda l: l.startswith(SERVER_RESULT_PREFIX), self.check_timeout)
+                payload = json.loads(line[len(SERVER_RESULT_PREFIX):])
+            except (OSError, RuntimeError, TimeoutError, ValueError) as exc:
+                print(f"⚠️ 常驻 Blender 校验进程不可用 ({exc})，回退为一次性校验。")
+                self._kill()
+                return None
+            self.checks_done += 1
+        payload.pop("path", None)
+        return payload
+
+    def _kill(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def close(self):
+        with self.lock:
+            if self.process is None:
+                return
+            try:
+                if self.process.poll() is None:
+                    self.process.stdin.write(SERVER_QUIT + "\n")
+                    self.process.stdin.flush()
+                    self.process.stdin.close()
+                    self.process.wait(timeout=10)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                pass
+            self._kill()
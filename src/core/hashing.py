@@ -0,0 +1,187 @@
+"""
+文件校验和工具
+Author: zhangxin
+功能：一次读取同时计算 MD5 与 SHA-256（大缓冲 readinto），并以 (路径, inode, 大小, mtime_ns) 为键把结果
+      存入持久化 SQLite 缓存；未变化的大文件（数 GB 的高斯点云）再次打包 / 写入清单时无需任何读盘。
+      打开缓存时清理 30 天未用的记录，并按最近使用保留至多 20 万行。缓存位置由环境变量
+      PIPELINE_CHECKSUM_CACHE 指定（设为 off 关闭），默认 ~/.cache/movie_asset_pipeline/checksums.sqlite3；
+      缓存不可用时退化为直接计算。
+输入：文件路径。
+输出：{"md5": ..., "sha256": ...} 十六进制摘要。
+依赖：Python 标准库（hashlib、sqlite3）。
+"""
+import os
+import hashlib
+import sqlite3
+import threading
+import time
+
+DIGEST_ALGORITHMS = ("md5", "sha256")
+HASH_BUFFER_BYTES = 8 << 20
+CHECKSUM_CACHE_ENV = "PIPELINE_CHECKSUM_CACHE"
+DEFAULT_CHECKSUM_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "movie_asset_pipeline", "checksums.sqlite3")
+CHECKSUM_SCHEMA_VERSION = 2
+# Pruned when the cache is opened: rows unused for this long, then the least recently used
+# rows beyond the cap. A hit refreshes last_used at most once per TOUCH_INTERVAL_S.
+MAX_ROW_AGE_S = 30 * 86400
+MAX_ROWS = 200000
+TOUCH_INTERVAL_S = 86400
+
+
+def compute_digests(file_path, buffer_bytes=HASH_BUFFER_BYTES):
+    """MD5 and SHA-256 of a file in one sequential pass."""
+    hashers = {name: hashlib.new(name) for name in DIGEST_ALGORITHMS}
+    buffer = bytearray(buffer_bytes)
+    view = memoryview(buffer)
+    with open(file_path, "rb", buffering=0) as file_obj:
+        while True:
+            n = file_obj.readinto(buffer)
+            if not n:
+                break
+            for hasher in hashers.values():
+                hasher.update(view[:n])
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+
+class ChecksumCache:
+    """Persistent digests keyed by (path, inode, size, mtime_ns).
+
+    Any change of the stat tuple is a miss, so rewritten files are hashed again. Safe to
+    share between threads and between step processes (SQLite WAL).
+    Rows unused for `max_age_s` and rows beyond `max_rows` are pruned on open.
+    """
+
+    def __init__(self, db_path, max_age_s=MAX_ROW_AGE_S, max_rows=MAX_ROWS):
+        self.db_path = db_path
+        self.max_age_s = max_age_s
+        self.max_rows = max_rows
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                if conn.execute("PRAGMA user_version").fetchone()[0] != CHECKSUM_SCHEMA_VERSION:
+                    conn.execute("DROP TABLE IF EXISTS checksums")
+                    conn.execute(f"PRAGMA user_version = {CHECKSUM_SCHEMA_VERSION}")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS checksums ("
+                    "path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, md5 TEXT, sha256 TEXT, "
+                    "last_used REAL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS checksums_last_used ON checksums (last_used)")
+            self._conn = conn
+            self._prune_locked()
+        return self._conn
+
+    def _prune_locked(self):
+        conn = self._conn
+        with conn:
+            conn.execute("DELETE FROM checksums WHERE last_used < ?", (time.time() - self.max_age_s,))
+            excess = conn.execute("SELECT COUNT(*) FROM checksums").fetchone()[0] - self.max_rows
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM checksums WHERE path IN "
+                    "(SELECT path FROM checksums ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+
+    def prune(self):
+        with self.lock:
+            self._connect()
+            self._prune_locked()
+
+    def lookup(self, path, stat):
+        with self.lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT md5, sha256, last_used FROM checksums "
+                "WHERE path = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_ino, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] > TOUCH_INTERVAL_S:
+                with conn:
+                    conn.execute("UPDATE checksums SET last_used = ? WHERE path = ?", (now, path))
+        return dict(zip(DIGEST_ALGORITHMS, row[:2]))
+
+    def record(self, path, stat, digests):
+        with self.lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (path, stat.st_ino, stat.st_size, stat.st_mtime_ns, digests["md5"], digests["sha256"], time.time()),
+                )
+
+    def digests(self, file_path):
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        try:
+            cached = self.lookup(path, stat)
+        except sqlite3.Error:
+            cached = None
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        digests = compute_digests(path)
+        # A file modified while it was being read must not be recorded under the new stat.
+        if os.stat(path).st_mtime_ns == stat.st_mtime_ns:
+            try:
+                self.record(path, stat, digests)
+            except sqlite3.Error:
+                pass
+        return digests
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_DEFAULT_CACHES = {}
+_DEFAULT_CACHES_LOCK = threading.Lock()
+
+
+def default_checksum_cache():
+    """Process-wide cache at $PIPELINE_CHECKSUM_CACHE (None when set to "off")."""
+    db_path = os.environ.get(CHECKSUM_CACHE_ENV) or DEFAULT_CHECKSUM_CACHE
+    if db_path.lower() in ("off", "0", "none"):
+        return None
+    with _DEFAULT_CACHES_LOCK:
+        if db_path not in _DEFAULT_CACHES:
+            _DEFAULT_CACHES[db_path] = ChecksumCache(db_path)
+        return _DEFAULT_CACHES[db_path]
+
+
+def file_digests(file_path, cache=None):
+    """{"md5", "sha256"} of a regular file (None otherwise), served from the checksum cache when unchanged."""
+    if not file_path or not os.path.isfile(file_path):
+        return None
+    cache = cache or default_checksum_cache()
+    if cache is None:
+        return compute_digests(file_path)
+    try:
+        return cache.digests(file_path)
+    except OSError:
+        # Unwritable cache location: hash without it.
+        return compute_digests(file_path)
+
+
+def file_sha256(file_path, cache=None):
+    digests = file_digests(file_path, cache)
+    return digests["sha256"] if digests else None
+
+
+def file_md5(file_path, cache=None):
+    digests = file_digests(file_path, cache)
+    return digests["md5"] if digests else None
@@ -0,0 +1,155 @@
+"""
+SH 光照探针
+Author: zhangxin
+功能：由加权 SH 矩（DC + band-1）推导环境项、主光方向与方向光颜色（光照估算与重光照共用），
+      以及空间探针网格：把高斯点按体素索引一次性 np.bincount 累加为粗粒度 3D SH 探针，
+      以紧凑 .npz 存放在 lighting_probe.json 旁，并按资产位置查找最近的非空探针。
+输入：逐块的点位置、权重、DC 与 band-1 系数（numpy 数组）。
+输出：sh_lighting 字典；ProbeGrid（.npz：origin / voxel_size / dims / weight / dc_sum / l1_sum）。
+依赖：numpy。
+"""
+import numpy as np
+
+SH_C0 = 0.28209479177387814
+SH_C1 = 0.4886025119029199
+# Rec. 709 luma weights, RGB order, for the dominant direction.
+LUMA_RGB = np.array([0.2126, 0.7152, 0.0722])
+# Grid bounds come from these position percentiles of a sample, so stray far-away splats
+# (sky, floaters) are clamped into border voxels instead of stretching the grid.
+GRID_BOUNDS_PERCENTILES = (1.0, 99.0)
+GRID_SAMPLE_ROWS = 1 << 16
+
+
+def sh_band1_vectors(l1_mean):
+    """Band-1 coefficients (3 channels x [m=-1, 0, 1]) -> radiance gradient per channel in
+    PLY xyz, following the 3DGS evaluation  C1 * (-y * sh1 + z * sh2 - x * sh3)."""
+    l1 = np.asarray(l1_mean, dtype=np.float64)
+    return SH_C1 * np.stack([-l1[:, 2], -l1[:, 0], l1[:, 1]], axis=1)
+
+
+def derive_sh_lighting(total_weight, dc_sum, l1_sum, splats):
+    """Ambient term, dominant direction and directional colour from weighted SH moments.
+
+    The band-1 gradient g_c points along the view rays that see channel c brightest; light
+    is taken to arrive from the opposite side, so the probe direction (scene -> light) is
+    -g_luma / |g_luma|. `directional_color` is each channel's lobe amplitude along it.
+    """
+    dc_mean = np.asarray(dc_sum, dtype=np.float64) / total_weight if total_weight > 0 else np.zeros(3)
+    ambient = np.clip(dc_mean * SH_C0 + 0.5, 1e-3, None)
+    sh = {
+        "weighting": "sigmoid(opacity) * exp(2 * mean(scale))",
+        "splats": int(splats),
+        "total_weight": float(total_weight),
+        "ambient": {"r": float(ambient[0]), "g": float(ambient[1]), "b": float(ambient[2])},
+        "dominant_direction": None,
+        "directional_intensity": 0.0,
+        "directional_color": {"r": 0.0, "g": 0.0, "b": 0.0},
+        "dc_mean": [float(v) for v in dc_mean],
+        "l1_mean": None,
+    }
+    if l1_sum is None or total_weight <= 0:
+        return sh
+
+    l1_mean = np.asarray(l1_sum, dtype=np.float64) / total_weight
+    gradients = sh_band1_vectors(l1_mean)
+    luma_gradient = LUMA_RGB @ gradients
+    norm = float(np.linalg.norm(luma_gradient))
+    sh["l1_mean"] = [[float(v) for v in row] for row in l1_mean]
+    if norm < 1e-9:
+        return sh
+    direction = -luma_gradient / norm
+    color = np.clip(-(gradients @ direction), 0, None)
+    sh["dominant_direction"] = [float(v) for v in direction]
+    sh["directional_intensity"] = norm
+    sh["directional_color"] = {"r": float(color[0]), "g": float(color[1]), "b": float(color[2])}
+    return sh
+
+
+class ProbeGrid:
+    """Coarse voxel grid of weighted SH moments.
+
+    Accumulate chunk by chunk with add(); every statistic is a np.bincount over flattened
+    voxel indices, so memory is bounded by the grid, not by the number of splats.
+    """
+
+    def __init__(self, origin, voxel_size, dims, with_l1=True):
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.voxel_size = np.asarray(voxel_size, dtype=np.float64)
+        self.dims = np.asarray(dims, dtype=np.int64)
+        size = int(np.prod(self.dims))
+        self.weight = np.zeros(size, dtype=np.float64)
+        self.count = np.zeros(size, dtype=np.int64)
+        self.dc_sum = np.zeros((size, 3), dtype=np.float64)
+        self.l1_sum = np.zeros((size, 3, 3), dtype=np.float64) if with_l1 else None
+
+    @classmethod
+    def from_positions(cls, positions, resolution, with_l1=True):
+        """Grid covering the percentile bounds of `positions` (a sample is enough), with
+        `resolution` cubic voxels along the longest axis."""
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        if len(positions) == 0:
+            return cls(np.zeros(3), np.ones(3), np.ones(3, dtype=np.int64), with_l1)
+        lo, hi = np.percentile(positions, GRID_BOUNDS_PERCENTILES, axis=0)
+        extent = np.maximum(hi - lo, 1e-6)
+        voxel = float(extent.max()) / resolution
+        dims = np.clip(np.ceil(extent / voxel).astype(np.int64), 1, resolution)
+        return cls(lo, np.full(3, voxel), dims, with_l1)
+
+    def flat_index(self, positions):
+        cell = np.floor((np.asarray(positions, dtype=np.float64) - self.origin) / self.voxel_size).astype(np.int64)
+        cell = np.clip(cell, 0, self.dims - 1)
+        return np.ravel_multi_index(cell.T, self.dims)
+
+    def add(self, positions, weights, dc, l1=None):
+        """positions (N, 3), weights (N,), dc (N, 3), l1 (N, 3, 3) channel x m."""
+        index = self.flat_index(positions)
+        size = len(self.weight)
+        weights = np.asarray(weights, dtype=np.float64)
+        self.weight += np.bincount(index, weights=weights, minlength=size)
+        self.count += np.bincount(index, minlength=size)
+        for c in range(3):
+            self.dc_sum[:, c] += np.bincount(index, weights=weights * dc[:, c], minlength=size)
+        if self.l1_sum is not None and l1 is not None:
+            for c in range(3):
+                for m in range(3):
+                    self.l1_sum[:, c, m] += np.bincount(index, weights=weights * l1[:, c, m], minlength=size)
+
+    def save(self, path):
+        arrays = {
+            "origin": self.origin, "voxel_size": self.voxel_size, "dims": self.dims,
+            "weight": self.weight.astype(np.float32), "count": self.count.astype(np.int32),
+            "dc_sum": self.dc_sum.astype(np.float32),
+        }
+        if self.l1_sum is not None:
+            arrays["l1_sum"] = self.l1_sum.astype(np.float32)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            grid = cls(data["origin"], data["voxel_size"], data["dims"], with_l1="l1_sum" in data)
+            grid.weight = data["weight"].astype(np.float64)
+            grid.count = data["count"].astype(np.int64)
+            grid.dc_sum = data["dc_sum"].astype(np.float64)
+            if grid.l1_sum is not None:
+                grid.l1_sum = data["l1_sum"].astype(np.float64)
+        return grid
+
+    def occupied(self):
+        return int(np.count_nonzero(self.weight > 0))
+
+    def voxel_center(self, flat):
+        return self.origin + (np.array(np.unravel_index(flat, self.dims)) + 0.5) * self.voxel_size
+
+    def nearest(self, position):
+        """sh_lighting dict (plus "voxel" and "center") of the non-empty probe closest to `position`."""
+        filled = np.flatnonzero(self.weight > 0)
+        if len(filled) == 0:
+            return None
+        centers = self.origin + (np.stack(np.unravel_index(filled, self.dims), axis=1) + 0.5) * self.voxel_size
+        flat = int(filled[np.argmin(np.sum((centers - np.asarray(position, dtype=np.float64)) ** 2, axis=1))])
+        sh = derive_sh_lighting(self.weight[flat], self.dc_sum[flat],
+                                None if self.l1_sum is None else self.l1_sum[flat], self.count[flat])
+        sh["voxel"] = [int(v) for v in np.unravel_index(flat, self.dims)]
+        sh["center"] = [float(v) for v in self.voxel_center(flat)]
+        return sh
@@ -0,0 +1,68 @@
+"""
+Farneback 光流工具
+Author: zhangxin
+功能：统一的 Farneback 稠密光流计算（降采样计算、按原始像素尺度返回）、平均运动幅度、
+      基于反向光流的图像/掩膜变形（remap），以及变形后掩膜的光度一致性置信度。
+      供镜头运动检测（scripts/detect_motion_segments.py）与镜头级掩膜传播（资产采集 --shot）共用。
+输入：BGR 或灰度帧（numpy uint8）。
+输出：光流场 (H', W', 2)、运动幅度、变形后的图像/掩膜、置信度。
+依赖：opencv-python, numpy。
+"""
+import cv2
+import numpy as np
+
+FARNEBACK_PARAMS = dict(pyr_scale=0.5, levels=3, winsize=15, iterations=3, poly_n=5, poly_sigma=1.2, flags=0)
+
+
+def _gray(frame):
+    return frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def compute_flow(frame1, frame2, scale=0.25):
+    """Farneback flow frame1 -> frame2 on frames downscaled by `scale`.
+
+    The field has the downscaled resolution; vectors are in downscaled pixels.
+    """
+    gray1, gray2 = _gray(frame1), _gray(frame2)
+    if scale != 1.0:
+        gray1 = cv2.resize(gray1, None, fx=scale, fy=scale)
+        gray2 = cv2.resize(gray2, None, fx=scale, fy=scale)
+    return cv2.calcOpticalFlowFarneback(gray1, gray2, None, **FARNEBACK_PARAMS)
+
+
+def flow_magnitude(frame1, frame2, scale=0.25):
+    """Mean optical flow magnitude between two frames, in original pixels per frame."""
+    flow = compute_flow(frame1, frame2, scale)
+    magnitude = np.sqrt(flow[..., 0]**2 + flow[..., 1]**2)
+    return float(np.mean(magnitude)) / scale
+
+
+def upsample_flow(flow, shape, scale):
+    """Resize a flow computed at `scale` to `shape` (H, W) and convert it to full-res pixels."""
+    h, w = shape[:2]
+    if scale == 1.0 and flow.shape[:2] == (h, w):
+        return flow
+    return cv2.resize(flow, (w, h), interpolation=cv2.INTER_LINEAR) / scale
+
+
+def backward_warp(image, flow, interpolation=cv2.INTER_LINEAR):
+    """Sample `image` at x + flow(x): with the flow target -> source this pulls a source
+    frame (or mask) into the target frame's geometry."""
+    h, w = flow.shape[:2]
+    grid_x, grid_y = np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32))
+    map_x = grid_x + flow[..., 0].astype(np.float32)
+    map_y = grid_y + flow[..., 1].astype(np.float32)
+    return cv2.remap(image, map_x, map_y, interpolation, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+
+def photometric_confidence(target, warped_source, mask, tolerance=20):
+    """Share of `mask` pixels where the warped source stays within `tolerance` of the target
+    on every channel."""
+    region = mask > 0
+    total = int(np.count_nonzero(region))
+    if total == 0:
+        return 0.0
+    diff = cv2.absdiff(target, warped_source)
+    if diff.ndim == 3:
+        diff = diff.max(axis=2)
+    return float(np.count_nonzero(diff[region] <= tolerance)) / total
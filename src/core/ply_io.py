@@ -0,0 +1,202 @@
+"""
+PLY 头解析与二进制顶点数据映射
+Author: zhangxin
+功能：只读取 PLY 文本头（格式、元素数量、属性类型），计算二进制数据区的偏移与行宽，
+      并以 numpy memmap 方式映射固定宽度元素（如 3DGS 的 vertex），无需把整份点云读入内存；
+      可只暴露所需列并按固定行数分块拷出，峰值内存与点云规模无关。
+输入：PLY 文件路径（ascii / binary_little_endian / binary_big_endian）。
+输出：PlyHeader（元素列表、数据起始偏移、期望数据长度）、结构化 memmap 视图以及按列分块迭代器。
+依赖：numpy。
+"""
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+
+PLY_SCALAR_TYPES = {
+    "char": "i1", "int8": "i1",
+    "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2",
+    "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4",
+    "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4",
+    "double": "f8", "float64": "f8",
+}
+
+MAX_HEADER_BYTES = 1 << 20
+# Rows copied out of a mapping per step by iter_column_chunks.
+DEFAULT_CHUNK_ROWS = 1 << 20
+
+
+class PlyFormatError(ValueError):
+    """Raised when a file is not a PLY or its header is malformed."""
+
+
+@dataclass
+class PlyProperty:
+    name: str
+    dtype: str = None          # scalar properties
+    count_dtype: str = None    # list properties: type of the length prefix
+    item_dtype: str = None     # list properties: type of the items
+
+    @property
+    def is_list(self):
+        return self.count_dtype is not None
+
+
+@dataclass
+class PlyElement:
+    name: str
+    count: int
+    properties: list = field(default_factory=list)
+
+    @property
+    def fixed_size(self):
+        return not any(prop.is_list for prop in self.properties)
+
+    def dtype(self, byte_order="<"):
+        if not self.fixed_size:
+            raise PlyFormatError(f"element '{self.name}' has list properties and no fixed row size")
+        return np.dtype([(prop.name, byte_order + prop.dtype) for prop in self.properties])
+
+    def property_names(self):
+        return [prop.name for prop in self.properties]
+
+
+@dataclass
+class PlyHeader:
+    path: str
+    format: str
+    elements: list
+    data_offset: int
+    file_size: int
+
+    @property
+    def byte_order(self):
+        return ">" if self.format == "binary_big_endian" else "<"
+
+    @property
+    def is_binary(self):
+        return self.format.startswith("binary")
+
+    def element(self, name):
+        for element in self.elements:
+            if element.name == name:
+                return element
+        return None
+
+    def element_offset(self, name):
+        """Byte offset of an element's data, or None if a preceding element has variable size."""
+        offset = self.data_offset
+        for element in self.elements:
+            if element.name == name:
+                return offset
+            if not element.fixed_size:
+                return None
+            offset += element.count * element.dtype(self.byte_order).itemsize
+        return None
+
+    def fixed_data_size(self):
+        """Bytes needed by the leading run of fixed-size elements (all of them for 3DGS files)."""
+        size = 0
+        for element in self.elements:
+            if not element.fixed_size:
+                break
+            size += element.count * element.dtype(self.byte_order).itemsize
+        return size
+
+
+def read_ply_header(path):
+    """Parse only the PLY header; raises PlyFormatError on malformed input."""
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if f.readline().strip() != b"ply":
+            raise PlyFormatError("missing 'ply' magic")
+        fmt = None
+        elements = []
+        while True:
+            raw = f.readline()
+            if not raw:
+                raise PlyFormatError("file ends before 'end_header'")
+            if f.tell() > MAX_HEADER_BYTES:
+                raise PlyFormatError("header too large")
+            tokens = raw.decode("ascii", errors="replace").split()
+            if not tokens or tokens[0] in ("comment", "obj_info"):
+                continue
+            keyword = tokens[0]
+            if keyword == "format":
+                if len(tokens) < 2 or tokens[1] not in ("ascii", "binary_little_endian", "binary_big_endian"):
+                    raise PlyFormatError(f"unsupported format line: {raw!r}")
+                fmt = tokens[1]
+            elif keyword == "element":
+                if len(tokens) != 3 or not tokens[2].isdigit():
+                    raise PlyFormatError(f"bad element line: {raw!r}")
+                elements.append(PlyElement(tokens[1], int(tokens[2])))
+            elif keyword == "property":
+                if not elements:
+                    raise PlyFormatError("property before any element")
+                elements[-1].properties.append(_parse_property(tokens, raw))
+            elif keyword == "end_header":
+                break
+            else:
+                raise PlyFormatError(f"unknown header keyword '{keyword}'")
+        if fmt is None:
+            raise PlyFormatError("missing format line")
+        return PlyHeader(path=path, format=fmt, elements=elements, data_offset=f.tell(), file_size=file_size)
+
+
+def _parse_property(tokens, raw):
+    if len(tokens) == 5 and tokens[1] == "list":
+        count_type, item_type = PLY_SCALAR_TYPES.get(tokens[2]), PLY_SCALAR_TYPES.get(tokens[3])
+        if count_type is None or item_type is None:
+            raise PlyFormatError(f"unknown list property type: {raw!r}")
+        return PlyProperty(tokens[4], count_dtype=count_type, item_dtype=item_type)
+    if len(tokens) == 3 and tokens[1] in PLY_SCALAR_TYPES:
+        return PlyProperty(tokens[2], dtype=PLY_SCALAR_TYPES[tokens[1]])
+    raise PlyFormatError(f"bad property line: {raw!r}")
+
+
+def memmap_element(header, name="vertex"):
+    """Structured read-only memmap over a fixed-size binary element."""
+    if not header.is_binary:
+        raise PlyFormatError("memory mapping requires a binary PLY")
+    element = header.element(name)
+    if element is None:
+        raise PlyFormatError(f"no '{name}' element")
+    offset = header.element_offset(name)
+    if offset is None:
+        raise PlyFormatError(f"'{name}' follows a variable-size element")
+    dtype = element.dtype(header.byte_order)
+    if offset + element.count * dtype.itemsize > header.file_size:
+        raise PlyFormatError(f"'{name}' data is truncated")
+    if element.count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(header.path, dtype=dtype, mode="r", offset=offset, shape=(element.count,))
+
+
+def memmap_columns(header, names, name="vertex"):
+    """Like memmap_element, but the structured dtype exposes only `names` (rows keep their stride)."""
+    data = memmap_element(header, name)
+    missing = [column for column in names if column not in data.dtype.names]
+    if missing:
+        raise PlyFormatError(f"'{name}' lacks properties: {', '.join(missing)}")
+    fields = data.dtype.fields
+    return data.view(np.dtype({
+        "names": list(names),
+        "formats": [fields[column][0] for column in names],
+        "offsets": [fields[column][1] for column in names],
+        "itemsize": data.dtype.itemsize,
+    }))
+
+
+def iter_column_chunks(header, names, name="vertex", chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield {column: native-endian array} for consecutive blocks of at most `chunk_rows` rows.
+
+    Only the requested columns are copied out of the mapping, so peak memory is bounded by
+    the chunk size rather than the element count.
+    """
+    data = memmap_columns(header, names, name)
+    for start in range(0, len(data), chunk_rows):
+        block = data[start:start + chunk_rows]
+        yield {column: block[column].astype(block.dtype[column].newbyteorder("=")) for column in names}
@@ -0,0 +1,227 @@
+"""
+跨帧道具去重
+Author: zhangxin
+功能：为每个采集裁剪计算紧凑签名（64 位 dHash 感知哈希 + 48 维 HSV 颜色直方图 + 清晰度/掩膜质量），
+      将不同帧中的近重复裁剪聚为同一道具，并按清晰度、面积占比与掩膜质量挑选代表裁剪（后到的明显更优裁剪
+      会被提升为新代表）。只有代表裁剪进入 3D 生成后端，其余待代表生成成功后才在清单中以 linked 状态
+      指向代表资产；代表失败时重新分配或自行生成。PropDedupIndex 可在批处理的多个会话间共享（线程安全）。
+输入：BGRA 裁剪（numpy 数组或 PNG 路径）及采集清单条目。
+输出：签名字典；每个条目的去重决策（代表 / 关联目标）。
+依赖：numpy；计算签名时需要 opencv-python。
+"""
+import math
+import threading
+
+import numpy as np
+
+DHASH_SIZE = 8
+HIST_BINS = (8, 3, 2)  # H, S, V
+DEFAULT_MAX_HAMMING = 10
+DEFAULT_MIN_HIST_SIMILARITY = 0.8
+# quality_scores() range is 0..3; a duplicate must beat the representative by this much to
+# be generated too (small differences are not worth a second generation).
+DEFAULT_PROMOTE_MARGIN = 0.3
+
+
+def crop_signature(bgra):
+    """Signature of a BGRA crop (array or path); pixels with alpha <= 127 are ignored."""
+    import cv2  # only the harvester side needs OpenCV; matching works on stored signatures
+
+    if isinstance(bgra, str):
+        bgra = cv2.imread(bgra, cv2.IMREAD_UNCHANGED)
+        if bgra is None:
+            return None
+    if bgra.ndim == 2 or bgra.shape[2] == 3:
+        alpha = np.full(bgra.shape[:2], 255, np.uint8)
+        bgr = bgra if bgra.ndim == 3 else cv2.cvtColor(bgra, cv2.COLOR_GRAY2BGR)
+    else:
+        bgr, alpha = bgra[:, :, :3], bgra[:, :, 3]
+    fg = (alpha > 127).astype(np.uint8)
+    mask_area = int(np.count_nonzero(fg))
+
+    # Difference hash on the matted luma: robust to small shifts, scale and compression.
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    gray[fg == 0] = 0
+    small = cv2.resize(gray, (DHASH_SIZE + 1, DHASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    dhash = int("".join("1" if b else "0" for b in bits), 2)
+
+    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1, 2], fg if mask_area else None, list(HIST_BINS), [0, 180, 0, 256, 0, 256]).flatten()
+    hist /= max(float(hist.sum()), 1.0)
+
+    # Quality: sharpness (Laplacian variance inside the eroded mask) and mask solidity.
+    interior = cv2.erode(fg, np.ones((5, 5), np.uint8))
+    laplacian = cv2.Laplacian(gray, cv2.CV_64F)
+    sharpness = float(laplacian[interior > 0].var()) if np.count_nonzero(interior) > 1 else 0.0
+    solidity = 0.0
+    contours, _ = cv2.findContours(fg, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if contours:
+        hull_area = cv2.contourArea(cv2.convexHull(np.vstack(contours)))
+        solidity = min(1.0, mask_area / hull_area) if hull_area > 0 else 0.0
+
+    return {
+        "dhash": f"{dhash:016x}",
+        "hist": [round(float(v), 4) for v in hist],
+        "sharpness": round(sharpness, 3),
+        "solidity": round(solidity, 4),
+        "mask_area": mask_area,
+    }
+
+
+def hamming(a, b):
+    return bin(int(a["dhash"], 16) ^ int(b["dhash"], 16)).count("1")
+
+
+def hist_similarity(a, b):
+    """Histogram intersection of two L1-normalised histograms (1.0 = identical colours)."""
+    return float(np.minimum(np.asarray(a["hist"]), np.asarray(b["hist"])).sum())
+
+
+def is_duplicate(a, b, max_hamming=DEFAULT_MAX_HAMMING, min_hist_similarity=DEFAULT_MIN_HIST_SIMILARITY):
+    return hamming(a, b) <= max_hamming and hist_similarity(a, b) >= min_hist_similarity
+
+
+def quality_scores(candidates):
+    """Representative score per candidate: sharpness (log, relative to the best), area ratio
+    (relative to the largest) and mask solidity, each in [0, 1]."""
+    max_sharp = max((math.log1p(c["signature"]["sharpness"]) for c in candidates), default=0.0) or 1.0
+    max_area = max((c.get("area_ratio") or 0.0 for c in candidates), default=0.0) or 1.0
+    return [
+        math.log1p(c["signature"]["sharpness"]) / max_sharp
+        + (c.get("area_ratio") or 0.0) / max_area
+        + c["signature"]["solidity"]
+        for c in candidates
+    ]
+
+
+class PropDedupIndex:
+    """Registry of representative crops, shared by every session of a run.
+
+    assign() decides a whole harvest manifest at once, visiting candidates best quality
+    first. Crops of the same source frame are never linked: they are separate objects by
+    construction. A crop that matches representatives of other frames is linked to the
+    best of them, unless its own quality beats theirs by `promote_margin`: then it is
+    generated as well and becomes the cluster's preferred representative, so the best
+    crop of the batch is generated whatever order the sessions run in.
+
+    Representatives are "pending" until resolve() reports the outcome of their generation.
+    A linked crop should only be recorded once wait_any() reports "success"; on "failure"
+    it is re-assigned with relink() (to another live representative, or generated itself).
+    Entries are keyed by (session_id, asset_id).
+    """
+
+    def __init__(self, max_hamming=DEFAULT_MAX_HAMMING, min_hist_similarity=DEFAULT_MIN_HIST_SIMILARITY,
+                 promote_margin=DEFAULT_PROMOTE_MARGIN):
+        self.max_hamming = max_hamming
+        self.min_hist_similarity = min_hist_similarity
+        self.promote_margin = promote_margin
+        self.lock = threading.Condition()
+        self.representatives = []
+        self.links = {}
+
+    @staticmethod
+    def _key(candidate):
+        return (candidate.get("session_id"), candidate["asset_id"])
+
+    def _match(self, candidate):
+        """Live representatives of other frames that `candidate` duplicates."""
+        return [
+            rep for rep in self.representatives
+            if rep["state"] != "failed"
+            and rep["source_image"] != candidate["source_image"]
+            and is_duplicate(rep["signature"], candidate["signature"], self.max_hamming, self.min_hist_similarity)
+        ]
+
+    def _decide_locked(self, candidate, score):
+        matches = self._match(candidate)
+        if matches:
+            # Candidate and matches are scored together, so the comparison does not depend
+            # on the manifest each of them arrived with.
+            scores = quality_scores([candidate] + matches)
+            best = max(range(len(matches)), key=lambda i: (scores[i + 1], -hamming(matches[i]["signature"], candidate["signature"])))
+            if scores[0] <= scores[best + 1] + self.promote_margin:
+                rep = matches[best]
+                self.links[self._key(candidate)] = rep
+                link = {k: v for k, v in rep.items()
+                        if k not in ("signature", "area_ratio", "source_image", "score", "state") and not k.startswith("_")}
+                link.update({
+                    "hamming": hamming(rep["signature"], candidate["signature"]),
+                    "hist_similarity": round(hist_similarity(rep["signature"], candidate["signature"]), 4),
+                })
+                return link
+        self.links.pop(self._key(candidate), None)
+        self.representatives.append(dict(candidate, score=round(score, 4), state="pending"))
+        return None
+
+    def assign(self, candidates):
+        """Return {asset_id: None | link} for candidates of the form
+        {"asset_id", "session_id", "source_image", "area_ratio", "signature", **extra}.
+
+        None means "generate it" (it is now a pending representative). A link carries the
+        representative's extra fields (keys starting with "_" stay in memory only) plus
+        "hamming" and "hist_similarity".
+        """
+        decisions = {}
+        usable = [c for c in candidates if c.get("signature")]
+        for candidate in candidates:
+            if not candidate.get("signature"):
+                decisions[candidate["asset_id"]] = None
+        order = sorted(zip(quality_scores(usable), range(len(usable))), key=lambda pair: -pair[0])
+        with self.lock:
+            for score, index in order:
+                decisions[usable[index]["asset_id"]] = self._decide_locked(usable[index], score)
+        return decisions
+
+    def register(self, candidate, linked_to=None):
+        """Seed the index with an outcome from an earlier run (e.g. a completed session that
+        is skipped): a generated asset becomes a "success" representative, a linked one maps
+        to the representative named by its `linked_to` record (if that one is registered)."""
+        with self.lock:
+            if linked_to is None:
+                self.representatives.append(dict(candidate, score=0.0, state="success"))
+                return
+            target = (linked_to.get("session_id"), linked_to.get("asset_id"))
+            for rep in self.representatives:
+                if self._key(rep) == target and rep["state"] != "failed":
+                    self.links[self._key(candidate)] = rep
+                    return
+
+    def relink(self, candidate):
+        """Re-assign a linked candidate whose representative failed."""
+        with self.lock:
+            return self._decide_locked(candidate, 0.0)
+
+    def resolve(self, session_id, asset_id, success):
+        """Record the generation outcome of a representative and wake its waiters."""
+        with self.lock:
+            for rep in self.representatives:
+                if self._key(rep) == (session_id, asset_id) and rep["state"] == "pending":
+                    rep["state"] = "success" if success else "failed"
+            self.lock.notify_all()
+
+    def abandon(self, session_id):
+        """Fail the still-pending representatives of a session that ended (e.g. crashed)."""
+        with self.lock:
+            for rep in self.representatives:
+                if rep.get("session_id") == session_id and rep["state"] == "pending":
+                    rep["state"] = "failed"
+            self.lock.notify_all()
+
+    def wait_any(self, candidates, timeout=None):
+        """Block until at least one of the linked `candidates` has a resolved representative.
+
+        Returns [(candidate, "success" | "failure")] for every resolved one ([] on timeout).
+        """
+        def resolved():
+            done = []
+            for candidate in candidates:
+                rep = self.links.get(self._key(candidate))
+                if rep is None or rep["state"] == "failed":
+                    done.append((candidate, "failure"))
+                elif rep["state"] == "success":
+                    done.append((candidate, "success"))
+            return done
+
+        with self.lock:
+            return self.lock.wait_for(resolved, timeout) or []
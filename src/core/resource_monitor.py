@@ -0,0 +1,197 @@
+"""
+步骤资源占用采样
+Author: zhangxin
+功能：在步骤子进程运行期间轮询 /proc 采样整个进程树的峰值常驻内存 (RSS) 与磁盘 I/O 字节数，
+      可用时通过 nvidia-smi 采样显存占用；进程结束后由 wait4 取得用户态/内核态 CPU 时间。
+      常驻 Worker 模式下 CPU 与 I/O 由 Worker 端按任务前后的 getrusage / /proc/self/io 差值上报。
+输入：子进程命令行（或已运行进程的 PID）。
+输出：资源字典 {peak_rss_mb, cpu_user_s, cpu_sys_s, io_read_mb, io_write_mb, gpu_mem_peak_mb, source}。
+依赖：Python 标准库（Linux /proc；nvidia-smi 可选）。
+"""
+import os
+import shutil
+import threading
+import subprocess
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_MB = 1024.0 * 1024.0
+
+
+def _read_ppid_map():
+    """Map pid -> parent pid for every visible process."""
+    parents = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return parents
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm may contain spaces/parentheses; fields after the last ')' are fixed.
+        fields = stat.rsplit(")", 1)[-1].split()
+        if len(fields) > 1:
+            parents[int(entry)] = int(fields[1])
+    return parents
+
+
+def process_tree(root_pid):
+    """Return root_pid plus all of its live descendants."""
+    children = {}
+    for pid, ppid in _read_ppid_map().items():
+        children.setdefault(ppid, []).append(pid)
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def _read_rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_proc_io(pid="self"):
+    """(read_bytes, write_bytes) at the storage layer, or None if unavailable."""
+    counters = {}
+    try:
+        with open(f"/proc/{pid}/io", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                counters[key.strip()] = int(value)
+    except (OSError, ValueError):
+        return None
+    return counters.get("read_bytes", 0), counters.get("write_bytes", 0)
+
+
+def _query_gpu_memory_mb():
+    """pid -> used GPU memory (MB) from nvidia-smi."""
+    try:
+        out = subprocess.check_output(
+            ["nvidia-smi", "--query-compute-apps=pid,used_memory", "--format=csv,noheader,nounits"],
+            stderr=subprocess.DEVNULL, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    usage = {}
+    for line in out.splitlines():
+        parts = [p.strip() for p in line.split(",")]
+        if len(parts) == 2 and parts[0].isdigit():
+            try:
+                usage[int(parts[0])] = usage.get(int(parts[0]), 0.0) + float(parts[1])
+            except ValueError:
+                continue
+    return usage
+
+
+class ProcessTreeMonitor:
+    """Background sampler of one process tree's RSS, I/O and GPU memory."""
+
+    def __init__(self, root_pid, interval=0.5, gpu_interval=2.0):
+        self.root_pid = root_pid
+        self.interval = interval
+        self.gpu_every = max(1, int(round(gpu_interval / interval))) if interval > 0 else 1
+        self.gpu_available = shutil.which("nvidia-smi") is not None
+        self.peak_rss_bytes = 0
+        self.peak_gpu_mb = None
+        self.io_start = {}
+        self.io_last = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        ticks = 0
+        while True:
+            self.sample(with_gpu=self.gpu_available and ticks % self.gpu_every == 0)
+            ticks += 1
+            if self._stop.wait(self.interval):
+                break
+
+    def sample(self, with_gpu=False):
+        tree = process_tree(self.root_pid)
+        rss_total = 0
+        for pid in tree:
+            rss = _read_rss_bytes(pid)
+            if rss:
+                rss_total += rss
+            io = read_proc_io(pid)
+            if io is not None:
+                self.io_start.setdefault(pid, io)
+                self.io_last[pid] = io
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss_total)
+
+        if with_gpu:
+            gpu_usage = _query_gpu_memory_mb()
+            if gpu_usage is not None:
+                used = sum(gpu_usage.get(pid, 0.0) for pid in tree)
+                self.peak_gpu_mb = max(self.peak_gpu_mb or 0.0, used)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.usage()
+
+    def usage(self, baseline_io=False):
+        """Resource dict; `baseline_io` subtracts the first sample (for long-lived roots)."""
+        read_bytes = write_bytes = 0
+        for pid, (r, w) in self.io_last.items():
+            r0, w0 = self.io_start[pid] if baseline_io else (0, 0)
+            read_bytes += r - r0
+            write_bytes += w - w0
+        return {
+            "peak_rss_mb": round(self.peak_rss_bytes / _MB, 1),
+            "io_read_mb": round(read_bytes / _MB, 2),
+            "io_write_mb": round(write_bytes / _MB, 2),
+            "gpu_mem_peak_mb": self.peak_gpu_mb,
+        }
+
+
+def rusage_dict(rusage):
+    return {
+        "cpu_user_s": round(rusage.ru_utime, 3),
+        "cpu_sys_s": round(rusage.ru_stime, 3),
+        # Linux reports ru_maxrss in KB; it is the largest single process, not the tree.
+        "max_rss_mb": round(rusage.ru_maxrss / 1024.0, 1),
+    }
+
+
+def run_monitored(cmd, env=None, stdout=None, stderr=None, interval=0.5):
+    """subprocess.run() equivalent that also returns the child's resource usage."""
+    proc = subprocess.Popen(cmd, env=env, stdout=stdout, stderr=stderr)
+    monitor = ProcessTreeMonitor(proc.pid, interval=interval).start()
+    rusage = None
+    try:
+        if hasattr(os, "wait4"):
+            # wait4 reaps the child and reports CPU time of it plus its reaped descendants.
+            _, status, rusage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+        else:
+            proc.wait()
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            proc.wait()
+        raise
+    finally:
+        usage = monitor.stop()
+
+    usage["source"] = "proc"
+    if rusage is not None:
+        usage.update(rusage_dict(rusage))
+        usage["peak_rss_mb"] = max(usage["peak_rss_mb"], usage.pop("max_rss_mb"))
+    return proc.returncode, usage
@@ -1,7 +1,7 @@
 """
 管线运行通用工具库
 Author: zhangxin
-功能：包含 SHA-256 计算、Git 提交记录提取、Python 运行时信息收集以及 Manifest 清单管理类。
+功能：包含 SHA-256 计算（经持久化校验和缓存）、Git 提交记录提取、Python 运行时信息收集以及 Manifest 清单管理类。
 输入：文件路径、资产 ID、运行状态信息。
 输出：更新后的 JSON 清单文件及运行环境摘要。
 依赖：Python 标准库、PyTorch（可选，用于版本检测）。
@@ -11,22 +11,21 @@ import subprocess
 import time
 import json
 import sys
-import hashlib
 import platform
+import atexit
+import threading
 from dataclasses import dataclass
 from configparser import ConfigParser
 from importlib import metadata
 
+from src.core.hashing import file_sha256
+from src.core.resource_monitor import run_monitored
+from src.core.tracing import current_tracer, span
 
-def _compute_sha256(file_path):
-    if not file_path or not os.path.exists(file_path) or not os.path.isfile(file_path):
-        return None
 
-    hasher = hashlib.sha256()
-    with open(file_path, "rb") as file_obj:
-        for chunk in iter(lambda: file_obj.read(8192), b""):
-            hasher.update(chunk)
-    return hasher.hexdigest()
+def _compute_sha256(file_path):
+    # Served from the persistent checksum cache when the file is unchanged (src/core/hashing.py).
+    return file_sha256(file_path)
 
 
 def _get_git_commit():
@@ -80,15 +79,54 @@ class StepRunResult:
     stdout_log: str = None
     stderr_log: str = None
     duration_s: float = 0.0
+    via_worker: bool = False
+    cached: bool = False
+    resources: dict = None
 
 
 class StepRunner:
     """Helper class for orchestrating external scripts across different conda environments."""
 
-    def __init__(self, scripts_dict):
+    def __init__(self, scripts_dict, worker_pool=None, cache=None, step_caches=None):
         self.scripts = scripts_dict
-        
-    def run(self, name, script_key, args, env_python, extra_env=None, log_dir=None, step_id=None, asset_id=None):
+        self.worker_pool = worker_pool
+        self.cache = cache
+        # Per-script overrides of `cache`, e.g. a cache directory shared across output roots.
+        self.step_caches = step_caches or {}
+
+    def close(self):
+        """Stop any warm workers owned by this runner."""
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown()
+
+    def _finish(self, name, returncode, stdout_log, stderr_log, start_time, via_worker=False, resources=None):
+        elapsed = time.time() - start_time
+        if resources:
+            resources["duration_s"] = round(elapsed, 3)
+        if returncode == 0:
+            peak = f"，峰值内存 {resources['peak_rss_mb']:.0f}MB" if resources and resources.get("peak_rss_mb") else ""
+            print(f"✅ 步骤 '{name}' 执行成功，耗时 {elapsed:.2f}s{peak}")
+        else:
+            print(f"❌ 步骤 '{name}' 执行失败，退出码: {returncode}")
+        return StepRunResult(
+            success=returncode == 0,
+            returncode=returncode,
+            stdout_log=stdout_log,
+            stderr_log=stderr_log,
+            duration_s=elapsed,
+            via_worker=via_worker,
+            resources=resources,
+        )
+
+    def run(self, name, script_key, args, env_python, extra_env=None, log_dir=None, step_id=None, asset_id=None,
+            cache_inputs=None, cache_outputs=None, cache_fingerprint="sha256"):
+        """Run one step script.
+
+        When a StepCache is attached and `cache_outputs` is given, the step is keyed
+        on the content of `cache_inputs` plus script/args/env and restored from the
+        cache on a hit instead of being executed. `cache_fingerprint` selects how
+        inputs are identified (see StepCache.make_key).
+        """
         script_path = self.scripts.get(script_key)
         if not script_path or not os.path.exists(script_path):
             print(f"⚠️ Script for '{name}' not found at {script_path}, skipping.")
@@ -111,40 +149,76 @@ class StepRunner:
                 else:
                     env[k] = v
         
+        tracer = current_tracer()
+        if tracer is not None:
+            env.update(tracer.child_env())
+
+        with span(name, cat="step", step_id=step_id, asset_id=asset_id, script=script_key) as span_args:
+            result = self._run_step(name, script_key, script_path, full_cmd, args, env_python, extra_env, env,
+                                    log_dir, step_id, asset_id, cache_inputs, cache_outputs, cache_fingerprint)
+            span_args.update({"returncode": result.returncode, "cached": result.cached, "via_worker": result.via_worker})
+        return result
+
+    def _run_step(self, name, script_key, script_path, full_cmd, args, env_python, extra_env, env,
+                  log_dir, step_id, asset_id, cache_inputs, cache_outputs, cache_fingerprint="sha256"):
         start_time = time.time()
 
         stdout_log = None
         stderr_log = None
-        stdout_stream = None
-        stderr_stream = None
         if log_dir and step_id and asset_id:
             asset_log_dir = os.path.join(log_dir, asset_id)
             os.makedirs(asset_log_dir, exist_ok=True)
             stdout_log = os.path.join(asset_log_dir, f"{step_id}.stdout.log")
             stderr_log = os.path.join(asset_log_dir, f"{step_id}.stderr.log")
+
+        cache_key = None
+        cache = self.step_caches.get(script_key, self.cache)
+        if cache is not None and cache_outputs:
+            cache_key = cache.make_key(script_path, args, env_python, extra_env, cache_inputs, cache_outputs,
+                                       fingerprint=cache_fingerprint)
+            if cache.materialize(cache_key, cache_outputs, stdout_log=stdout_log, stderr_log=stderr_log,
+                                 inputs=cache_inputs):
+                print(f"♻️ 步骤 '{name}' 命中缓存 ({cache_key[:12]})，已还原产物，跳过执行。")
+                return StepRunResult(
+                    success=True,
+                    returncode=0,
+                    stdout_log=stdout_log,
+                    stderr_log=stderr_log,
+                    duration_s=time.time() - start_time,
+                    cached=True,
+                    resources={"source": "cache", "duration_s": round(time.time() - start_time, 3)},
+                )
+
+        result = self._execute(name, script_key, script_path, full_cmd, args, env_python, env,
+                               stdout_log, stderr_log, start_time)
+        if cache_key and result.success:
+            cache.store(cache_key, cache_outputs, stdout_log=stdout_log, stderr_log=stderr_log, step_id=step_id,
+                        inputs=cache_inputs)
+        return result
+
+    def _execute(self, name, script_key, script_path, full_cmd, args, env_python, env, stdout_log, stderr_log, start_time):
+        stdout_stream = None
+        stderr_stream = None
+
+        # Warm worker first; None means no worker can serve this job.
+        if self.worker_pool is not None and self.worker_pool.supports(script_key):
+            usage = {}
+            returncode = self.worker_pool.dispatch(
+                script_key, script_path, env_python, args,
+                env=env, stdout_log=stdout_log, stderr_log=stderr_log, usage=usage,
+            )
+            if returncode is not None:
+                return self._finish(name, returncode, stdout_log, stderr_log, start_time, via_worker=True,
+                                    resources=usage or None)
+            print(f"⚠️ 常驻 Worker 不可用，回退为独立子进程执行。")
+
+        if stdout_log and stderr_log:
             stdout_stream = open(stdout_log, "w", encoding="utf-8")
             stderr_stream = open(stderr_log, "w", encoding="utf-8")
 
         try:
-            completed = subprocess.run(
-                full_cmd,
-                env=env,
-                stdout=stdout_stream,
-                stderr=stderr_stream,
-                check=False,
-            )
-            elapsed = time.time() - start_time
-            if completed.returncode == 0:
-                print(f"✅ 步骤 '{name}' 执行成功，耗时 {elapsed:.2f}s")
-            else:
-                print(f"❌ 步骤 '{name}' 执行失败，退出码: {completed.returncode}")
-            return StepRunResult(
-                success=completed.returncode == 0,
-                returncode=completed.returncode,
-                stdout_log=stdout_log,
-                stderr_log=stderr_log,
-                duration_s=elapsed,
-            )
+            returncode, usage = run_monitored(full_cmd, env=env, stdout=stdout_stream, stderr=stderr_stream)
+            return self._finish(name, returncode, stdout_log, stderr_log, start_time, resources=usage)
         except Exception as e:
             print(f"❌ 步骤 '{name}' 运行异常: {e}")
             return StepRunResult(
@@ -161,10 +235,55 @@ class StepRunner:
                 stderr_stream.close()
 
 
+def _atomic_write_json(path, data):
+    """Write JSON to a temp file in the same directory, then rename over `path`."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_manifest(path):
+    """Load a manifest and replay any journal entries not yet compacted into it."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    journal_path = path + ManifestManager.JOURNAL_SUFFIX
+    if os.path.exists(journal_path):
+        index = {asset.get("asset_id"): asset for asset in data.get("assets", [])}
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn final line after a crash
+                record = entry.get("record") or {}
+                asset_id = record.get("asset_id")
+                if asset_id in index:
+                    index[asset_id].clear()
+                    index[asset_id].update(record)
+                else:
+                    index[asset_id] = record
+                    data.setdefault("assets", []).append(record)
+    return data
+
+
 class ManifestManager:
-    """Manages reading, writing, and structuring the global JSON manifest."""
-    
-    def __init__(self, path, session_id, input_path, sys_argv, version="1.3.1"):
+    """Manages reading, writing, and structuring the global JSON manifest.
+
+    By default every mutation rewrites manifest.json. In journal mode each mutation
+    appends the changed asset record to `manifest.json.journal` instead, and the
+    full manifest is compacted atomically only every `checkpoint_every` mutations,
+    on `save()`/`checkpoint()` and at `close()`/interpreter exit. The compacted
+    file has exactly the same layout in both modes.
+    """
+
+    JOURNAL_SUFFIX = ".journal"
+
+    def __init__(self, path, session_id, input_path, sys_argv, version="1.3.1", journal=False, checkpoint_every=200,
+                 resume=False):
         input_files = [input_path]
         sha256_map = {
             file_path: digest
@@ -174,6 +293,16 @@ class ManifestManager:
 
         pipeline_commit = _get_git_commit() or _get_package_version()
         self.path = path
+        # Step nodes of a session may run concurrently (see src/pipelines/dag.py).
+        self.lock = threading.RLock()
+        self.journal = journal
+        self.journal_path = path + self.JOURNAL_SUFFIX
+        self.checkpoint_every = checkpoint_every
+        self._pending = 0
+        self._journal_file = None
+        self._index = {}
+        # Step usage reported before the asset record exists (e.g. scene steps).
+        self._pending_resources = {}
         self.data = {
             "session_id": session_id,
             "inputs": {
@@ -189,98 +318,215 @@ class ManifestManager:
             },
             "assets": []
         }
-        self.save()
+        self.resumed = False
+        if resume and os.path.exists(path):
+            previous = load_manifest(path)
+            if previous.get("inputs", {}).get("sha256_map") == sha256_map:
+                self.data["assets"] = previous.get("assets", [])
+                self.data["reproduce"]["resumed_from"] = previous.get("reproduce", {}).get("command")
+                self._index = {asset.get("asset_id"): asset for asset in self.data["assets"]}
+                self.resumed = True
+            else:
+                print(f"⚠️ {path} 对应的输入已变化，无法续跑，将重新开始。")
+        if self.journal:
+            atexit.register(self.close)
+        self.checkpoint()
     
     def add_asset(self, asset_record):
         """Append an asset record to the manifest."""
-        self.data["assets"].append(asset_record)
-        self.save()
+        with self.lock:
+            self.data["assets"].append(asset_record)
+            self._index[asset_record.get("asset_id")] = asset_record
+            self._commit(asset_record)
 
     def _find_asset(self, asset_id):
-        for asset in self.data["assets"]:
-            if asset.get("asset_id") == asset_id:
-                return asset
-        return None
+        return self._index.get(asset_id)
+
+    def _commit(self, asset):
+        """Persist one mutated asset record (journal append or full rewrite)."""
+        if not self.journal:
+            self.save()
+            return
+        if self._journal_file is None:
+            self._journal_file = open(self.journal_path, 'a', encoding='utf-8')
+        self._journal_file.write(json.dumps({"record": asset}, ensure_ascii=False) + "\n")
+        self._journal_file.flush()
+        self._pending += 1
+        if self.checkpoint_every and self._pending >= self.checkpoint_every:
+            self.checkpoint()
 
     def record_asset_start(self, asset_id, asset_type, backend_selected, signals, parameters_snapshot):
-        asset_record = {
-            "asset_id": asset_id,
-            "asset_type": asset_type,
-            "backend_selected": backend_selected,
-            "status": "processing",
-            "signals": signals or {},
-            "parameters_snapshot": parameters_snapshot or {},
-            "outputs": [],
-            "error": None,
-            "run_log_paths": [],
-        }
-        existing = self._find_asset(asset_id)
-        if existing is None:
-            self.data["assets"].append(asset_record)
-        else:
-            existing.update(asset_record)
-        self.save()
+        with self.lock:
+            asset_record = {
+                "asset_id": asset_id,
+                "asset_type": asset_type,
+                "backend_selected": backend_selected,
+                "status": "processing",
+                "signals": signals or {},
+                "parameters_snapshot": parameters_snapshot or {},
+                "outputs": [],
+                "error": None,
+                "run_log_paths": [],
+                "step_resources": self._pending_resources.pop(asset_id, {}),
+            }
+            existing = self._find_asset(asset_id)
+            if existing is None:
+                self.data["assets"].append(asset_record)
+                self._index[asset_id] = asset_record
+                existing = asset_record
+            else:
+                existing.update(asset_record)
+            self._commit(existing)
+
+    def record_asset_linked(self, asset_id, asset_type, backend_selected, signals, linked_to, outputs=None):
+        """Record a harvested duplicate that reuses another asset instead of being generated."""
+        with self.lock:
+            asset_record = {
+                "asset_id": asset_id,
+                "asset_type": asset_type,
+                "backend_selected": backend_selected,
+                "status": "linked",
+                "linked_to": linked_to,
+                "signals": signals or {},
+                "parameters_snapshot": {},
+                "outputs": outputs or [],
+                "error": None,
+                "run_log_paths": [],
+                "step_resources": self._pending_resources.pop(asset_id, {}),
+            }
+            existing = self._find_asset(asset_id)
+            if existing is None:
+                self.data["assets"].append(asset_record)
+                self._index[asset_id] = asset_record
+                existing = asset_record
+            else:
+                existing.clear()
+                existing.update(asset_record)
+            self._commit(existing)
 
     def record_asset_success(self, asset_id, outputs, run_log_paths):
-        asset = self._find_asset(asset_id)
-        if asset is None:
-            raise KeyError(f"Asset '{asset_id}' not found when marking success.")
-
-        asset["status"] = "success"
-        asset["outputs"] = outputs or []
-        asset["error"] = None
-        asset["run_log_paths"] = run_log_paths or []
-        self.save()
+        outputs = outputs or []
+        # Hash multi-GB outputs before taking the lock, so concurrent finalize nodes don't queue behind it.
+        output_checksums = {path: digest for path in outputs if (digest := _compute_sha256(path)) is not None}
+        with self.lock:
+            asset = self._find_asset(asset_id)
+            if asset is None:
+                raise KeyError(f"Asset '{asset_id}' not found when marking success.")
+
+            asset["status"] = "success"
+            asset["outputs"] = outputs
+            asset["output_checksums"] = output_checksums
+            asset["error"] = None
+            asset["run_log_paths"] = run_log_paths or []
+            self._commit(asset)
 
     def append_asset_run_logs(self, asset_id, run_log_paths):
-        asset = self._find_asset(asset_id)
-        if asset is None:
-            raise KeyError(f"Asset '{asset_id}' not found when appending logs.")
-
-        existing = asset.get("run_log_paths") or []
-        for path in run_log_paths or []:
-            if path and path not in existing:
-                existing.append(path)
-        asset["run_log_paths"] = existing
-        self.save()
+        with self.lock:
+            asset = self._find_asset(asset_id)
+            if asset is None:
+                raise KeyError(f"Asset '{asset_id}' not found when appending logs.")
+
+            existing = asset.get("run_log_paths") or []
+            for path in run_log_paths or []:
+                if path and path not in existing:
+                    existing.append(path)
+            asset["run_log_paths"] = existing
+            self._commit(asset)
+
+    def record_step_resources(self, asset_id, step_id, resources):
+        """Store the resource usage of one step run for an asset."""
+        if not resources:
+            return
+        with self.lock:
+            asset = self._find_asset(asset_id)
+            if asset is None:
+                self._pending_resources.setdefault(asset_id, {})[step_id] = resources
+                return
+            asset.setdefault("step_resources", {})[step_id] = resources
+            self._commit(asset)
+
+    def get_asset(self, asset_id):
+        with self.lock:
+            return self._find_asset(asset_id)
+
+    def verify_asset_outputs(self, asset_id):
+        """True if the asset succeeded and every recorded output still matches its checksum."""
+        with self.lock:
+            asset = self._find_asset(asset_id)
+            if asset is None or asset.get("status") != "success":
+                return False
+            checksums = asset.get("output_checksums")
+            outputs = asset.get("outputs") or []
+            if checksums is None or set(checksums) != set(outputs):
+                return False
+        return all(_compute_sha256(path) == digest for path, digest in checksums.items())
 
     def get_asset_run_logs(self, asset_id):
-        asset = self._find_asset(asset_id)
-        if asset is None:
-            return []
-        return asset.get("run_log_paths") or []
+        with self.lock:
+            asset = self._find_asset(asset_id)
+            if asset is None:
+                return []
+            return asset.get("run_log_paths") or []
 
     def record_asset_failure(self, asset_id, error_type, message, log_path, outputs=[]):
-        asset = self._find_asset(asset_id)
-        if asset is None:
-            raise KeyError(f"Asset '{asset_id}' not found when marking failure.")
-
-        asset["status"] = "failed"
-        asset["outputs"] = outputs or []
-        asset["error"] = {
-            "type": error_type,
-            "message": message,
-            "log_path": log_path,
-        }
-        existing = asset.get("run_log_paths") or []
-        if log_path and log_path not in existing:
-            existing.append(log_path)
-        asset["run_log_paths"] = existing
-        self.save()
+        with self.lock:
+            asset = self._find_asset(asset_id)
+            if asset is None:
+                raise KeyError(f"Asset '{asset_id}' not found when marking failure.")
+
+            asset["status"] = "failed"
+            asset["outputs"] = outputs or []
+            asset["error"] = {
+                "type": error_type,
+                "message": message,
+                "log_path": log_path,
+            }
+            existing = asset.get("run_log_paths") or []
+            if log_path and log_path not in existing:
+                existing.append(log_path)
+            asset["run_log_paths"] = existing
+            self._commit(asset)
 
     def update_asset_fields(self, asset_id, updates):
-        asset = self._find_asset(asset_id)
-        if asset is None:
-            raise KeyError(f"Asset '{asset_id}' not found when updating fields.")
+        with self.lock:
+            asset = self._find_asset(asset_id)
+            if asset is None:
+                raise KeyError(f"Asset '{asset_id}' not found when updating fields.")
 
-        asset.update(updates or {})
-        self.save()
+            asset.update(updates or {})
+            self._commit(asset)
         
     def get_assets(self):
         """Retrieve the current list of assets."""
         return self.data["assets"]
-        
+
+    def checkpoint(self):
+        """Atomically rewrite manifest.json and truncate the journal."""
+        with self.lock:
+            _atomic_write_json(self.path, self.data)
+            if self.journal:
+                if self._journal_file is not None:
+                    self._journal_file.close()
+                    self._journal_file = None
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+            self._pending = 0
+
     def save(self):
-        """Persist the current state to disk."""
-        with open(self.path, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        """Persist the current state to disk.
+
+        Default mode rewrites manifest.json in place on every mutation, as it always has;
+        the temp-file + fsync + rename is reserved for journal checkpoints.
+        """
+        if self.journal:
+            self.checkpoint()
+            return
+        with self.lock:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=4, ensure_ascii=False)
+
+    def close(self):
+        """Compact any outstanding journal entries (safe to call repeatedly)."""
+        with self.lock:
+            if self.journal and (self._pending or self._journal_file is not None):
+                self.checkpoint()
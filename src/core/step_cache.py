@@ -0,0 +1,336 @@
+"""
+步骤结果内容寻址缓存
+Author: zhangxin
+功能：以「输入文件内容哈希 + 脚本路径与版本 + CLI 参数 + 运行环境」为键缓存步骤产物；命中时通过 reflink/拷贝
+      将产物还原到当前会话目录。下游步骤的键包含上游产物的内容哈希，因此上游变化会自动向下游传播失效。
+      缓存目录带容量上限，按最近使用时间 (LRU) 淘汰。大输入（如数百 MB 的场景 PLY）可改用快速指纹
+      （大小 + mtime + 均匀抽样块哈希）代替全量内容哈希，命中只需毫秒级。
+输入：步骤脚本、参数、声明的输入文件与输出路径（文件或目录）。
+输出：缓存目录 <root>/<key[:2]>/<key>/，包含 outputs/、logs/ 与 meta.json。
+依赖：Python 标准库。
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from src.core.runner_utils import _compute_sha256
+
+CACHE_FORMAT_VERSION = 1
+# Files at least this large are reflinked (copy-on-write) when the filesystem supports it.
+REFLINK_MIN_BYTES = 1 << 20
+# linux/fs.h FICLONE
+FICLONE = 0x40049409
+# Small text outputs may embed the absolute path they were produced at.
+RELOCATABLE_EXTENSIONS = (".json", ".txt", ".log")
+# Sampled fingerprint: this many evenly spaced blocks (first and last included).
+FINGERPRINT_BLOCKS = 16
+FINGERPRINT_BLOCK_BYTES = 1 << 16
+
+
+def _tree_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(dirpath, filename))
+    return total
+
+
+def _reflink(src, dst):
+    """Copy-on-write clone of src (Btrfs, XFS, ...); False where unsupported."""
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def _clone_or_copy(src, dst):
+    # Never share an inode between a session and the cache: steps re-run into the same
+    # session dir open their outputs with "wb", which would truncate the cached copy and
+    # every other session restored from it. Large files are reflinked where the
+    # filesystem allows it; copy2 keeps mtime either way (see sampled_fingerprint).
+    if os.path.getsize(src) >= REFLINK_MIN_BYTES and _reflink(src, dst):
+        return dst
+    return shutil.copy2(src, dst)
+
+
+def sampled_fingerprint(file_path):
+    """Fast identity of a large file: size + mtime_ns + SHA-256 of evenly spaced blocks.
+
+    Reads at most FINGERPRINT_BLOCKS * FINGERPRINT_BLOCK_BYTES bytes whatever the file size.
+    """
+    if not file_path or not os.path.isfile(file_path):
+        return None
+    stat = os.stat(file_path)
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        span = max(stat.st_size - FINGERPRINT_BLOCK_BYTES, 0)
+        offsets = sorted({span * i // (FINGERPRINT_BLOCKS - 1) for i in range(FINGERPRINT_BLOCKS)})
+        for offset in offsets:
+            file_obj.seek(offset)
+            hasher.update(file_obj.read(FINGERPRINT_BLOCK_BYTES))
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{hasher.hexdigest()}"
+
+
+INPUT_FINGERPRINTS = {"sha256": _compute_sha256, "sampled": sampled_fingerprint}
+
+
+def _iter_files(root):
+    if os.path.isfile(root):
+        yield "", root
+        return
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            abs_path = os.path.join(dirpath, filename)
+            yield os.path.relpath(abs_path, root), abs_path
+
+
+class StepCache:
+    """Content-addressed store for step outputs with an LRU size cap."""
+
+    def __init__(self, root, max_bytes=50 * 1024 ** 3):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # key -> number of materialize() calls reading the entry; eviction skips pinned keys.
+        self._pins = {}
+        os.makedirs(self.root, exist_ok=True)
+
+    # -- keys ---------------------------------------------------------------
+
+    def make_key(self, script_path, args, env_python, extra_env, inputs, outputs, version=None, fingerprint="sha256"):
+        """Hash everything that determines a step's outputs.
+
+        Paths of declared inputs/outputs are replaced by placeholders so that the
+        same work done in another session directory maps to the same key. Inputs are
+        identified by full content hash, or with fingerprint="sampled" by
+        sampled_fingerprint (restored files keep their mtime).
+        """
+        inputs = [os.path.abspath(p) for p in inputs or []]
+        outputs = [os.path.abspath(p) for p in outputs or []]
+        placeholders = {p: f"<input:{i}>" for i, p in enumerate(inputs)}
+        placeholders.update({p: f"<output:{i}>" for i, p in enumerate(outputs)})
+
+        normalized_args = []
+        for arg in args:
+            arg = str(arg)
+            normalized_args.append(placeholders.get(os.path.abspath(arg), arg) if os.sep in arg else arg)
+
+        payload = {
+            "format": CACHE_FORMAT_VERSION,
+            "script": os.path.basename(script_path),
+            "script_version": version or _compute_sha256(script_path),
+            "args": normalized_args,
+            "env_python": env_python,
+            "extra_env": sorted((extra_env or {}).items()),
+            "inputs": [INPUT_FINGERPRINTS[fingerprint](p) for p in inputs],
+            "num_outputs": len(outputs),
+        }
+        if fingerprint != "sha256":
+            payload["input_fingerprint"] = fingerprint
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    # -- lookup / materialize ------------------------------------------------
+
+    def _load_meta(self, key):
+        meta_path = os.path.join(self._entry_dir(key), "meta.json")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def contains(self, key):
+        return self._load_meta(key) is not None
+
+    def materialize(self, key, outputs, stdout_log=None, stderr_log=None, inputs=None):
+        """Restore cached outputs to `outputs`; returns False on a miss.
+
+        Paths of the original outputs (and of `inputs`, when the entry recorded them) are
+        rewritten inside relocatable text outputs. The entry is pinned against eviction
+        while it is read; any OSError counts as a miss and removes the partial targets.
+        """
+        with self.lock:
+            meta = self._load_meta(key)
+            if meta is None or len(meta.get("outputs", [])) != len(outputs):
+                return False
+            self._pins[key] = self._pins.get(key, 0) + 1
+            # LRU bookkeeping: meta.json mtime is the last-access time.
+            try:
+                os.utime(os.path.join(self._entry_dir(key), "meta.json"))
+            except OSError:
+                pass
+
+        try:
+            self._restore(key, meta, outputs, stdout_log, stderr_log, inputs)
+            return True
+        except OSError as exc:
+            print(f"⚠️ 缓存条目 {key[:12]} 还原失败 ({exc})，按未命中处理。")
+            for target in outputs:
+                target = os.path.abspath(target)
+                if os.path.isdir(target) and not os.path.islink(target):
+                    shutil.rmtree(target, ignore_errors=True)
+                elif os.path.lexists(target):
+                    os.remove(target)
+            return False
+        finally:
+            with self.lock:
+                self._pins[key] -= 1
+                if not self._pins[key]:
+                    del self._pins[key]
+
+    def _restore(self, key, meta, outputs, stdout_log, stderr_log, inputs):
+        input_relocations = [
+            (origin, os.path.abspath(current))
+            for origin, current in zip(meta.get("inputs", []), inputs or [])
+            if origin != os.path.abspath(current)
+        ]
+
+        entry_dir = self._entry_dir(key)
+        for record, raw_target in zip(meta["outputs"], outputs):
+            target = os.path.abspath(raw_target)
+            source = os.path.join(entry_dir, "outputs", str(record["index"]))
+            if not os.path.exists(source):
+                raise FileNotFoundError(source)
+            relocations = []
+            if record["origin"] != target:
+                relocations.append((record["origin"], target))
+                if record.get("origin_arg") and record["origin_arg"] != record["origin"]:
+                    relocations.append((record["origin_arg"], raw_target))
+            relocations += input_relocations
+            if os.path.isdir(target) and not os.path.islink(target):
+                # Stale files of an earlier run must not survive next to the restored outputs.
+                shutil.rmtree(target)
+            for rel_path, src_file in _iter_files(source):
+                dst_file = os.path.join(target, rel_path) if rel_path else target
+                self._place_file(src_file, dst_file, relocations)
+
+        for cached_name, target in (("stdout.log", stdout_log), ("stderr.log", stderr_log)):
+            cached_log = os.path.join(entry_dir, "logs", cached_name)
+            if target and os.path.exists(cached_log):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(cached_log, target)
+
+    def _place_file(self, src_file, dst_file, relocations):
+        os.makedirs(os.path.dirname(dst_file) or ".", exist_ok=True)
+        if os.path.lexists(dst_file):
+            os.remove(dst_file)
+
+        if relocations and dst_file.endswith(RELOCATABLE_EXTENSIONS):
+            with open(src_file, "r", encoding="utf-8", errors="surrogateescape") as f:
+                text = f.read()
+            for old, new in relocations:
+                text = text.replace(old, new)
+            with open(dst_file, "w", encoding="utf-8", errors="surrogateescape") as f:
+                f.write(text)
+            return
+        _clone_or_copy(src_file, dst_file)
+
+    # -- store / evict ---------------------------------------------------------
+
+    def store(self, key, outputs, stdout_log=None, stderr_log=None, step_id=None, inputs=None):
+        """Copy successful outputs into the cache. Missing outputs skip caching."""
+        if not outputs or not all(os.path.exists(p) for p in outputs):
+            return False
+
+        staging = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        records = []
+        try:
+            for index, output_arg in enumerate(outputs):
+                output = os.path.abspath(output_arg)
+                dst = os.path.join(staging, "outputs", str(index))
+                if os.path.isdir(output):
+                    shutil.copytree(output, dst, copy_function=_clone_or_copy)
+                else:
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    _clone_or_copy(output, dst)
+                records.append({
+                    "index": index,
+                    "origin": output,
+                    "origin_arg": output_arg,
+                    "kind": "dir" if os.path.isdir(output) else "file",
+                })
+
+            for cached_name, log_path in (("stdout.log", stdout_log), ("stderr.log", stderr_log)):
+                if log_path and os.path.exists(log_path):
+                    os.makedirs(os.path.join(staging, "logs"), exist_ok=True)
+                    shutil.copyfile(log_path, os.path.join(staging, "logs", cached_name))
+
+            meta = {
+                "key": key,
+                "step_id": step_id,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "size_bytes": _tree_size(staging),
+                "outputs": records,
+                "inputs": [os.path.abspath(p) for p in inputs or []],
+            }
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=4, ensure_ascii=False)
+
+            entry_dir = self._entry_dir(key)
+            with self.lock:
+                os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+                if os.path.exists(entry_dir):
+                    if key in self._pins:
+                        # Same outputs are being restored from the existing entry right now.
+                        return True
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(staging, entry_dir)
+                self._evict_locked(keep=key)
+            return True
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _entries(self):
+        entries = []
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if prefix.startswith(".") or not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                meta_path = os.path.join(prefix_dir, key, "meta.json")
+                try:
+                    with open(meta_path, "r", encoding="utf-8") as f:
+                        size = json.load(f).get("size_bytes", 0)
+                    entries.append((os.path.getmtime(meta_path), key, size))
+                except (OSError, json.JSONDecodeError):
+                    continue
+        return entries
+
+    def total_bytes(self):
+        return sum(size for _, _, size in self._entries())
+
+    def evict(self):
+        with self.lock:
+            self._evict_locked()
+
+    def _evict_locked(self, keep=None):
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, key, size in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep or key in self._pins:
+                continue
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total -= size
@@ -0,0 +1,423 @@
+"""
+常驻模型 Worker 进程
+Author: zhangxin
+功能：为每个 Conda 环境/后端维护一个常驻子进程，模型只加载一次，通过本地 Unix Socket 接收任务；
+      包含健康检查、空闲自动退出，以及 Worker 不可用时由调用方回退到一次性子进程的约定。
+输入：步骤脚本路径（脚本需实现 load_model() / run_job(model, argv) 钩子）、任务参数与日志路径。
+输出：任务退出码，任务输出写入各自的 stdout/stderr 日志文件。
+依赖：仅 Python 标准库（Worker 端在目标 Conda 环境内以独立脚本方式运行，不导入 src 包）。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import traceback
+import subprocess
+import importlib.util
+from contextlib import contextmanager
+from multiprocessing.connection import Listener, Client
+
+WORKER_HOOKS = ("load_model", "run_job")
+# Per-job environment entries forwarded to an already running worker.
+JOB_ENV_KEYS = ("PIPELINE_TRACE_SINK",)
+
+
+class WorkerUnavailable(RuntimeError):
+    """Raised when a worker process cannot be started or stops responding."""
+
+
+def _send(conn, payload):
+    conn.send_bytes(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+
+def _recv(conn):
+    return json.loads(conn.recv_bytes().decode("utf-8"))
+
+
+def script_supports_worker(script_path):
+    """Cheap static check: does the step script define the worker hooks?"""
+    try:
+        with open(script_path, "r", encoding="utf-8") as f:
+            source = f.read()
+    except OSError:
+        return False
+    return all(f"def {hook}(" in source for hook in WORKER_HOOKS)
+
+
+class StepWorker:
+    """Client-side handle of one long-lived worker process (one per script/env)."""
+
+    def __init__(self, script_key, script_path, env_python, env=None, idle_timeout=600.0,
+                 ready_timeout=1800.0, log_path=None):
+        self.script_key = script_key
+        self.script_path = script_path
+        self.env_python = env_python
+        self.env = env
+        self.idle_timeout = idle_timeout
+        self.ready_timeout = ready_timeout
+        self.log_path = log_path
+        self.process = None
+        self.conn = None
+        self.socket_dir = None
+        self.load_s = None
+        self.last_usage = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.socket_dir = tempfile.mkdtemp(prefix=f"step_worker_{self.script_key}_")
+        address = os.path.join(self.socket_dir, "worker.sock")
+        cmd = [
+            self.env_python, os.path.abspath(__file__),
+            "--script", self.script_path,
+            "--address", address,
+            "--idle_timeout", str(self.idle_timeout),
+        ]
+        log_stream = None
+        if self.log_path:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            log_stream = open(self.log_path, "a", encoding="utf-8")
+        try:
+            self.process = subprocess.Popen(cmd, env=self.env, stdout=log_stream, stderr=log_stream)
+        finally:
+            if log_stream:
+                log_stream.close()
+
+        deadline = time.time() + 30.0
+        while self.conn is None:
+            if self.process.poll() is not None:
+                self._cleanup()
+                raise WorkerUnavailable(f"worker exited during startup (code {self.process.returncode})")
+            if time.time() > deadline:
+                self.stop()
+                raise WorkerUnavailable("timed out connecting to worker socket")
+            try:
+                self.conn = Client(address, family="AF_UNIX")
+            except (FileNotFoundError, ConnectionRefusedError):
+                time.sleep(0.05)
+
+        # The worker loads the model before it announces readiness.
+        message = self._wait_message(self.ready_timeout)
+        if message.get("event") != "ready":
+            self.stop()
+            raise WorkerUnavailable(message.get("error") or "worker failed to load model")
+        self.load_s = message.get("load_s")
+
+    def _wait_message(self, timeout):
+        deadline = time.time() + timeout if timeout else None
+        while True:
+            try:
+                if self.conn.poll(0.5):
+                    return _recv(self.conn)
+            except (EOFError, OSError) as exc:
+                raise WorkerUnavailable(f"worker connection lost: {exc}")
+            if self.process.poll() is not None:
+                raise WorkerUnavailable(f"worker exited (code {self.process.returncode})")
+            if deadline and time.time() > deadline:
+                raise WorkerUnavailable("timed out waiting for worker response")
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None and self.conn is not None
+
+    def ping(self, timeout=5.0):
+        """Health check; returns the worker status dict or None if unhealthy."""
+        if not self.is_alive():
+            return None
+        try:
+            _send(self.conn, {"op": "ping"})
+            return self._wait_message(timeout)
+        except (WorkerUnavailable, OSError):
+            return None
+
+    def run_job(self, args, stdout_log=None, stderr_log=None, job_env=None):
+        _send(self.conn, {"op": "run", "argv": list(args), "stdout_log": stdout_log, "stderr_log": stderr_log,
+                          "env": job_env or {}})
+        reply = self._wait_message(None)
+        self.last_usage = reply.get("usage")
+        return int(reply.get("returncode", 1))
+
+    def stop(self):
+        if self.conn is not None:
+            try:
+                if self.process is not None and self.process.poll() is None:
+                    _send(self.conn, {"op": "shutdown"})
+            except OSError:
+                pass
+            try:
+                self.conn.close()
+            except OSError:
+                pass
+            self.conn = None
+        if self.process is not None and self.process.poll() is None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self._cleanup()
+
+    def _cleanup(self):
+        if self.socket_dir:
+            shutil.rmtree(self.socket_dir, ignore_errors=True)
+            self.socket_dir = None
+
+
+class WorkerPool:
+    """Keeps one warm worker per (script, env) and hands jobs to it.
+
+    `dispatch` returns the job's exit code, or None when no worker can serve the
+    job so that the caller falls back to a one-shot subprocess.
+    """
+
+    def __init__(self, worker_keys, idle_timeout=600.0, ready_timeout=1800.0, log_dir=None):
+        self.worker_keys = set(worker_keys or [])
+        self.idle_timeout = idle_timeout
+        self.ready_timeout = ready_timeout
+        self.log_dir = log_dir
+        self.workers = {}
+        self.disabled = set()
+        self.lock = threading.Lock()
+
+    def supports(self, script_key):
+        return script_key in self.worker_keys and script_key not in self.disabled
+
+    def _get_worker(self, script_key, script_path, env_python, env):
+        key = (script_key, env_python)
+        with self.lock:
+            worker = self.workers.get(key)
+            if worker is None:
+                log_path = os.path.join(self.log_dir, f"{script_key}.worker.log") if self.log_dir else None
+                worker = StepWorker(script_key, script_path, env_python, env=env,
+                                    idle_timeout=self.idle_timeout, ready_timeout=self.ready_timeout,
+                                    log_path=log_path)
+                self.workers[key] = worker
+            return worker
+
+    def dispatch(self, script_key, script_path, env_python, args, env=None, stdout_log=None, stderr_log=None,
+                 usage=None):
+        """Run one job; if `usage` is a dict it receives the job's resource usage."""
+        if not self.supports(script_key):
+            return None
+        if not script_supports_worker(script_path):
+            print(f"⚠️ 脚本 {script_path} 未实现 Worker 钩子，改用子进程模式。")
+            self.disabled.add(script_key)
+            return None
+
+        worker = self._get_worker(script_key, script_path, env_python, env)
+        with worker.lock:
+            if worker.ping() is None:
+                # Never started, idled out or crashed: (re)spawn it.
+                worker.stop()
+                try:
+                    print(f"🔥 正在启动常驻 Worker ({script_key})，首次加载模型...")
+                    worker.start()
+                    print(f"   Worker 就绪 (pid={worker.process.pid}, 模型加载 {worker.load_s or 0:.2f}s)")
+                except WorkerUnavailable as exc:
+                    print(f"⚠️ 常驻 Worker ({script_key}) 启动失败: {exc}")
+                    self.disabled.add(script_key)
+                    return None
+            monitor = None
+            if usage is not None:
+                from src.core.resource_monitor import ProcessTreeMonitor
+                monitor = ProcessTreeMonitor(worker.process.pid).start()
+            try:
+                job_env = {key: env[key] for key in JOB_ENV_KEYS if env and key in env}
+                returncode = worker.run_job(args, stdout_log=stdout_log, stderr_log=stderr_log, job_env=job_env)
+                if monitor is not None:
+                    # Peak RSS/GPU include the resident model; CPU and I/O are per-job deltas.
+                    usage.update(monitor.stop())
+                    usage.update(worker.last_usage or {})
+                    usage["source"] = "worker"
+                return returncode
+            except (WorkerUnavailable, OSError) as exc:
+                # The job itself took the worker down (e.g. OOM); report failure, respawn next time.
+                print(f"❌ 常驻 Worker ({script_key}) 在任务执行中断开: {exc}")
+                worker.stop()
+                return -1
+            finally:
+                if monitor is not None:
+                    monitor.stop()
+
+    def shutdown(self):
+        with self.lock:
+            workers = list(self.workers.values())
+            self.workers = {}
+        for worker in workers:
+            with worker.lock:
+                worker.stop()
+
+
+# ---------------------------------------------------------------------------
+# Worker side (executed inside the target conda environment)
+# ---------------------------------------------------------------------------
+
+def _load_step_module(script_path):
+    script_dir = os.path.dirname(os.path.abspath(script_path))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    spec = importlib.util.spec_from_file_location("_step_worker_target", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for hook in WORKER_HOOKS:
+        if not callable(getattr(module, hook, None)):
+            raise AttributeError(f"{script_path} does not define {hook}()")
+    return module
+
+
+class _RedirectFds:
+    """Point fd 1/2 at the job's log files so C-level output is captured too."""
+
+    def __init__(self, stdout_log, stderr_log):
+        self.targets = [(1, stdout_log), (2, stderr_log)]
+        self.saved = []
+
+    def __enter__(self):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for fd, path in self.targets:
+            if not path:
+                continue
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            log_fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            self.saved.append((fd, os.dup(fd)))
+            os.dup2(log_fd, fd)
+            os.close(log_fd)
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for fd, saved_fd in self.saved:
+            os.dup2(saved_fd, fd)
+            os.close(saved_fd)
+        return False
+
+
+def _usage_snapshot():
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    io = (0, 0)
+    try:
+        with open("/proc/self/io", "r") as f:
+            counters = dict(line.split(":", 1) for line in f if ":" in line)
+        io = (int(counters.get("read_bytes", 0)), int(counters.get("write_bytes", 0)))
+    except (OSError, ValueError):
+        pass
+    return {
+        "user": self_usage.ru_utime + child_usage.ru_utime,
+        "sys": self_usage.ru_stime + child_usage.ru_stime,
+        "io": io,
+    }
+
+
+def _usage_delta(before, after):
+    mb = 1024.0 * 1024.0
+    return {
+        "cpu_user_s": round(after["user"] - before["user"], 3),
+        "cpu_sys_s": round(after["sys"] - before["sys"], 3),
+        "io_read_mb": round((after["io"][0] - before["io"][0]) / mb, 2),
+        "io_write_mb": round((after["io"][1] - before["io"][1]) / mb, 2),
+    }
+
+
+@contextmanager
+def _job_environ(overrides):
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update({key: str(value) for key, value in overrides.items()})
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _run_one(module, model, message):
+    with _RedirectFds(message.get("stdout_log"), message.get("stderr_log")), _job_environ(message.get("env") or {}):
+        try:
+            module.run_job(model, message.get("argv") or [])
+            return 0
+        except SystemExit as exc:
+            if exc.code is None:
+                return 0
+            if isinstance(exc.code, int):
+                return exc.code
+            print(exc.code, file=sys.stderr)
+            return 1
+        except Exception:
+            traceback.print_exc()
+            return 1
+
+
+def serve(script_path, address, idle_timeout):
+    parent_pid = os.getppid()
+
+    def _watch_parent():
+        while True:
+            if os.getppid() != parent_pid:
+                os._exit(1)
+            time.sleep(2.0)
+
+    threading.Thread(target=_watch_parent, daemon=True).start()
+
+    listener = Listener(address, family="AF_UNIX")
+    startup_guard = threading.Timer(60.0, lambda: os._exit(1))
+    startup_guard.start()
+    conn = listener.accept()
+    startup_guard.cancel()
+
+    started_at = time.time()
+    try:
+        module = _load_step_module(script_path)
+        model = module.load_model()
+    except BaseException as exc:
+        traceback.print_exc()
+        _send(conn, {"event": "error", "error": f"{type(exc).__name__}: {exc}"})
+        return 1
+    load_s = time.time() - started_at
+    print(f"[step_worker] model ready for {script_path} in {load_s:.2f}s", flush=True)
+    _send(conn, {"event": "ready", "pid": os.getpid(), "load_s": load_s})
+
+    jobs_done = 0
+    try:
+        while True:
+            if not conn.poll(idle_timeout):
+                print(f"[step_worker] idle for {idle_timeout}s, shutting down", flush=True)
+                break
+            message = _recv(conn)
+            op = message.get("op")
+            if op == "ping":
+                _send(conn, {"ok": True, "pid": os.getpid(), "jobs_done": jobs_done,
+                             "uptime_s": time.time() - started_at})
+            elif op == "run":
+                job_start = time.time()
+                usage_before = _usage_snapshot()
+                returncode = _run_one(module, model, message)
+                jobs_done += 1
+                _send(conn, {"ok": True, "returncode": returncode, "duration_s": time.time() - job_start,
+                             "usage": _usage_delta(usage_before, _usage_snapshot())})
+            elif op == "shutdown":
+                break
+            else:
+                _send(conn, {"ok": False, "error": f"unknown op {op!r}"})
+    except (EOFError, OSError):
+        pass
+    finally:
+        conn.close()
+        listener.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm-model step worker")
+    parser.add_argument("--script", required=True, help="Step script implementing load_model/run_job")
+    parser.add_argument("--address", required=True, help="Unix socket path to listen on")
+    parser.add_argument("--idle_timeout", type=float, default=600.0, help="Seconds without jobs before exiting")
+    args = parser.parse_args()
+    sys.exit(serve(args.script, args.address, args.idle_timeout))
@@ -0,0 +1,153 @@
+"""
+会话时间线追踪 (Chrome Trace Event Format)
+Author: zhangxin
+功能：记录管线节点、StepRunner 步骤与资产级阶段（路由、校验、封装、导入校验）的起止时间，
+      会话结束时写出 trace.json，可直接在 chrome://tracing 或 Perfetto 中打开。
+      子进程步骤脚本通过环境变量 PIPELINE_TRACE_SINK 获得 JSONL 汇聚文件路径，调用 span() 即可上报进程内区间，
+      会话结束时合并进同一时间线；未设置该变量时 span() 为空操作。
+输入：区间名称、类别与附加参数。
+输出：<session>/trace.json（{"traceEvents": [...]}，时间单位微秒，跨进程统一使用墙钟时间）。
+依赖：仅 Python 标准库（步骤脚本可在任意 Conda 环境中导入）。
+"""
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+TRACE_SINK_ENV = "PIPELINE_TRACE_SINK"
+
+_local = threading.local()
+_sink_lock = threading.Lock()
+_sink_named_pids = set()
+
+
+def _now_us():
+    return int(time.time() * 1e6)
+
+
+def _complete_event(name, cat, start_us, end_us, args=None):
+    return {
+        "name": name,
+        "cat": cat,
+        "ph": "X",
+        "ts": start_us,
+        "dur": max(0, end_us - start_us),
+        "pid": os.getpid(),
+        "tid": threading.get_native_id(),
+        "args": args or {},
+    }
+
+
+def _metadata_event(kind, value, tid=None):
+    event = {"name": kind, "ph": "M", "pid": os.getpid(), "args": {"name": value}}
+    if tid is not None:
+        event["tid"] = tid
+    return event
+
+
+class TraceRecorder:
+    """Collects trace events of one session in memory and writes trace.json."""
+
+    def __init__(self, path, process_name="pipeline_runner", sink_path=None):
+        self.path = path
+        self.sink_path = sink_path or os.path.splitext(path)[0] + ".sink.jsonl"
+        os.makedirs(os.path.dirname(self.sink_path) or ".", exist_ok=True)
+        self.events = [_metadata_event("process_name", process_name)]
+        self.named_threads = set()
+        self.lock = threading.Lock()
+
+    def add(self, event):
+        with self.lock:
+            tid = event.get("tid")
+            if tid is not None and tid not in self.named_threads:
+                self.named_threads.add(tid)
+                self.events.append(_metadata_event("thread_name", threading.current_thread().name, tid))
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name, cat="pipeline", args=None):
+        start_us = _now_us()
+        span_args = dict(args or {})
+        try:
+            yield span_args
+        except BaseException as exc:
+            span_args["error"] = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            self.add(_complete_event(name, cat, start_us, _now_us(), span_args))
+
+    def child_env(self):
+        """Environment entries that let a child process report spans into this trace."""
+        return {TRACE_SINK_ENV: self.sink_path}
+
+    def save(self):
+        """Merge spans reported by child processes and write trace.json."""
+        events = list(self.events)
+        if os.path.exists(self.sink_path):
+            with open(self.sink_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # partial line from a killed child
+            os.remove(self.sink_path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return self.path
+
+
+@contextmanager
+def activate(recorder):
+    """Make `recorder` the current tracer of this thread (used by StepRunner and span())."""
+    previous = getattr(_local, "recorder", None)
+    _local.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _local.recorder = previous
+
+
+def current_tracer():
+    return getattr(_local, "recorder", None)
+
+
+def _write_sink(event):
+    sink_path = os.environ.get(TRACE_SINK_ENV)
+    if not sink_path:
+        return
+    lines = []
+    with _sink_lock:
+        if os.getpid() not in _sink_named_pids:
+            _sink_named_pids.add(os.getpid())
+            lines.append(_metadata_event("process_name", os.path.basename(sys.argv[0]) or "step"))
+        lines.append(event)
+        # One small append per event; O_APPEND keeps concurrent writers from interleaving.
+        with open(sink_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines))
+
+
+@contextmanager
+def span(name, cat="script", **args):
+    """Trace a block: into the thread's active recorder, else into the env sink, else nothing."""
+    recorder = current_tracer()
+    if recorder is not None:
+        with recorder.span(name, cat=cat, args=args) as span_args:
+            yield span_args
+        return
+    if not os.environ.get(TRACE_SINK_ENV):
+        yield args
+        return
+    start_us = _now_us()
+    try:
+        yield args
+    except BaseException as exc:
+        args["error"] = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        try:
+            _write_sink(_complete_event(name, cat, start_us, _now_us(), args))
+        except OSError:
+            pass
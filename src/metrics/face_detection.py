@@ -0,0 +1,173 @@
+"""
+人脸检测（Haar 级联）
+Author: zhangxin
+功能：加载 OpenCV 自带的正脸 Haar 级联并在灰度帧上检测人脸。CascadeClassifier 不保证多线程共享安全，
+      因此提供按线程缓存的检测器，供帧质量评分的线程池使用；资产采集沿用同一套参数。
+      大帧先缩放到长边 DETECTION_LONG_SIDE 再检测，坐标换算回原分辨率；检测结果按帧像素哈希缓存
+      （进程内 + 可选磁盘目录），同一帧换 ROI 提示/肤色设置重跑、批量采集的多个进程之间都不再重复检测。
+输入：灰度帧或 BGR 帧（numpy uint8）。
+输出：人脸框数组 (N, 4)，格式 x, y, w, h（原分辨率坐标）。
+依赖：opencv-python。
+"""
+import hashlib
+import json
+import os
+import threading
+
+import cv2
+import numpy as np
+
+FACE_CASCADE_FILE = "haarcascade_frontalface_default.xml"
+SCALE_FACTOR = 1.1
+MIN_NEIGHBORS = 4
+# Faces only steer the coarse ROI and the has_person signal: 1280 px keeps faces of
+# ~90 px on a 4K frame above the cascade's 30 px minimum window.
+DETECTION_LONG_SIDE = 1280
+# On-disk face cache cap (one small JSON per frame); least recently used entries are pruned
+# back to PRUNE_TO_RATIO of the cap, checked every PRUNE_EVERY stores.
+DEFAULT_MAX_CACHE_ENTRIES = 20000
+PRUNE_EVERY = 256
+PRUNE_TO_RATIO = 0.9
+
+_local = threading.local()
+
+
+def load_face_cascade():
+    """A fresh frontal-face cascade from the OpenCV data directory."""
+    return cv2.CascadeClassifier(cv2.data.haarcascades + FACE_CASCADE_FILE)
+
+
+def thread_face_cascade():
+    """One cascade per thread, loaded on first use."""
+    cascade = getattr(_local, "cascade", None)
+    if cascade is None:
+        cascade = _local.cascade = load_face_cascade()
+    return cascade
+
+
+def detect_faces(gray, cascade=None):
+    """Face boxes (N, 4) in `gray`; an empty (0, 4) array when there are none."""
+    cascade = cascade if cascade is not None else thread_face_cascade()
+    faces = cascade.detectMultiScale(gray, SCALE_FACTOR, MIN_NEIGHBORS)
+    return np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+
+
+def detect_faces_downscaled(gray, cascade=None, max_side=DETECTION_LONG_SIDE):
+    """detect_faces() on `gray` downscaled to `max_side` (long side; 0 = full resolution),
+    with boxes mapped back to full-resolution pixels."""
+    h, w = gray.shape[:2]
+    scale = max_side / max(h, w) if max_side else 1.0
+    if scale >= 1.0:
+        return detect_faces(gray, cascade)
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    faces = np.round(detect_faces(small, cascade) / scale).astype(np.int32)
+    faces[:, 2] = np.minimum(faces[:, 2], w - faces[:, 0])
+    faces[:, 3] = np.minimum(faces[:, 3], h - faces[:, 1])
+    return faces
+
+
+def frame_digest(img):
+    """Content hash of a decoded frame (pixels, shape and dtype)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((img.shape, img.dtype.str)).encode("utf-8"))
+    digest.update(np.ascontiguousarray(img).data)
+    return digest.hexdigest()
+
+
+class FaceDetectionCache:
+    """Face boxes keyed by frame hash and detector parameters.
+
+    Entries live in memory and, when `cache_dir` is given, as one small JSON file per
+    frame so that other processes and later runs reuse them. The directory holds at
+    most `max_entries` files; file mtime is the last-use time for LRU pruning.
+    """
+
+    def __init__(self, cache_dir=None, max_side=DETECTION_LONG_SIDE, max_entries=DEFAULT_MAX_CACHE_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_side = max_side
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._stores = 0
+        if cache_dir:
+            self.prune()
+
+    def key(self, img):
+        params = f"{FACE_CASCADE_FILE}|{SCALE_FACTOR}|{MIN_NEIGHBORS}|{self.max_side}"
+        return hashlib.sha256(f"{frame_digest(img)}|{params}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load(self, key):
+        with self.lock:
+            if key in self.entries:
+                return self.entries[key]
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                faces = np.asarray(json.load(f)["faces"], dtype=np.int32).reshape(-1, 4)
+            os.utime(self._path(key))
+        except (OSError, ValueError, KeyError):
+            return None
+        with self.lock:
+            self.entries[key] = faces
+        return faces
+
+    def _store(self, key, faces):
+        with self.lock:
+            self.entries[key] = faces
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"faces": faces.tolist()}, f)
+        os.replace(tmp_path, path)
+        with self.lock:
+            self._stores += 1
+            due = self._stores % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Drop least recently used files once the directory exceeds `max_entries`."""
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return 0
+        files = []
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if not filename.endswith(".json"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    files.append((os.path.getmtime(path), path))
+                except OSError:
+                    continue
+        if len(files) <= self.max_entries:
+            return 0
+        files.sort()
+        excess = files[:len(files) - int(self.max_entries * PRUNE_TO_RATIO)]
+        for _, path in excess:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return len(excess)
+
+    def detect(self, img, cascade=None):
+        """Face boxes of a BGR or grayscale frame, detected once per distinct frame."""
+        key = self.key(img)
+        faces = self._load(key)
+        if faces is not None:
+            self.hits += 1
+            return faces
+        self.misses += 1
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        faces = detect_faces_downscaled(gray, cascade, self.max_side)
+        self._store(key, faces)
+        return faces
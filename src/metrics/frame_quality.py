@@ -0,0 +1,200 @@
+"""
+帧质量评分
+Author: zhangxin
+功能：对候选帧做整图向量化评分——拉普拉斯方差清晰度、曝光裁切比例（死黑/过曝像素占比）、
+      Immerkær 快速噪声估计，以及 Haar 人脸检测得到的最大人脸面积占比（主体尺寸）。
+      评分在统一的分析分辨率（长边 ANALYSIS_LONG_SIDE）上进行，不同素材的分数可直接比较。
+      整个帧目录由线程池并行评分（OpenCV 计算时释放 GIL），按颜色直方图切分镜头，
+      输出排序索引，并可为每个镜头挑选质量最高的 top-k 帧，替代固定间隔抽帧。
+输入：帧目录（或帧路径列表）/ 内存中的 BGR 帧。
+输出：frame_quality_index.json（ranked 排序列表 + 每帧镜头编号）；每镜头 top-k 帧列表。
+依赖：opencv-python, numpy。
+"""
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from src.metrics.face_detection import detect_faces
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+INDEX_FILENAME = "frame_quality_index.json"
+ANALYSIS_LONG_SIDE = 1024
+CLIP_LOW = 2
+CLIP_HIGH = 253
+SHOT_HIST_BINS = [8, 8, 8]
+DEFAULT_SHOT_THRESHOLD = 0.5  # Bhattacharyya distance between consecutive frames
+NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+
+def _analysis_frame(img):
+    scale = ANALYSIS_LONG_SIDE / max(img.shape[:2])
+    if scale >= 1.0:
+        return img
+    return cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def estimate_noise(gray):
+    """Immerkær fast noise sigma: mean |I * N| scaled by sqrt(pi/2) / 6 over the valid region."""
+    h, w = gray.shape[:2]
+    if h < 3 or w < 3:
+        return 0.0
+    response = cv2.filter2D(gray.astype(np.float32), -1, NOISE_KERNEL, borderType=cv2.BORDER_REFLECT)
+    return float(np.abs(response[1:-1, 1:-1]).sum() * math.sqrt(math.pi / 2) / (6.0 * (w - 2) * (h - 2)))
+
+
+def shot_histogram(img):
+    """L1-normalised 8x8x8 BGR histogram used to split frames into shots."""
+    hist = cv2.calcHist([img], [0, 1, 2], None, SHOT_HIST_BINS, [0, 256, 0, 256, 0, 256])
+    return cv2.normalize(hist, hist, 1.0, 0.0, cv2.NORM_L1)
+
+
+def quality_score(metrics):
+    """Scalar rank: log sharpness, damped by clipping and noise, boosted by subject size."""
+    return (
+        math.log1p(metrics["sharpness"])
+        * (1.0 - metrics["clipped_ratio"])
+        / (1.0 + metrics["noise_sigma"] / 10.0)
+        * (1.0 + metrics["subject_ratio"])
+    )
+
+
+def score_frame(img, detect_subject=True):
+    """Quality metrics of a BGR frame, measured at the analysis resolution.
+
+    Returns the metrics dict (with "score") and the frame's shot histogram.
+    """
+    small = _analysis_frame(img)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    total = float(gray.size)
+
+    _, stddev = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_64F))
+    clipped_low = int(np.count_nonzero(gray <= CLIP_LOW))
+    clipped_high = int(np.count_nonzero(gray >= CLIP_HIGH))
+
+    faces = detect_faces(gray) if detect_subject else np.empty((0, 4), np.int32)
+    subject_ratio = float((faces[:, 2] * faces[:, 3]).max()) / total if len(faces) else 0.0
+
+    metrics = {
+        "sharpness": round(float(stddev[0, 0]) ** 2, 3),
+        "clipped_ratio": round((clipped_low + clipped_high) / total, 5),
+        "underexposed_ratio": round(clipped_low / total, 5),
+        "overexposed_ratio": round(clipped_high / total, 5),
+        "noise_sigma": round(estimate_noise(gray), 4),
+        "faces": int(len(faces)),
+        "subject_ratio": round(subject_ratio, 5),
+    }
+    metrics["score"] = round(quality_score(metrics), 5)
+    return metrics, shot_histogram(small)
+
+
+def _score_path(path, detect_subject):
+    img = cv2.imread(path)
+    if img is None:
+        return path, None, None
+    metrics, hist = score_frame(img, detect_subject)
+    return path, metrics, hist
+
+
+def assign_shots(hists, threshold=DEFAULT_SHOT_THRESHOLD):
+    """Shot index per frame (in temporal order): a new shot starts when the histogram
+    distance to the previous frame exceeds `threshold`."""
+    shots, shot, prev = [], 0, None
+    for hist in hists:
+        if prev is not None and cv2.compareHist(prev, hist, cv2.HISTCMP_BHATTACHARYYA) > threshold:
+            shot += 1
+        shots.append(shot)
+        prev = hist
+    return shots
+
+
+def list_frames(frame_dir):
+    return [
+        os.path.join(frame_dir, name)
+        for name in sorted(os.listdir(frame_dir))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+def score_frames(paths, workers=None, detect_subject=True, shot_threshold=DEFAULT_SHOT_THRESHOLD):
+    """Score frames (given in temporal order) with a thread pool.
+
+    Returns one record per readable frame, in input order:
+    {"path", "frame_index", "shot", **metrics}.
+    """
+    workers = workers or min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda p: _score_path(p, detect_subject), paths))
+
+    records, hists = [], []
+    for frame_index, (path, metrics, hist) in enumerate(results):
+        if metrics is None:
+            print(f"⚠️ 无法读取帧 {path}，已跳过。")
+            continue
+        records.append({"path": path, "frame_index": frame_index, **metrics})
+        hists.append(hist)
+    for record, shot in zip(records, assign_shots(hists, shot_threshold)):
+        record["shot"] = shot
+    return records
+
+
+def rank_frames(records):
+    """Records sorted best first, with a 1-based "rank"."""
+    ranked = sorted(records, key=lambda r: (-r["score"], r["frame_index"]))
+    return [dict(record, rank=i + 1) for i, record in enumerate(ranked)]
+
+
+def select_top_k(records, k):
+    """Best `k` records of every shot, returned in temporal order."""
+    by_shot = {}
+    for record in records:
+        by_shot.setdefault(record["shot"], []).append(record)
+    selected = []
+    for shot_records in by_shot.values():
+        selected.extend(sorted(shot_records, key=lambda r: (-r["score"], r["frame_index"]))[:k])
+    return sorted(selected, key=lambda r: r["frame_index"])
+
+
+def write_index(records, output_path):
+    ranked = rank_frames(records)
+    index = {
+        "frame_count": len(records),
+        "shot_count": len({r["shot"] for r in records}),
+        "ranked": ranked,
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=4, ensure_ascii=False)
+    return index
+
+
+def index_directory(frame_dir, output_path=None, workers=None, detect_subject=True,
+                    shot_threshold=DEFAULT_SHOT_THRESHOLD):
+    """Score every frame of `frame_dir` and write the ranked index (default: inside the directory)."""
+    records = score_frames(list_frames(frame_dir), workers, detect_subject, shot_threshold)
+    index = write_index(records, output_path or os.path.join(frame_dir, INDEX_FILENAME))
+    return records, index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank frames by sharpness, exposure, noise and subject size")
+    parser.add_argument("frame_dir", help="Directory of frames (file names sort in temporal order)")
+    parser.add_argument("--output", help=f"Index path (default: <frame_dir>/{INDEX_FILENAME})")
+    parser.add_argument("--workers", type=int, default=None, help="Scoring threads (default: min(8, CPU count))")
+    parser.add_argument("--top_k", type=int, default=0, help="Also print the best K frames of every shot")
+    parser.add_argument("--shot_threshold", type=float, default=DEFAULT_SHOT_THRESHOLD, help="Histogram distance that starts a new shot")
+    parser.add_argument("--no_faces", action="store_true", help="Skip Haar face detection (subject size = 0)")
+    args = parser.parse_args()
+
+    records, index = index_directory(args.frame_dir, args.output, args.workers, not args.no_faces, args.shot_threshold)
+    print(f"✅ 已评分 {index['frame_count']} 帧，{index['shot_count']} 个镜头。")
+    if args.top_k > 0:
+        for record in select_top_k(records, args.top_k):
+            print(f"  镜头 {record['shot']}: {record['path']} (score={record['score']})")
+
+
+if __name__ == "__main__":
+    main()
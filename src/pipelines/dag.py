@@ -0,0 +1,217 @@
+"""
+管线步骤依赖图与并发执行器
+Author: zhangxin
+功能：以有向无环图 (DAG) 声明管线步骤及其依赖，执行器在满足依赖的前提下并发运行相互独立的节点，
+      并按资源类型（GPU / CPU 槽位）限制并发度。节点执行过程中可以动态追加新节点（例如按采集清单展开资产）。
+输入：StepGraph（节点函数 + 依赖 + 资源类型）、ResourceSlots（各资源并发上限，可在多个会话间共享）。
+输出：每个节点的执行状态、返回值与起止时间。
+依赖：Python 标准库。
+"""
+import time
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.core.tracing import activate
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+# Poll interval while ready nodes wait for slots held by other executors.
+SLOT_POLL_S = 0.05
+
+
+class ResourceSlots:
+    """Counting slots per resource kind, e.g. {"gpu": 1, "cpu": 4}.
+
+    One instance can be shared by several executors so that concurrent sessions
+    respect a single global limit. Executors take slots with try_acquire() before
+    submitting a node and wait_release() when every ready node is blocked on a slot.
+    """
+
+    def __init__(self, limits):
+        self.limits = dict(limits)
+        self._free = {kind: max(1, int(n)) for kind, n in self.limits.items()}
+        self._cond = threading.Condition()
+
+    def try_acquire(self, kind):
+        if kind is None:
+            return True
+        with self._cond:
+            if self._free[kind] <= 0:
+                return False
+            self._free[kind] -= 1
+            return True
+
+    def acquire(self, kind):
+        if kind is None:
+            return
+        with self._cond:
+            self._cond.wait_for(lambda: self._free[kind] > 0)
+            self._free[kind] -= 1
+
+    def release(self, kind):
+        if kind is None:
+            return
+        with self._cond:
+            self._free[kind] += 1
+            self._cond.notify_all()
+
+    def wait_release(self, timeout=None):
+        """Block until some slot is released (or `timeout` seconds pass)."""
+        with self._cond:
+            self._cond.wait(timeout)
+
+
+@dataclass
+class StepNode:
+    name: str
+    func: callable
+    deps: set = field(default_factory=set)
+    resource: str = None
+    status: str = STATUS_PENDING
+    result: object = None
+    error: str = None
+    ready_at: float = None
+    started_at: float = None
+    finished_at: float = None
+
+    @property
+    def duration_s(self):
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class StepGraph:
+    """Mutable set of nodes; safe to extend from inside a running node."""
+
+    def __init__(self):
+        self.nodes = {}
+        self.lock = threading.RLock()
+
+    def add(self, name, func, deps=(), resource=None, dependents=()):
+        """Add a node. `dependents` are existing, not-yet-started nodes that must wait for it."""
+        with self.lock:
+            if name in self.nodes:
+                raise ValueError(f"Duplicate step node: {name}")
+            for dep in deps:
+                if dep not in self.nodes:
+                    raise KeyError(f"Unknown dependency '{dep}' for node '{name}'")
+            for dependent in dependents:
+                target = self.nodes[dependent]
+                if target.status != STATUS_PENDING:
+                    raise RuntimeError(f"Cannot add dependency to already started node '{dependent}'")
+                target.deps.add(name)
+            node = StepNode(name=name, func=func, deps=set(deps), resource=resource)
+            self.nodes[name] = node
+            return node
+
+    def __getitem__(self, name):
+        return self.nodes[name]
+
+    def __contains__(self, name):
+        return name in self.nodes
+
+
+class DagExecutor:
+    """Runs a StepGraph, starting every node whose dependencies have finished.
+
+    A node that raises is marked failed and all of its (transitive) dependents
+    are skipped; independent branches keep running.
+    """
+
+    def __init__(self, slots=None, max_threads=16, tracer=None):
+        self.slots = slots or ResourceSlots({"gpu": 1, "cpu": 4})
+        self.max_threads = max_threads
+        self.tracer = tracer
+
+    def _run_node(self, node):
+        # The scheduler took the node's slot before submitting it; release it here.
+        try:
+            node.started_at = time.time()
+            if self.tracer is None:
+                return node.func()
+            # Nodes run on pool threads; activating the tracer there lets StepRunner and
+            # span() calls inside the node land in the same session trace.
+            span_args = {"resource": node.resource, "slot_wait_ms": round((node.started_at - node.ready_at) * 1000.0, 1)}
+            with activate(self.tracer), self.tracer.span(node.name, cat="node", args=span_args):
+                return node.func()
+        finally:
+            node.finished_at = time.time()
+            self.slots.release(node.resource)
+
+    def run(self, graph):
+        """Submit a ready node only once its resource slot is taken, so pool threads are never
+        parked on a slot: a ready finalize (cpu) starts as soon as a cpu slot frees up, however
+        many asset_gen (gpu) nodes are queued."""
+        started_at = time.time()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_threads) as pool:
+            while True:
+                blocked = False
+                with graph.lock:
+                    progressed = True
+                    while progressed:
+                        progressed = False
+                        for node in list(graph.nodes.values()):
+                            if node.status != STATUS_PENDING:
+                                continue
+                            dep_states = [graph.nodes[dep].status for dep in node.deps]
+                            if any(state in (STATUS_FAILED, STATUS_SKIPPED) for state in dep_states):
+                                node.status = STATUS_SKIPPED
+                                node.error = "upstream_failed"
+                                progressed = True
+                            elif all(state == STATUS_DONE for state in dep_states):
+                                if node.ready_at is None:
+                                    node.ready_at = time.time()
+                                if len(running) >= self.max_threads or not self.slots.try_acquire(node.resource):
+                                    blocked = True
+                                    continue
+                                node.status = STATUS_RUNNING
+                                running[pool.submit(self._run_node, node)] = node
+
+                if not running:
+                    if not blocked:
+                        break
+                    # Slots held by other sessions sharing `slots`.
+                    self.slots.wait_release(SLOT_POLL_S)
+                    continue
+
+                # Slots may also be freed by other executors: poll while nodes are blocked.
+                done, _ = wait(list(running), timeout=SLOT_POLL_S if blocked else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    try:
+                        node.result = future.result()
+                        node.status = STATUS_DONE
+                    except Exception as exc:
+                        node.error = f"{type(exc).__name__}: {exc}"
+                        node.status = STATUS_FAILED
+                        print(f"⚠️ 节点 '{node.name}' 执行失败，其下游节点将被跳过: {node.error}")
+
+        return DagRunSummary(graph, started_at, time.time())
+
+
+class DagRunSummary:
+    def __init__(self, graph, started_at, finished_at):
+        self.graph = graph
+        self.started_at = started_at
+        self.finished_at = finished_at
+
+    @property
+    def wall_time_s(self):
+        return self.finished_at - self.started_at
+
+    @property
+    def busy_time_s(self):
+        """Sum of node durations, i.e. the wall time a strictly linear run would need."""
+        return sum(node.duration_s for node in self.graph.nodes.values())
+
+    def failed(self):
+        return [node for node in self.graph.nodes.values() if node.status == STATUS_FAILED]
+
+    def skipped(self):
+        return [node for node in self.graph.nodes.values() if node.status == STATUS_SKIPPED]
@@ -6,29 +6,309 @@ import os
 import subprocess
 import json
 import uuid
+import sys
 import datetime
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 
-def harvest_prop_grabcut(image_path, output_dir, rect_ratio=0.6, roi_hint=None, disable_skin_rejection=False):
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.tracing import span
+from src.core.prop_dedup import crop_signature
+from src.core.optical_flow import compute_flow, upsample_flow, backward_warp, photometric_confidence
+from src.core.light_probes import ProbeGrid
+from src.metrics.face_detection import FaceDetectionCache
+
+# Coarse-to-fine GrabCut: frames whose long side exceeds the working resolution are
+# segmented downscaled, then only a band around the upsampled boundary is refined
+# at full resolution, tile by tile.
+DEFAULT_WORKING_RESOLUTION = 1024
+GRABCUT_ITERATIONS = 5
+REFINE_ITERATIONS = 2
+REFINE_TILE = 256
+MIN_TILE_SAMPLES = 32
+SKIN_YCRCB_LOWER = np.array([0, 133, 77], dtype=np.uint8)
+SKIN_YCRCB_UPPER = np.array([255, 173, 127], dtype=np.uint8)
+
+# PNG deflate levels (OpenCV default is 3). Raw crops superseded by their relit version
+# are intermediates and default to a fast level.
+DEFAULT_PNG_COMPRESSION = 3
+DEFAULT_RAW_PNG_COMPRESSION = 1
+
+# Shot mode: masks are carried from frame to frame with Farneback flow (computed at
+# SHOT_FLOW_SCALE) while the warped mask stays photometrically consistent.
+DEFAULT_MIN_FLOW_CONFIDENCE = 0.85
+SHOT_FLOW_SCALE = 0.5
+SHOT_REFINE_BAND_PX = 4
+
+# Articulation: Hough circles on a median-blurred copy capped at this long side.
+ARTICULATION_MAX_SIDE = 512
+ARTICULATION_BLUR_KSIZE = 5
+ARTICULATION_CANNY_HIGH = 50
+MAX_REPORTED_CIRCLES = 16
+
+# Relighting with a probe's band-1 SH term: a 2D crop is shaded as a surface facing the
+# camera (ml-sharp scenes use OpenCV camera axes, +z pointing into the scene).
+PROP_NORMAL = (0.0, 0.0, -1.0)
+
+
+def _skin_in_foreground(img, mask):
+    """Skin-coloured pixels (YCrCb range) that GrabCut currently labels as foreground."""
+    img_ycrcb = cv2.cvtColor(img, cv2.COLOR_BGR2YCrCb)
+    skin_mask_raw = cv2.inRange(img_ycrcb, SKIN_YCRCB_LOWER, SKIN_YCRCB_UPPER)
+    fg_mask = np.where((mask == cv2.GC_FGD) | (mask == cv2.GC_PR_FGD), 1, 0).astype('uint8')
+    return cv2.bitwise_and(skin_mask_raw, skin_mask_raw, mask=fg_mask)
+
+
+def _grabcut_with_skin_rejection(img, rect, disable_skin_rejection):
+    """The original two-pass GrabCut; returns the GrabCut label mask."""
+    mask = np.zeros(img.shape[:2], np.uint8)
+    bgdModel = np.zeros((1, 65), np.float64)
+    fgdModel = np.zeros((1, 65), np.float64)
+
+    # Initial pass with bounding rect
+    cv2.grabCut(img, mask, rect, bgdModel, fgdModel, GRABCUT_ITERATIONS, cv2.GC_INIT_WITH_RECT)
+
+    # 🛑 NEW FEATURE: Remove Hands (Skin Color Rejection)
+    if not disable_skin_rejection:
+        print("🖐 防粘连机制：执行肤色检测以剔除手部遮挡...")
+        # Filter skin mask to only apply within the BBOX and foreground to avoid false positives in BG
+        skin_in_fg = _skin_in_foreground(img, mask)
+
+        # Force localized skin pixels into "Sure Background"
+        if cv2.countNonZero(skin_in_fg) > 0:
+            mask[skin_in_fg == 255] = cv2.GC_BGD
+            print(f"   -> 剔除疑似手部/肤色像素: {cv2.countNonZero(skin_in_fg)} pixels")
+            # Run second pass GrabCut with the modified mask
+            cv2.grabCut(img, mask, rect, bgdModel, fgdModel, GRABCUT_ITERATIONS, cv2.GC_INIT_WITH_MASK)
+    else:
+        print("⏭️ 防粘连机制已关闭，跳过手部/肤色像素检测...")
+    return mask
+
+
+def _refine_boundary_band(img, coarse_fg, band_px, rect):
+    """Re-run GrabCut at full resolution only on tiles covering the mask boundary band."""
+    h, w = coarse_fg.shape
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * band_px + 1, 2 * band_px + 1))
+    inner = cv2.erode(coarse_fg, kernel).astype(bool)
+    outer = cv2.dilate(coarse_fg, kernel).astype(bool)
+    band = outer & ~inner
+    # Nothing outside the ROI may become foreground, as in the full-resolution pass.
+    rx, ry, rw, rh = rect
+    roi = np.zeros((h, w), bool)
+    roi[ry:ry + rh, rx:rx + rw] = True
+    band &= roi
+
+    labels = np.where(inner & roi, cv2.GC_FGD, cv2.GC_BGD).astype(np.uint8)
+    labels[band] = np.where(coarse_fg[band] > 0, cv2.GC_PR_FGD, cv2.GC_PR_BGD)
+
+    margin = 2 * band_px
+    ys, xs = np.nonzero(band)
+    tiles = set(zip((ys // REFINE_TILE).tolist(), (xs // REFINE_TILE).tolist()))
+    refined_tiles = 0
+    for ty, tx in tiles:
+        y0, x0 = ty * REFINE_TILE, tx * REFINE_TILE
+        y1, x1 = min(h, y0 + REFINE_TILE), min(w, x0 + REFINE_TILE)
+        cy0, cx0 = max(0, y0 - margin), max(0, x0 - margin)
+        cy1, cx1 = min(h, y1 + margin), min(w, x1 + margin)
+        sub = labels[cy0:cy1, cx0:cx1].copy()
+        fg_samples = np.count_nonzero((sub == cv2.GC_FGD) | (sub == cv2.GC_PR_FGD))
+        bg_samples = np.count_nonzero((sub == cv2.GC_BGD) | (sub == cv2.GC_PR_BGD))
+        if fg_samples < MIN_TILE_SAMPLES or bg_samples < MIN_TILE_SAMPLES:
+            continue
+        bgdModel = np.zeros((1, 65), np.float64)
+        fgdModel = np.zeros((1, 65), np.float64)
+        cv2.grabCut(img[cy0:cy1, cx0:cx1], sub, None, bgdModel, fgdModel, REFINE_ITERATIONS, cv2.GC_INIT_WITH_MASK)
+        core = sub[y0 - cy0:y1 - cy0, x0 - cx0:x1 - cx0]
+        tile_band = band[y0:y1, x0:x1]
+        labels[y0:y1, x0:x1][tile_band] = core[tile_band]
+        refined_tiles += 1
+    return labels, refined_tiles
+
+
+def segment_prop(img, rect, disable_skin_rejection=False, working_resolution=DEFAULT_WORKING_RESOLUTION):
+    """Binary (0/1) foreground mask of `img` inside `rect`.
+
+    `working_resolution` caps the long side GrabCut runs at; 0/None or a smaller frame
+    keeps the original single-resolution path.
+    """
+    h, w = img.shape[:2]
+    scale = working_resolution / float(max(h, w)) if working_resolution else 1.0
+    if scale >= 1.0:
+        mask = _grabcut_with_skin_rejection(img, rect, disable_skin_rejection)
+        return np.where((mask == cv2.GC_BGD) | (mask == cv2.GC_PR_BGD), 0, 1).astype('uint8')
+
+    small_size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    small = cv2.resize(img, small_size, interpolation=cv2.INTER_AREA)
+    sx, sy = small_size[0] / float(w), small_size[1] / float(h)
+    small_rect = (
+        int(rect[0] * sx), int(rect[1] * sy),
+        max(1, int(round(rect[2] * sx))), max(1, int(round(rect[3] * sy))),
+    )
+    print(f"🔻 金字塔 GrabCut：在 {small_size[0]}x{small_size[1]} 工作分辨率上分割，再在原分辨率细化边界带。")
+    small_mask = _grabcut_with_skin_rejection(small, small_rect, disable_skin_rejection)
+    small_fg = np.where((small_mask == cv2.GC_BGD) | (small_mask == cv2.GC_PR_BGD), 0, 1).astype('uint8')
+    coarse_fg = cv2.resize(small_fg, (w, h), interpolation=cv2.INTER_NEAREST)
+
+    if not disable_skin_rejection:
+        # Same rejection at full resolution for skin detail lost by downscaling.
+        coarse_fg[_skin_in_foreground(img, coarse_fg * cv2.GC_FGD) == 255] = 0
+
+    band_px = int(np.ceil(1.5 / scale)) + 2
+    labels, refined_tiles = _refine_boundary_band(img, coarse_fg, band_px, rect)
+    print(f"   -> 边界带宽 {band_px}px，细化 {refined_tiles} 个图块。")
+    return np.where((labels == cv2.GC_BGD) | (labels == cv2.GC_PR_BGD), 0, 1).astype('uint8')
+
+
+_FACE_CASCADE = None
+_FACE_CACHES = {}
+
+
+def get_face_detector():
+    """Haar face cascade, loaded once per process and reused for every frame."""
+    global _FACE_CASCADE
+    if _FACE_CASCADE is None:
+        # Using relative path to cv2 data if possible, or simple fallback
+        face_cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        _FACE_CASCADE = cv2.CascadeClassifier(face_cascade_path)
+    return _FACE_CASCADE
+
+
+def get_face_cache(cache_dir=None):
+    """Per-process face detection cache, optionally backed by `cache_dir` on disk."""
+    if cache_dir not in _FACE_CACHES:
+        _FACE_CACHES[cache_dir] = FaceDetectionCache(cache_dir)
+    return _FACE_CACHES[cache_dir]
+
+
+def _pad_bbox(bbox, shape, pad):
+    x, y, w_b, h_b = bbox
+    x = max(0, x - pad)
+    y = max(0, y - pad)
+    w_b = min(shape[1] - x, w_b + 2*pad)
+    h_b = min(shape[0] - y, h_b + 2*pad)
+    return x, y, w_b, h_b
+
+
+def split_instances(mask, min_area):
+    """Separate objects of a binary mask, in the order cv2.findContours(RETR_EXTERNAL) lists them.
+
+    Built on connectedComponentsWithStats so that outlines are traced inside each
+    component's bbox only. Returns dicts with `bbox`, `area` (outline area, holes
+    included) and `contour` in frame coordinates; components lying inside another
+    component's outline are part of that object, as with external contours.
+    """
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    candidates = []
+    for label in range(1, n):
+        x, y, w_b, h_b = (int(v) for v in stats[label, :4])
+        # The bbox bounds the outline area, so smaller components can never qualify.
+        if w_b * h_b <= min_area:
+            continue
+        component = (labels[y:y+h_b, x:x+w_b] == label).astype(np.uint8)
+        contours, _ = cv2.findContours(component, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x, y))
+        contour = max(contours, key=len)
+        first_x = x + int(np.argmax(component[0]))
+        candidates.append({"bbox": (x, y, w_b, h_b), "area": cv2.contourArea(contour),
+                           "contour": contour, "start": (y, first_x)})
+
+    def enclosed(inner):
+        ix, iy, iw, ih = inner["bbox"]
+        point = (float(inner["start"][1]), float(inner["start"][0]))
+        for outer in candidates:
+            ox, oy, ow, oh = outer["bbox"]
+            if outer is inner or not (ox <= ix and oy <= iy and ix + iw <= ox + ow and iy + ih <= oy + oh):
+                continue
+            if cv2.pointPolygonTest(outer["contour"], point, False) > 0:
+                return True
+        return False
+
+    instances = [c for c in candidates if c["area"] > min_area and not enclosed(c)]
+    # findContours reports outlines in reverse raster order of their top-left pixel.
+    instances.sort(key=lambda c: c["start"], reverse=True)
+    return instances
+
+
+@dataclass
+class HarvestCrop:
+    """One harvested prop kept in memory: BGRA crop plus routing metadata."""
+    id: str
+    bgra: np.ndarray
+    bbox: tuple
+    signals: dict = field(default_factory=dict)
+
+
+def encode_png(path, image, compression=DEFAULT_PNG_COMPRESSION):
+    """Write `image` once as PNG with the given deflate level (0 = store, 9 = smallest)."""
+    if not cv2.imwrite(path, image, [cv2.IMWRITE_PNG_COMPRESSION, int(compression)]):
+        raise IOError(f"Cannot write {path}")
+    return path
+
+
+def harvest_prop_grabcut(image_path, output_dir, rect_ratio=0.6, roi_hint=None, disable_skin_rejection=False,
+                         working_resolution=DEFAULT_WORKING_RESOLUTION, img=None,
+                         png_compression=DEFAULT_PNG_COMPRESSION, face_cache_dir=None):
     """
     Simulate automated harvesting using GrabCut.
     In production, this would be replaced by Segment Anything Model (SAM2).
+    `img` may carry the already decoded BGR frame to avoid reading `image_path` again.
     """
-    img = cv2.imread(image_path)
+    if img is None:
+        img = cv2.imread(image_path)
     if img is None:
         raise FileNotFoundError(f"Cannot read {image_path}")
-    
+
+    saved_assets = []
+    for crop in extract_props(img, output_dir, roi_hint=roi_hint, disable_skin_rejection=disable_skin_rejection,
+                              working_resolution=working_resolution, face_cache_dir=face_cache_dir):
+        out_path = encode_png(os.path.join(output_dir, f"{crop.id}.png"), crop.bgra, png_compression)
+        print(f"Harvested Asset: {out_path}")
+        saved_assets.append({"path": out_path, "id": crop.id, "signals": crop.signals})
+    return saved_assets
+
+
+def extract_props(img, output_dir, roi_hint=None, disable_skin_rejection=False,
+                  working_resolution=DEFAULT_WORKING_RESOLUTION, face_cache_dir=None):
+    """GrabCut extraction of a decoded BGR frame into in-memory HarvestCrop objects.
+
+    Only the ROI evidence preview is written to `output_dir`; encoding the crops is
+    left to the caller so each artifact is written exactly once.
+    """
+    mask2, faces, preview_path = segment_frame(img, output_dir, roi_hint=roi_hint,
+                                               disable_skin_rejection=disable_skin_rejection,
+                                               working_resolution=working_resolution,
+                                               face_cache_dir=face_cache_dir)
+    return crops_from_mask(img, mask2, len(faces) > 0, preview_path)
+
+
+def write_roi_preview(img, rect, faces, output_dir):
+    preview_img = img.copy()
+    cv2.rectangle(preview_img, (rect[0], rect[1]), (rect[0]+rect[2], rect[1]+rect[3]), (0, 255, 0), 2)
+    for (fx, fy, fw, fh) in faces:
+        cv2.rectangle(preview_img, (fx, fy), (fx+fw, fy+fh), (255, 0, 0), 2)
+    preview_path = os.path.join(output_dir, "roi_preview.png")
+    cv2.imwrite(preview_path, preview_img)
+    print(f"📸 Saved Evidence Preview (ROI): {preview_path}")
+    return preview_path
+
+
+def segment_frame(img, output_dir, roi_hint=None, disable_skin_rejection=False,
+                  working_resolution=DEFAULT_WORKING_RESOLUTION, face_cache_dir=None):
+    """Face detection, ROI inference and GrabCut; returns (binary mask, faces, preview path).
+
+    Faces are detected on a downscaled copy and cached per frame hash (see
+    src/metrics/face_detection.py), so ROI/skin re-runs of a frame skip detection.
+    """
     h, w = img.shape[:2]
     
     # Create mask directory
     os.makedirs(output_dir, exist_ok=True)
     
-    # Load Face Detector (Haar Cascade)
-    # Using relative path to cv2 data if possible, or simple fallback
-    face_cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-    face_cascade = cv2.CascadeClassifier(face_cascade_path)
-    
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+    # Face Detector (Haar Cascade), cached per frame
+    faces = get_face_cache(face_cache_dir).detect(img, get_face_detector())
     
     if roi_hint:
         try:
@@ -76,151 +356,78 @@ def harvest_prop_grabcut(image_path, output_dir, rect_ratio=0.6, roi_hint=None,
     print(f"Applying Intelligent Extraction (GrabCut) on ROI: {rect}...")
     
     # === Evidence Preview ===
-    preview_img = img.copy()
-    cv2.rectangle(preview_img, (rect[0], rect[1]), (rect[0]+rect[2], rect[1]+rect[3]), (0, 255, 0), 2)
-    for (fx, fy, fw, fh) in faces:
-        cv2.rectangle(preview_img, (fx, fy), (fx+fw, fy+fh), (255, 0, 0), 2)
-    preview_path = os.path.join(output_dir, "roi_preview.png")
-    cv2.imwrite(preview_path, preview_img)
-    print(f"📸 Saved Evidence Preview (ROI): {preview_path}")
-    
-    mask = np.zeros(img.shape[:2], np.uint8)
-    bgdModel = np.zeros((1, 65), np.float64)
-    fgdModel = np.zeros((1, 65), np.float64)
-    
-    # Initial pass with bounding rect
-    cv2.grabCut(img, mask, rect, bgdModel, fgdModel, 5, cv2.GC_INIT_WITH_RECT)
+    preview_path = write_roi_preview(img, rect, faces, output_dir)
     
-    # 🛑 NEW FEATURE: Remove Hands (Skin Color Rejection)
-    if not disable_skin_rejection:
-        print("🖐 防粘连机制：执行肤色检测以剔除手部遮挡...")
-        img_ycrcb = cv2.cvtColor(img, cv2.COLOR_BGR2YCrCb)
-        # Generic skin tone ranges in YCrCb
-        lower_skin = np.array([0, 133, 77], dtype=np.uint8)
-        upper_skin = np.array([255, 173, 127], dtype=np.uint8)
-        skin_mask_raw = cv2.inRange(img_ycrcb, lower_skin, upper_skin)
-        
-        # Filter skin mask to only apply within the BBOX and foreground to avoid false positives in BG
-        fg_mask = np.where((mask == cv2.GC_FGD) | (mask == cv2.GC_PR_FGD), 1, 0).astype('uint8')
-        skin_in_fg = cv2.bitwise_and(skin_mask_raw, skin_mask_raw, mask=fg_mask)
-        
-        # Force localized skin pixels into "Sure Background"
-        if cv2.countNonZero(skin_in_fg) > 0:
-            mask[skin_in_fg == 255] = cv2.GC_BGD
-            print(f"   -> 剔除疑似手部/肤色像素: {cv2.countNonZero(skin_in_fg)} pixels")
-            # Run second pass GrabCut with the modified mask
-            cv2.grabCut(img, mask, rect, bgdModel, fgdModel, 5, cv2.GC_INIT_WITH_MASK)
-    else:
-        print("⏭️ 防粘连机制已关闭，跳过手部/肤色像素检测...")
-    
-    # Mask: 0/2 is BG, 1/3 is FG
-    mask2 = np.where((mask==2)|(mask==0), 0, 1).astype('uint8')
-    
-    # Create RGBA
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    img_rgba = np.dstack((img_rgb, mask2 * 255))
+    mask2 = segment_prop(img, rect, disable_skin_rejection=disable_skin_rejection,
+                         working_resolution=working_resolution)
+    return mask2, faces, preview_path
+
+
+def crops_from_mask(img, mask2, has_person_signal, preview_path):
+    """Split a binary frame mask into HarvestCrop objects with routing signals."""
+    h, w = img.shape[:2]
     
     # --- NEW FEATURE: Instance Splitting ---
     # Check if we have multiple disconnected objects (e.g. 2 cars)
-    contours, _ = cv2.findContours(mask2, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    instances = split_instances(mask2, min_area=w * h * 0.05)
     
-    saved_assets = []
+    crops = []
     
-    # Filter small noise
-    valid_contours = [c for c in contours if cv2.contourArea(c) > (w * h * 0.05)]
-    
-    # 模拟判断是否有人的信号
-    has_person_signal = len(faces) > 0
+    # 模拟判断是否有人的信号 (has_person_signal)
     has_mask_signal = cv2.countNonZero(mask2) > 0
 
     # 简化背景复杂度评分：前景面积越大，背景越复杂（分数越高）
     fg_ratio = cv2.countNonZero(mask2) / float(w * h)
     bg_score = "low" if fg_ratio > 0.5 else "high"
     
-    if len(valid_contours) > 1:
-        print(f"✂️  Auto-Split: Detected {len(valid_contours)} separate objects. Splitting...")
+    if len(instances) > 1:
+        print(f"✂️  Auto-Split: Detected {len(instances)} separate objects. Splitting...")
         
-        for i, cnt in enumerate(valid_contours):
-            x, y, w_c, h_c = cv2.boundingRect(cnt)
-            # Add padding
-            pad = 20
-            x = max(0, x - pad)
-            y = max(0, y - pad)
-            w_c = min(img.shape[1] - x, w_c + 2*pad)
-            h_c = min(img.shape[0] - y, h_c + 2*pad)
-            
-            # Crop RGBA
-            # We need to construct RGBA for this specific contour only? 
-            # Ideally yes, but masking strictly is hard efficiently here. 
-            # Simple approach: Crop the already masked RGBA image to this bbox.
-            # (Pixels outside contour but inside bbox will remain visible if they belong to other objects? 
-            #  No, because they are spatially separated. Bbox might overlap slightly but usually okay for demo.)
-            
-            # Better: Create a sub-mask for this contour to be clean
-            sub_mask = np.zeros_like(mask2)
-            cv2.drawContours(sub_mask, [cnt], -1, 1, thickness=cv2.FILLED)
-            
-            # Combine original RGB with this Sub-Mask
-            sub_rgba = np.dstack((img_rgb, sub_mask * 255))
+        for i, instance in enumerate(instances):
+            x, y, w_c, h_c = _pad_bbox(instance["bbox"], img.shape, pad=20)
             
-            # Crop
-            final_crop = sub_rgba[y:y+h_c, x:x+w_c]
+            # RGBA built only inside the padded bbox: BGR crop + this instance's filled outline
+            sub_mask = np.zeros((h_c, w_c), np.uint8)
+            cv2.drawContours(sub_mask, [instance["contour"]], -1, 255, thickness=cv2.FILLED, offset=(-x, -y))
+            final_crop = np.dstack((img[y:y+h_c, x:x+w_c], sub_mask))
             
             asset_id = f"prop_{datetime.datetime.now().strftime('%Y%m%d')}_{uuid.uuid4().hex[:4]}_part{i+1}"
-            out_path = os.path.join(output_dir, f"{asset_id}.png")
-            cv2.imwrite(out_path, cv2.cvtColor(final_crop, cv2.COLOR_RGBA2BGRA))
-            print(f"   -> Saved Part {i+1}: {out_path}")
+            print(f"   -> Extracted Part {i+1}: {asset_id}")
             
             # Generate Signals
-            area_ratio = round(cv2.contourArea(cnt) / (w * h), 3)
-            saved_assets.append({
-                "path": out_path,
-                "id": asset_id,
-                "signals": {
-                    "area_ratio": area_ratio,
-                    "has_person": has_person_signal,
-                    "num_instances": len(valid_contours),
-                    "has_mask": has_mask_signal,
-                    "bg_score": bg_score,
-                    "preview": preview_path
-                }
-            })
+            area_ratio = round(instance["area"] / (w * h), 3)
+            crops.append(HarvestCrop(asset_id, final_crop, (x, y, w_c, h_c), {
+                "area_ratio": area_ratio,
+                "has_person": has_person_signal,
+                "num_instances": len(instances),
+                "has_mask": has_mask_signal,
+                "bg_score": bg_score,
+                "preview": preview_path
+            }))
             
     else:
         # Fallback to single object logic (bounding rect of all mask)
         coords = cv2.findNonZero(mask2)
-        x, y, w_b, h_b = cv2.boundingRect(coords)
-        pad = 20
-        x = max(0, x - pad)
-        y = max(0, y - pad)
-        w_b = min(img.shape[1] - x, w_b + 2*pad)
-        h_b = min(img.shape[0] - y, h_b + 2*pad)
+        x, y, w_b, h_b = _pad_bbox(cv2.boundingRect(coords), img.shape, pad=20)
         
-        cropped_rgba = img_rgba[y:y+h_b, x:x+w_b]
+        cropped_rgba = np.dstack((img[y:y+h_b, x:x+w_b], mask2[y:y+h_b, x:x+w_b] * 255))
         
         asset_id = f"prop_{datetime.datetime.now().strftime('%Y%m%d')}_{uuid.uuid4().hex[:4]}"
-        out_path = os.path.join(output_dir, f"{asset_id}.png")
-        cv2.imwrite(out_path, cv2.cvtColor(cropped_rgba, cv2.COLOR_RGBA2BGRA))
-        print(f"Harvested Asset: {out_path}")
         
         # Determine Area
         area = cv2.countNonZero(mask2)
-        saved_assets.append({
-            "path": out_path,
-            "id": asset_id,
-            "signals": {
-                "area_ratio": round(area / (w * h), 3),
-                "has_person": has_person_signal,
-                "num_instances": 1,
-                "has_mask": has_mask_signal,
-                "bg_score": bg_score,
-                "preview": preview_path
-            }
-        })
+        crops.append(HarvestCrop(asset_id, cropped_rgba, (x, y, w_b, h_b), {
+            "area_ratio": round(area / (w * h), 3),
+            "has_person": has_person_signal,
+            "num_instances": 1,
+            "has_mask": has_mask_signal,
+            "bg_score": bg_score,
+            "preview": preview_path
+        }))
 
-    return saved_assets
+    return crops
 
-def analyze_articulation(image_path, mask_rect):
+def analyze_articulation(image_path, mask_rect, image=None, max_side=ARTICULATION_MAX_SIDE):
     """
     Simulate AI Structural Inference.
     In a real National Platform pipeline, this would call a Vision-Language Model (VLM)
@@ -228,97 +435,215 @@ def analyze_articulation(image_path, mask_rect):
     
     For the Phase 8 Demo, we simulate this by detecting circular shapes (wheels) 
     or simply hardcoding for specific demo assets.
+
+    Hough runs once on a blurred copy capped at `max_side` (long side); the detected
+    circles are returned in crop pixel coordinates for later articulation stages.
     """
     print(f"🧠 [AI Decomposition] Analyzing structural potential for {os.path.basename(image_path)}...")
     
     # Mock Inference logic for "The Carriage" or "The Door"
     # If we detect a circle, we assume it's a wheel -> Revolute Joint.
-    img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if image is not None:
+        # In-memory crop: BT.601 luma like IMREAD_GRAYSCALE (alpha ignored), without a PNG decode.
+        img = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    else:
+        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
     if img is None:
         return None
-        
+
+    static = {"type": "static", "confidence": 0.99, "circle_count": 0, "circles": []}
+    scale = min(1.0, max_side / max(img.shape)) if max_side else 1.0
+    small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else img
+    small = cv2.medianBlur(small, ARTICULATION_BLUR_KSIZE)
+    min_radius = max(3, int(round(10 * scale)))
+    max_radius = int(min(small.shape) * 0.4)
+
+    # Early exit: no room for a wheel, or too few edges to vote for a single circle.
+    if max_radius <= min_radius:
+        return static
+    edges = cv2.Canny(small, ARTICULATION_CANNY_HIGH // 2, ARTICULATION_CANNY_HIGH)
+    if cv2.countNonZero(edges) < 2 * np.pi * min_radius:
+        return static
+
     # Hough Circle Transform to find "Wheels"
-    circles = cv2.HoughCircles(img, cv2.HOUGH_GRADIENT, dp=1.2, minDist=30,
-                               param1=50, param2=30, minRadius=10, maxRadius=int(min(img.shape)*0.4))
-    
-    if circles is not None:
-        print(f"   -> Detected {len(circles[0])} circular structures (Potential Wheels).")
-        return {
-            "type": "articulated",
-            "joint": "revolute",
-            "part_name": "wheel_01",
-            "confidence": 0.85
-        }
-    
-    # Default for non-circular: assume static or check for simple hinge
+    circles = cv2.HoughCircles(small, cv2.HOUGH_GRADIENT, dp=1.2, minDist=max(1.0, 30 * scale),
+                               param1=ARTICULATION_CANNY_HIGH, param2=30, minRadius=min_radius, maxRadius=max_radius)
+    if circles is None:
+        return static
+
+    circles = circles[0] / scale
+    print(f"   -> Detected {len(circles)} circular structures (Potential Wheels).")
     return {
-        "type": "static",
-        "confidence": 0.99
+        "type": "articulated",
+        "joint": "revolute",
+        "part_name": "wheel_01",
+        "confidence": 0.85,
+        "circle_count": int(len(circles)),
+        # Strongest first, as ranked by the Hough accumulator.
+        "circles": [
+            {"center": [round(float(x), 1), round(float(y), 1)], "radius": round(float(r), 1)}
+            for x, y, r in circles[:MAX_REPORTED_CIRCLES]
+        ],
     }
 
-def apply_relighting(prop_image_path, lighting_json_path):
+def load_lighting_probe(lighting_json_path):
+    if not lighting_json_path or not os.path.exists(lighting_json_path):
+        print(f"No lighting probe found at {lighting_json_path}, skipping relighting.")
+        return None
+    with open(lighting_json_path, 'r') as f:
+        light_data = json.load(f)
+    grid_info = light_data.get("probe_grid")
+    if grid_info:
+        grid_path = os.path.join(os.path.dirname(os.path.abspath(lighting_json_path)), grid_info["path"])
+        if os.path.exists(grid_path):
+            # In-memory only ("_" prefix): probe lookups by asset placement.
+            light_data["_grid"] = ProbeGrid.load(grid_path)
+        else:
+            print(f"⚠️ 探针网格 {grid_path} 不存在，使用全局光照。")
+    return light_data
+
+
+def probe_light_data(light_data, placement):
+    """`light_data` with ambient and SH terms taken from the grid probe nearest to `placement`
+    (PLY scene coordinates); unchanged without a grid or placement.
+
+    The global `ambient_light` (unweighted mean of opaque splats) is kept and scaled by the
+    probe's ambient relative to the global sh_lighting ambient; both of those use the same
+    opacity x scale weighting, so only the location changes the brightness, not the estimator.
+    """
+    grid = light_data.get("_grid")
+    if grid is None or placement is None:
+        return light_data
+    sh = grid.nearest(placement)
+    if sh is None:
+        return light_data
+    global_ambient = (light_data.get("sh_lighting") or {}).get("ambient")
+    ambient = dict(light_data.get("ambient_light", {"r": 1, "g": 1, "b": 1}))
+    if global_ambient:
+        ambient = {
+            c: float(np.clip(ambient[c] * sh["ambient"][c] / max(global_ambient[c], 1e-3), 0.0, 1.0))
+            for c in "rgb"
+        }
+    return dict(light_data, ambient_light=ambient, sh_lighting=sh)
+
+
+def irradiance_factor(light_data, normal=PROP_NORMAL):
+    """BGR irradiance of a Lambertian surface with `normal` under the probe's SH L1 lighting,
+    relative to its ambient term: 1 + 2/3 * D_c / A_c * (l . n), clipped to [0, 2].
+
+    Returns None when the probe has no dominant direction (schema 1 or no band-1 SH).
+    """
+    sh = light_data.get("sh_lighting") or {}
+    direction = sh.get("dominant_direction")
+    if not direction:
+        return None
+    cosine = float(np.dot(direction, normal))
+    ambient, directional = sh["ambient"], sh["directional_color"]
+    return tuple(
+        float(np.clip(1.0 + (2.0 / 3.0) * directional[c] / max(ambient[c], 1e-3) * cosine, 0.0, 2.0))
+        for c in "bgr"
+    )
+
+
+@lru_cache(maxsize=32)
+def relight_lut(color_scale):
+    """(256, 1, 4) cv2.LUT table for a BGR ambient scale; alpha maps to itself.
+
+    Cached per process, so every crop relit with the same probe shares one table.
+    """
+    levels = np.arange(256, dtype=float)[:, None]
+    # Same arithmetic as the former per-pixel float path: v * scale * 1.2, clipped, truncated.
+    bgr = np.clip(levels * np.array(color_scale) * 1.2, 0, 255).astype(np.uint8)
+    return np.ascontiguousarray(np.hstack((bgr, levels.astype(np.uint8)))[:, None, :])
+
+
+def relight_image(img, light_data, placement=None):
     """
     Simulate relighting by multiplying existing pixels with scene ambient color.
     This is a naive approximation. Real pipeline uses PBR texture baking.
+    Works on an in-memory BGRA array; returns (relighted BGRA, BGR color scale).
+    With a probe grid and a 3D `placement`, the nearest probe replaces the global lighting.
     """
-    if not os.path.exists(lighting_json_path):
-        print(f"No lighting probe found at {lighting_json_path}, skipping relighting.")
-        return prop_image_path
-        
-    with open(lighting_json_path, 'r') as f:
-        light_data = json.load(f)
-    
+    light_data = probe_light_data(light_data, placement)
     ambient = light_data.get("ambient_light", {"r":1,"g":1,"b":1})
-    color_scale = [ambient['b'], ambient['g'], ambient['r']] # BGR for OpenCV
+    color_scale = (ambient['b'], ambient['g'], ambient['r']) # BGR for OpenCV
+    factor = irradiance_factor(light_data)
+    if factor is not None:
+        # Directional (Lambert) term from the probe's SH band 1; folded into the same per-channel LUT.
+        color_scale = tuple(round(scale * f, 6) for scale, f in zip(color_scale, factor))
     
-    img = cv2.imread(prop_image_path, cv2.IMREAD_UNCHANGED)
-    # Multiply RGB distinct from Alpha
-    rgb = img[:, :, :3].astype(float)
-    alpha = img[:, :, 3]
-    
-    # Apply ambient tint (Re-lighting)
-    # We mix original color with ambient tint. 
-    # Let's say we tint it 30% towards ambient.
-    rgb = rgb * np.array(color_scale) * 1.2 # Boost slightly because ambient is dark
-    
-    # Clip
-    rgb = np.clip(rgb, 0, 255).astype(np.uint8)
+    # Apply ambient tint (Re-lighting) as a per-channel lookup; alpha passes through the identity column.
+    # Boost slightly because ambient is dark.
+    lut = relight_lut(color_scale)
+    if img.shape[2] == 3:
+        lut = np.ascontiguousarray(lut[:, :, :3])
+    return cv2.LUT(img, lut), list(color_scale)
+
+
+def apply_relighting(prop_image_path, lighting_json_path, png_compression=DEFAULT_PNG_COMPRESSION):
+    """File-based wrapper around relight_image: reads a prop PNG, writes `<name>_relit.png`."""
+    light_data = load_lighting_probe(lighting_json_path)
+    if light_data is None:
+        return prop_image_path
     
-    # Merge
-    relighted = np.dstack((rgb, alpha))
+    img = cv2.imread(prop_image_path, cv2.IMREAD_UNCHANGED)
+    relighted, color_scale = relight_image(img, light_data)
     
     new_path = prop_image_path.replace(".png", "_relit.png")
-    cv2.imwrite(new_path, relighted)
+    encode_png(new_path, relighted, png_compression)
     print(f"Relighted asset saved to {new_path} using ambient {color_scale}")
     return new_path
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--input", required=True)
-    parser.add_argument("--output_dir", default="outputs/harvested_props")
-    parser.add_argument("--lighting_probe", help="Path to lighting_probe.json")
-    parser.add_argument("--roi_hint", type=str, help="Hint string in format 'x,y,w,h' to override automatic extraction.", default=None)
-    parser.add_argument("--disable_skin_rejection", action="store_true", help="Disable the skin color rejection mechanism (useful for animals or distinct backgrounds)")
-    args = parser.parse_args()
-    
+
+def harvest_frame(image_path, output_dir, lighting_probe=None, roi_hint=None, disable_skin_rejection=False,
+                  working_resolution=DEFAULT_WORKING_RESOLUTION, png_compression=DEFAULT_PNG_COMPRESSION,
+                  raw_png_compression=DEFAULT_RAW_PNG_COMPRESSION, face_cache_dir=None, probe_placement=None):
+    """Extraction -> relighting -> articulation for one frame; writes its harvest_manifest.json.
+
+    Crops stay in memory between the stages; each PNG is encoded exactly once. The raw
+    crop is only an intermediate when relighting runs, so it may use a cheaper deflate level.
+    """
+    img = cv2.imread(image_path)
+    if img is None:
+        raise FileNotFoundError(f"Cannot read {image_path}")
+
     # 1. Extraction
-    saved_assets = harvest_prop_grabcut(args.input, args.output_dir, roi_hint=args.roi_hint, disable_skin_rejection=args.disable_skin_rejection)
-    
+    with span("extraction", image=os.path.basename(image_path)):
+        crops = extract_props(img, output_dir, roi_hint=roi_hint, disable_skin_rejection=disable_skin_rejection,
+                              working_resolution=working_resolution, face_cache_dir=face_cache_dir)
+    light_data = load_lighting_probe(lighting_probe) if lighting_probe else None
+    return finalize_crops(crops, image_path, output_dir, light_data, png_compression, raw_png_compression,
+                          placement=probe_placement)
+
+
+def finalize_crops(crops, image_path, output_dir, light_data=None, png_compression=DEFAULT_PNG_COMPRESSION,
+                   raw_png_compression=DEFAULT_RAW_PNG_COMPRESSION, extra=None, placement=None):
+    """Relighting -> articulation -> encoding for a frame's crops; writes its harvest_manifest.json.
+
+    `extra` is merged into every manifest item (e.g. how the mask was obtained); `placement`
+    picks the nearest probe of the lighting probe grid, if there is one.
+    """
     # Create valid manifest list
     manifest_list = []
 
-    for asset_dict in saved_assets:
-        prop_path = asset_dict["path"]
-        asset_id = asset_dict["id"]
-        signals = asset_dict.get("signals", {})
+    for crop in crops:
+        asset_id = crop.id
+        signals = crop.signals
+        prop_path = encode_png(os.path.join(output_dir, f"{asset_id}.png"), crop.bgra,
+                               raw_png_compression if light_data is not None else png_compression)
+        print(f"Harvested Asset: {prop_path}")
         
         # 2. Relighting (Color Consistency)
-        final_prop_path = prop_path
-        if args.lighting_probe:
-            final_prop_path = apply_relighting(prop_path, args.lighting_probe)
+        final_prop_path, final_image = prop_path, crop.bgra
+        if light_data is not None:
+            with span("relighting", asset_id=asset_id):
+                final_image, color_scale = relight_image(crop.bgra, light_data, placement)
+                final_prop_path = encode_png(prop_path.replace(".png", "_relit.png"), final_image, png_compression)
+            print(f"Relighted asset saved to {final_prop_path} using ambient {color_scale}")
         
         # 3. Intelligent Analysis (New Phase 8 Feature)
-        articulation_data = analyze_articulation(final_prop_path, None)
+        with span("articulation", asset_id=asset_id):
+            articulation_data = analyze_articulation(final_prop_path, None, image=final_image)
         
         # Add to manifest
         manifest_list.append({
@@ -326,24 +651,238 @@ if __name__ == "__main__":
             "path": final_prop_path,
             "raw_path": prop_path,
             "articulation": articulation_data,  # <--- The Key "Dynamic" Data
-            "signals": signals                  # <--- Pipeline Routing Signals
+            "signals": signals,                 # <--- Pipeline Routing Signals
+            "dedup": crop_signature(final_image),  # <--- Cross-frame dedup signature
+            **(extra or {})
         })
         
         # Create Individual GBT Metadata (Legacy support)
         meta = {
             "id": asset_id,
-            "source_image": args.input,
+            "source_image": image_path,
             "extraction_method": "Auto-GrabCut + AI Decomposition",
-            "lighting_applied": True if args.lighting_probe else False,
+            "lighting_applied": light_data is not None,
             "type": "Hero Asset",
             "structure": articulation_data
         }
-        with open(os.path.join(args.output_dir, f"{asset_id}.json"), 'w') as f:
+        with open(os.path.join(output_dir, f"{asset_id}.json"), 'w') as f:
             json.dump(meta, f, indent=4)
             
     # Write Master Manifest for Pipeline Runner
-    manifest_path = os.path.join(args.output_dir, "harvest_manifest.json")
+    manifest_path = os.path.join(output_dir, "harvest_manifest.json")
     with open(manifest_path, "w") as f:
         json.dump(manifest_list, f, indent=4)
     print(f"✅ Manifest written to {manifest_path}")
+    return manifest_list
+
+
+def _init_batch_worker():
+    # One OpenCV thread per worker process: the pool already uses every core.
+    cv2.setNumThreads(1)
+    get_face_detector()
+
+
+def _harvest_batch_frame(image_path, frame_dir, options):
+    try:
+        return image_path, frame_dir, harvest_frame(image_path, frame_dir, **options), None
+    except Exception as e:
+        return image_path, frame_dir, [], f"{type(e).__name__}: {e}"
+
+
+def _frame_output_dirs(inputs, output_dir):
+    """One sub-directory per frame, named after the file stem (suffixed on collisions)."""
+    dirs, used = [], set()
+    for image_path in inputs:
+        stem = os.path.splitext(os.path.basename(image_path))[0]
+        name, n = stem, 1
+        while name in used:
+            n += 1
+            name = f"{stem}_{n}"
+        used.add(name)
+        dirs.append(os.path.join(output_dir, name))
+    return dirs
+
+
+def harvest_batch(inputs, output_dir, workers=None, **options):
+    """Harvest many frames over a process pool; returns the consolidated manifest and failures.
+
+    Each frame gets `<output_dir>/<frame>/harvest_manifest.json`; all items (tagged with
+    `source_image` and `frame_manifest`) are also written to `<output_dir>/harvest_manifest.json`.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    frame_dirs = _frame_output_dirs(inputs, output_dir)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(inputs)))
+    print(f"📦 批量采集：{len(inputs)} 帧，{workers} 个工作进程。")
+
+    if workers == 1:
+        results = [_harvest_batch_frame(path, frame_dir, options) for path, frame_dir in zip(inputs, frame_dirs)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as pool:
+            results = list(pool.map(_harvest_batch_frame, inputs, frame_dirs, [options] * len(inputs)))
+
+    return _consolidate(results, output_dir)
+
+
+def _consolidate(results, output_dir):
+    """Merge per-frame (image_path, frame_dir, items, error) results into the top-level manifest."""
+    consolidated, failures = [], []
+    for image_path, frame_dir, items, error in results:
+        if error:
+            print(f"❌ 帧采集失败 {image_path}: {error}")
+            failures.append({"source_image": image_path, "error": error})
+            continue
+        for item in items:
+            consolidated.append(dict(item, source_image=image_path,
+                                     frame_manifest=os.path.join(frame_dir, "harvest_manifest.json")))
+
+    manifest_path = os.path.join(output_dir, "harvest_manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump(consolidated, f, indent=4)
+    print(f"✅ Consolidated manifest ({len(consolidated)} assets from {len(results) - len(failures)} frames) written to {manifest_path}")
+    return consolidated, failures
+
+
+def propagate_mask(prev_img, prev_mask, img, flow_scale=SHOT_FLOW_SCALE):
+    """Warp the previous frame's binary mask into `img` with Farneback flow.
 
+    Returns (warped mask, confidence): the share of warped-foreground pixels whose
+    colour agrees with the flow-warped previous frame.
+    """
+    # Flow from the new frame back to the previous one, so both can be pulled into the new geometry.
+    flow = upsample_flow(compute_flow(img, prev_img, flow_scale), img.shape, flow_scale)
+    warped = backward_warp(prev_mask, flow, interpolation=cv2.INTER_NEAREST)
+    if not warped.any():
+        return warped, 0.0
+    return warped, photometric_confidence(img, backward_warp(prev_img, flow), warped)
+
+
+def _harvest_shot_frame(img, image_path, frame_dir, prev, min_confidence, light_data, options):
+    """One frame of a shot: propagate `prev` = (img, mask, has_person, anchor) or fall back to GrabCut."""
+    h, w = img.shape[:2]
+    mode, confidence = "grabcut", None
+    if prev is not None:
+        with span("propagation", image=os.path.basename(image_path)):
+            mask, confidence = propagate_mask(prev[0], prev[1], img)
+            if confidence >= min_confidence:
+                # Cheap refinement: GrabCut only on tiles along the warped boundary.
+                labels, _ = _refine_boundary_band(img, mask, SHOT_REFINE_BAND_PX, (0, 0, w, h))
+                mask = np.where((labels == cv2.GC_BGD) | (labels == cv2.GC_PR_BGD), 0, 1).astype('uint8')
+                if mask.any():
+                    mode = "propagated"
+                    has_person, anchor = prev[2], prev[3]
+                    print(f"🌊 掩膜光流传播：置信度 {confidence:.3f}，跳过完整 GrabCut。")
+                    preview_path = write_roi_preview(img, cv2.boundingRect(cv2.findNonZero(mask)), [], frame_dir)
+                else:
+                    # Thin/small props can vanish in the boundary refinement.
+                    print(f"🔁 边界细化后掩膜为空（置信度 {confidence:.3f}），重新执行完整提取。")
+            else:
+                print(f"🔁 传播置信度 {confidence:.3f} 低于 {min_confidence}，重新执行完整提取。")
+
+    if mode == "grabcut":
+        with span("extraction", image=os.path.basename(image_path)):
+            mask, faces, preview_path = segment_frame(img, frame_dir, roi_hint=options["roi_hint"],
+                                                      disable_skin_rejection=options["disable_skin_rejection"],
+                                                      working_resolution=options["working_resolution"],
+                                                      face_cache_dir=options["face_cache_dir"])
+        has_person, anchor = len(faces) > 0, image_path
+
+    crops = crops_from_mask(img, mask, has_person, preview_path)
+    mask_source = {
+        "mode": mode,
+        "anchor_frame": anchor,
+        "confidence": None if confidence is None else round(confidence, 4),
+    }
+    items = finalize_crops(crops, image_path, frame_dir, light_data, options["png_compression"],
+                           options["raw_png_compression"], extra={"mask_source": mask_source},
+                           placement=options["probe_placement"])
+    return items, mode, (img, mask, has_person, anchor)
+
+
+def harvest_shot(inputs, output_dir, min_confidence=DEFAULT_MIN_FLOW_CONFIDENCE, lighting_probe=None, roi_hint=None,
+                 disable_skin_rejection=False, working_resolution=DEFAULT_WORKING_RESOLUTION,
+                 png_compression=DEFAULT_PNG_COMPRESSION, raw_png_compression=DEFAULT_RAW_PNG_COMPRESSION,
+                 face_cache_dir=None, probe_placement=None):
+    """Harvest an ordered frame sequence of one shot with temporal mask propagation.
+
+    The first frame (and any frame where the propagated mask's confidence drops below
+    `min_confidence`) runs the full extraction; the others warp the previous mask with
+    optical flow and refine only its boundary. Outputs match harvest_batch, and every
+    item records its `mask_source`.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    frame_dirs = _frame_output_dirs(inputs, output_dir)
+    light_data = load_lighting_probe(lighting_probe) if lighting_probe else None
+    options = {
+        "roi_hint": roi_hint,
+        "disable_skin_rejection": disable_skin_rejection,
+        "working_resolution": working_resolution,
+        "png_compression": png_compression,
+        "raw_png_compression": raw_png_compression,
+        "face_cache_dir": face_cache_dir,
+        "probe_placement": probe_placement,
+    }
+    print(f"🎬 镜头级采集：{len(inputs)} 帧，传播置信度阈值 {min_confidence}。")
+
+    results, prev, modes = [], None, {"grabcut": 0, "propagated": 0}
+    for image_path, frame_dir in zip(inputs, frame_dirs):
+        try:
+            img = cv2.imread(image_path)
+            if img is None:
+                raise FileNotFoundError(f"Cannot read {image_path}")
+            os.makedirs(frame_dir, exist_ok=True)
+            items, mode, prev = _harvest_shot_frame(img, image_path, frame_dir, prev, min_confidence, light_data, options)
+            modes[mode] += 1
+            results.append((image_path, frame_dir, items, None))
+        except Exception as e:
+            results.append((image_path, frame_dir, [], f"{type(e).__name__}: {e}"))
+
+    print(f"📊 完整 GrabCut {modes['grabcut']} 帧，光流传播 {modes['propagated']} 帧。")
+    return _consolidate(results, output_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input")
+    source.add_argument("--inputs", nargs="+", help="Batch mode: harvest many frames, one sub-directory each")
+    source.add_argument("--input_list", help="Batch mode: text file with one frame path per line")
+    parser.add_argument("--output_dir", default="outputs/harvested_props")
+    parser.add_argument("--lighting_probe", help="Path to lighting_probe.json")
+    parser.add_argument("--roi_hint", type=str, help="Hint string in format 'x,y,w,h' to override automatic extraction.", default=None)
+    parser.add_argument("--disable_skin_rejection", action="store_true", help="Disable the skin color rejection mechanism (useful for animals or distinct backgrounds)")
+    parser.add_argument("--grabcut_working_res", type=int, default=DEFAULT_WORKING_RESOLUTION, help="Long-side resolution for coarse GrabCut; larger frames refine only the mask boundary at full res (0 = full-res GrabCut)")
+    parser.add_argument("--png_compression", type=int, default=DEFAULT_PNG_COMPRESSION, choices=range(10), metavar="0-9", help="PNG deflate level for final harvested images")
+    parser.add_argument("--raw_png_compression", type=int, default=DEFAULT_RAW_PNG_COMPRESSION, choices=range(10), metavar="0-9", help="PNG deflate level for raw crops that are superseded by a relit image")
+    parser.add_argument("--workers", type=int, default=None, help="Batch mode: worker processes (default: CPU count)")
+    parser.add_argument("--shot", action="store_true", help="Batch mode: frames are one ordered shot; propagate masks with optical flow instead of running GrabCut on every frame")
+    parser.add_argument("--face_cache_dir", default=None, help="Directory for cached face detections (per frame hash), shared across runs and worker processes")
+    parser.add_argument("--probe_placement", type=str, default=None, help="x,y,z scene position of the props; relight with the nearest probe of the lighting probe grid")
+    parser.add_argument("--min_flow_confidence", type=float, default=DEFAULT_MIN_FLOW_CONFIDENCE, help="Shot mode: re-run full extraction when the propagated mask's photometric confidence drops below this")
+    args = parser.parse_args()
+    if args.shot and args.input:
+        parser.error("--shot propagates masks across frames and needs --inputs or --input_list, not --input")
+
+    options = {
+        "lighting_probe": args.lighting_probe,
+        "roi_hint": args.roi_hint,
+        "disable_skin_rejection": args.disable_skin_rejection,
+        "working_resolution": args.grabcut_working_res,
+        "png_compression": args.png_compression,
+        "raw_png_compression": args.raw_png_compression,
+        "face_cache_dir": args.face_cache_dir,
+        "probe_placement": tuple(map(float, args.probe_placement.split(','))) if args.probe_placement else None,
+    }
+    if args.input:
+        harvest_frame(args.input, args.output_dir, **options)
+    else:
+        if args.input_list:
+            with open(args.input_list, "r") as f:
+                inputs = [line.strip() for line in f if line.strip()]
+        else:
+            inputs = args.inputs
+        if args.shot:
+            _, failures = harvest_shot(inputs, args.output_dir, min_confidence=args.min_flow_confidence, **options)
+        else:
+            _, failures = harvest_batch(inputs, args.output_dir, workers=args.workers, **options)
+        if failures:
+            sys.exit(1)
@@ -56,7 +56,7 @@ def _load_rgba_and_mask(image_path: str):
     return rgb, mask
 
 
-def main():
+def build_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", "-i", required=True, help="Input image path")
     parser.add_argument(
@@ -77,7 +77,11 @@ def main():
         action="store_true",
         help="Enable torch.compile in SAM3D pipeline (can be slower to start)",
     )
-    args = parser.parse_args()
+    return parser
+
+
+def _load_inference(tag: str, compile_model: bool):
+    """Import SAM3D from modules/sam-3d-objects and build the Inference pipeline."""
 
     project_root = Path(__file__).resolve().parents[3]  # .../preStudy
     sam3d_root = project_root / "modules" / "sam-3d-objects"
@@ -89,7 +93,8 @@ def main():
         )
 
     # Import their inference helper (they recommend sys.path.append('notebook'))
-    sys.path.insert(0, str(notebook_dir))
+    if str(notebook_dir) not in sys.path:
+        sys.path.insert(0, str(notebook_dir))
 
     # [CRITICAL] 必需的环境变量设置（规避 C++ 扩展编译崩溃与网络验证阻断）
     os.environ["LIDRA_SKIP_INIT"] = "true"
@@ -108,7 +113,7 @@ def main():
             f"Import error: {e}"
         )
 
-    config_path = sam3d_root / "checkpoints" / args.tag / "pipeline.yaml"
+    config_path = sam3d_root / "checkpoints" / tag / "pipeline.yaml"
     if not config_path.exists():
         raise SystemExit(
             f"Checkpoint config not found: {config_path}\n"
@@ -121,14 +126,19 @@ def main():
             "  mv checkpoints/${TAG}-download/checkpoints checkpoints/${TAG}\n"
         )
 
+    print(f"Loading SAM3D Objects pipeline from: {config_path}")
+    return Inference(str(config_path), compile=bool(compile_model))
+
+
+def run_sam3d_objects(args, inference=None):
     out_dir = Path(args.output)
     out_dir.mkdir(parents=True, exist_ok=True)
 
     input_path = Path(args.input)
     rgb, mask = _load_rgba_and_mask(str(input_path))
 
-    print(f"Loading SAM3D Objects pipeline from: {config_path}")
-    inference = Inference(str(config_path), compile=bool(args.compile))
+    if inference is None:
+        inference = _load_inference(args.tag, args.compile)
 
     print(f"Running SAM3D Objects on: {input_path}")
     output = inference(rgb, mask, seed=args.seed)
@@ -147,5 +157,25 @@ def main():
     print("Done!")
 
 
+# --- Warm worker hooks (src/core/step_worker.py) ---
+def load_model():
+    """Preload the default checkpoint; other (tag, compile) variants load lazily."""
+    defaults = build_parser().parse_args(["--input", "-"])
+    return {(defaults.tag, defaults.compile): _load_inference(defaults.tag, defaults.compile)}
+
+
+def run_job(models, argv):
+    args = build_parser().parse_args(argv)
+    key = (args.tag, args.compile)
+    if key not in models:
+        models[key] = _load_inference(args.tag, args.compile)
+    run_sam3d_objects(args, inference=models[key])
+
+
+def main():
+    args = build_parser().parse_args()
+    run_sam3d_objects(args)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,81 @@
+"""
+Stub 3D 生成后端（无 GPU 测试用）
+Author: zhangxin
+功能：模拟 TRELLIS.2 / SAM3D 的步骤脚本约定（--input/--output，产出 splat.ply 与 preview.png），
+      同时实现常驻 Worker 钩子 load_model/run_job，便于在无 GPU 环境下测试调度、缓存与 Worker 逻辑。
+输入：任意图像路径。
+输出：<output>/splat.ply（极小的 3DGS 二进制 PLY）、preview.png（输入拷贝）、stub_run.json（运行信息）。
+依赖：仅 Python 标准库。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import struct
+import argparse
+
+GS_PROPERTIES = (
+    ["x", "y", "z", "nx", "ny", "nz", "f_dc_0", "f_dc_1", "f_dc_2", "opacity"]
+    + [f"scale_{i}" for i in range(3)]
+    + [f"rot_{i}" for i in range(4)]
+)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Stub asset generation backend")
+    parser.add_argument("--input", "-i", required=True, help="Input image path")
+    parser.add_argument("--output", "-o", required=True, help="Output directory")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--num_splats", type=int, default=8)
+    parser.add_argument("--work_s", type=float, default=float(os.environ.get("STUB_WORK_S", "0")),
+                        help="Simulated inference time in seconds")
+    parser.add_argument("--fail", action="store_true", help="Exit non-zero to simulate a backend failure")
+    return parser
+
+
+def write_stub_ply(ply_path, num_splats, seed=1):
+    header = ["ply", "format binary_little_endian 1.0", f"element vertex {num_splats}"]
+    header += [f"property float {name}" for name in GS_PROPERTIES]
+    header.append("end_header")
+    with open(ply_path, "wb") as f:
+        f.write(("\n".join(header) + "\n").encode("ascii"))
+        for i in range(num_splats):
+            t = (i + seed) / float(num_splats + seed)
+            row = [t, 1.0 - t, 0.5 * t, 0.0, 0.0, 1.0, 0.2, 0.1, -0.1, 2.0, -3.0, -3.0, -3.0, 1.0, 0.0, 0.0, 0.0]
+            f.write(struct.pack("<" + "f" * len(GS_PROPERTIES), *row))
+
+
+def run_stub(args, model=None):
+    if args.fail:
+        print("Stub backend asked to fail.", file=sys.stderr)
+        raise SystemExit(3)
+
+    os.makedirs(args.output, exist_ok=True)
+    if args.work_s > 0:
+        time.sleep(args.work_s)
+
+    write_stub_ply(os.path.join(args.output, "splat.ply"), args.num_splats, args.seed)
+    shutil.copyfile(args.input, os.path.join(args.output, "preview.png"))
+
+    info = {"pid": os.getpid(), "warm": model is not None}
+    if model is not None:
+        model["jobs"] += 1
+        info.update({"model_loaded_at": model["loaded_at"], "model_jobs": model["jobs"]})
+    with open(os.path.join(args.output, "stub_run.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=4)
+    print(f"Stub backend wrote {args.num_splats} splats to {args.output}")
+
+
+# --- Warm worker hooks (src/core/step_worker.py) ---
+def load_model():
+    time.sleep(float(os.environ.get("STUB_LOAD_S", "0")))
+    return {"loaded_at": time.time(), "jobs": 0}
+
+
+def run_job(model, argv):
+    run_stub(build_parser().parse_args(argv), model=model)
+
+
+if __name__ == "__main__":
+    run_stub(build_parser().parse_args())
@@ -24,9 +24,7 @@ except ImportError:
     print("   Run: conda activate trellis2")
     sys.exit(1)
 
-def run_trellis_local(image_path, output_dir, seed=1):
-    os.makedirs(output_dir, exist_ok=True)
-    
+def load_pipeline():
     model_path = "models/TRELLIS.2-4B"
     if os.path.exists(model_path):
         print(f"Loading pipeline from local path: {model_path}...")
@@ -35,6 +33,13 @@ def run_trellis_local(image_path, output_dir, seed=1):
         print(f"Loading pipeline 'microsoft/TRELLIS.2-4B' from HF...")
         pipeline = Trellis2ImageTo3DPipeline.from_pretrained("microsoft/TRELLIS.2-4B")
     pipeline.cuda()
+    return pipeline
+
+def run_trellis_local(image_path, output_dir, seed=1, pipeline=None):
+    os.makedirs(output_dir, exist_ok=True)
+    
+    if pipeline is None:
+        pipeline = load_pipeline()
     
     print(f"Processing {image_path}...")
     image = Image.open(image_path)
@@ -79,11 +84,26 @@ def run_trellis_local(image_path, output_dir, seed=1):
     
     print("Done!")
 
-if __name__ == "__main__":
+def build_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", "-i", type=str, required=True, help="Input image path")
     parser.add_argument("--output", "-o", type=str, default="outputs/trellis_local", help="Output directory")
     parser.add_argument("--seed", type=int, default=1)
-    args = parser.parse_args()
+    return parser
+
+# --- Warm worker hooks (src/core/step_worker.py) ---
+def load_model():
+    return load_pipeline()
+
+def run_job(pipeline, argv):
+    args = build_parser().parse_args(argv)
+    try:
+        run_trellis_local(args.input, args.output, args.seed, pipeline=pipeline)
+    finally:
+        # Release per-job activations so the resident weights are all that stays on the GPU.
+        torch.cuda.empty_cache()
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
     
     run_trellis_local(args.input, args.output, args.seed)
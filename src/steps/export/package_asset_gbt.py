@@ -1,9 +1,15 @@
 
 import json
 import argparse
-import hashlib
 import time
 import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.hashing import file_digests, file_md5
 
 def generate_gbt_id(asset_type, year=2026, sequence=1):
     """
@@ -14,11 +20,8 @@ def generate_gbt_id(asset_type, year=2026, sequence=1):
     return f"{prefix}/CN.FILM.ASSET.{year}.{sequence:04d}"
 
 def compute_checksum(file_path):
-    hash_md5 = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+    # MD5 hex digest, served from the persistent checksum cache when the file is unchanged.
+    return file_md5(file_path)
 
 def package_asset(input_ply, output_json, local_id, tags=None):
     if tags is None:
@@ -27,13 +30,11 @@ def package_asset(input_ply, output_json, local_id, tags=None):
     gbt_id = generate_gbt_id("PROP", sequence=int(time.time()) % 10000) # Simple mock sequence
     
     file_stat = os.stat(input_ply)
-    checksum = compute_checksum(input_ply)
+    # MD5 + SHA-256 in one pass, cached across runs by (path, inode, size, mtime_ns).
+    checksums = file_digests(input_ply)
     
     display_format = f"https://doi.org/{gbt_id}"
     
-    file_stat = os.stat(input_ply)
-    checksum = compute_checksum(input_ply)
-    
     
     # --- PHASE 8 UPGRADE: Load Intelligent Decomposition Data ---
     # Look for the .json file generated by harvest_hero_assets.py
@@ -66,7 +67,8 @@ def package_asset(input_ply, output_json, local_id, tags=None):
             "referent_name": local_id,         # Title/Name
             "referent_identifier": [
                 {"type": "LocalID", "value": local_id},
-                {"type": "MD5", "value": checksum}
+                {"type": "MD5", "value": checksums["md5"]},
+                {"type": "SHA256", "value": checksums["sha256"]}
             ]
         },
         "technical_metadata": {
@@ -1,57 +1,169 @@
-
+"""
+3DGS 场景光照估算
+Author: zhangxin
+功能：一次流式遍历高斯点云（memmap 按列分块，src/core/ply_io.py），同时得到
+      1) 环境光：不透明点 (sigmoid(opacity) > 0.5) 的 SH DC 均值（兼容旧版 ambient_light）；
+      2) SH 低阶光照：以 不透明度 × 尺度面积 加权的 DC 与 L1（band-1）矩，推导主光方向、
+         方向光颜色/强度与加权环境项，写入 lighting_probe.json 的 sh_lighting 字段；
+      3) 可选空间探针网格（--probe_grid N）：同一遍中按体素 bincount 累加，存为 .npz（src/core/light_probes.py）。
+输入：3DGS PLY（x/y/z、f_dc_0..2、opacity，可选 scale_0..2、f_rest_*）。
+输出：lighting_probe.json（schema_version 2），可选 lighting_probe_grid.npz。
+依赖：numpy（ASCII PLY 回退到 plyfile）。
+"""
 import numpy as np
-from plyfile import PlyData
 import argparse
 import json
 import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.ply_io import DEFAULT_CHUNK_ROWS, read_ply_header, iter_column_chunks, memmap_columns
+from src.core.light_probes import GRID_SAMPLE_ROWS, ProbeGrid, derive_sh_lighting
+
+PROBE_SCHEMA_VERSION = 2
+DC_COLUMNS = ["f_dc_0", "f_dc_1", "f_dc_2"]
+SCALE_COLUMNS = ["scale_0", "scale_1", "scale_2"]
+POSITION_COLUMNS = ["x", "y", "z"]
+# Log-scale clamp before exp(): keeps degenerate splats from overflowing the weights.
+LOG_SCALE_RANGE = (-20.0, 10.0)
 
 def sh2rgb(sh_coeffs):
-    # SH (l=0, m=0) is Ambient DC. 
+    # SH (l=0, m=0) is Ambient DC.
     # Constant factor for l=0 is 0.28209479177387814
     C0 = 0.28209479177387814
     return sh_coeffs * C0 + 0.5
 
-def estimate_lighting_from_gs(ply_path, output_json):
+def vertex_properties(ply_path):
+    element = read_ply_header(ply_path).element("vertex")
+    return element.property_names() if element is not None else []
+
+
+def band1_columns(properties):
+    """f_rest columns holding the band-1 SH coefficients, as [channel][m] names, or None.
+
+    3DGS stores f_rest channel-major: f_rest_{c * K + k}, K = (degree + 1)^2 - 1.
+    """
+    n_rest = sum(1 for name in properties if name.startswith("f_rest_"))
+    per_channel = n_rest // 3
+    if per_channel < 3:
+        return None
+    return [[f"f_rest_{c * per_channel + k}" for k in range(3)] for c in range(3)]
+
+
+def iter_splat_columns(ply_path, columns, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield {column: array} blocks of the vertex element.
+
+    Binary PLYs are memory-mapped and only `columns` are copied, chunk by chunk; ASCII
+    files have no fixed row layout and are parsed whole with plyfile.
+    """
+    header = read_ply_header(ply_path)
+    if header.is_binary:
+        yield from iter_column_chunks(header, columns, "vertex", chunk_rows)
+        return
+    from plyfile import PlyData
+    v = PlyData.read(ply_path)['vertex']
+    yield {column: np.asarray(v[column]) for column in columns}
+
+
+def splat_weights(chunk):
+    """sigmoid(opacity) x footprint area (exp of twice the mean log scale), float64."""
+    opacity = 1 / (1 + np.exp(-chunk['opacity'].astype(np.float64)))
+    if SCALE_COLUMNS[0] not in chunk:
+        return opacity
+    log_radius = (chunk['scale_0'] + chunk['scale_1'] + chunk['scale_2']).astype(np.float64) / 3.0
+    return opacity * np.exp(2.0 * np.clip(log_radius, *LOG_SCALE_RANGE))
+
+
+def sample_positions(ply_path, rows=GRID_SAMPLE_ROWS):
+    """Evenly strided sample of splat positions, used only to place the probe grid."""
+    header = read_ply_header(ply_path)
+    if header.is_binary:
+        data = memmap_columns(header, POSITION_COLUMNS)
+        index = np.unique(np.linspace(0, len(data) - 1, min(rows, len(data))).astype(np.int64))
+        sample = data[index]
+        return np.stack([sample[name] for name in POSITION_COLUMNS], axis=1).astype(np.float64)
+    chunk = next(iter_splat_columns(ply_path, POSITION_COLUMNS))
+    return np.stack([chunk[name] for name in POSITION_COLUMNS], axis=1).astype(np.float64)
+
+
+def grid_path_for(output_json):
+    return os.path.splitext(output_json)[0] + "_grid.npz"
+
+
+def estimate_lighting_from_gs(ply_path, output_json, chunk_rows=DEFAULT_CHUNK_ROWS, probe_grid=0):
     print(f"Loading 3DGS from {ply_path}...")
-    plydata = PlyData.read(ply_path)
-    v = plydata['vertex']
-    
-    # Extract Opacity to use as weight (sigmoid)
-    opacities = 1 / (1 + np.exp(-v['opacity']))
-    
-    # Extract f_dc (0-th band SH)
-    f_dc_0 = v['f_dc_0']
-    f_dc_1 = v['f_dc_1']
-    f_dc_2 = v['f_dc_2']
-    
-    # Valid mask (remove transparent junk)
-    mask = opacities > 0.5
-    
-    print(f"Analyzing {np.sum(mask)} valid splats...")
-    
-    # Weighted Average of DC components
+
+    properties = vertex_properties(ply_path)
+    band1 = band1_columns(properties)
+    columns = ["opacity"] + DC_COLUMNS
+    if all(name in properties for name in SCALE_COLUMNS):
+        columns += SCALE_COLUMNS
+    if band1 is not None:
+        columns += [name for row in band1 for name in row]
+    grid = None
+    if probe_grid > 0:
+        grid = ProbeGrid.from_positions(sample_positions(ply_path), probe_grid, with_l1=band1 is not None)
+        columns += POSITION_COLUMNS
+
+    # One linear pass; f_rest beyond band 1 is never copied (positions only for the probe grid).
+    valid = 0
+    dc_sum = np.zeros(3, dtype=np.float64)
+    total_weight, weighted_dc = 0.0, np.zeros(3, dtype=np.float64)
+    weighted_l1 = np.zeros((3, 3), dtype=np.float64) if band1 is not None else None
+    splats = 0
+    for chunk in iter_splat_columns(ply_path, columns, chunk_rows):
+        splats += len(chunk['opacity'])
+        # Extract Opacity to use as weight (sigmoid)
+        opacities = 1 / (1 + np.exp(-chunk['opacity']))
+
+        # Valid mask (remove transparent junk)
+        mask = opacities > 0.5
+        valid += int(np.count_nonzero(mask))
+
+        # Extract f_dc (0-th band SH)
+        dc = np.stack([chunk[name] for name in DC_COLUMNS], axis=1)
+        dc_sum += dc[mask].sum(axis=0, dtype=np.float64)
+
+        # Opacity/scale-weighted DC and band-1 moments
+        weights = splat_weights(chunk)
+        total_weight += float(weights.sum())
+        weighted_dc += weights @ dc
+        l1 = None
+        if weighted_l1 is not None:
+            # (N, channel, m)
+            l1 = np.stack([np.stack([chunk[name] for name in row], axis=1) for row in band1], axis=1)
+            weighted_l1 += np.einsum("n,ncm->cm", weights, l1)
+        if grid is not None:
+            grid.add(np.stack([chunk[name] for name in POSITION_COLUMNS], axis=1), weights, dc, l1)
+
+    print(f"Analyzing {valid} valid splats...")
+    if valid == 0:
+        print("⚠️ 没有不透明度 > 0.5 的高斯点，环境光回退为中性灰。")
+
+    # Average of DC components
     # This gives us the "Average Color" of the scene
-    avg_dc_0 = np.mean(f_dc_0[mask])
-    avg_dc_1 = np.mean(f_dc_1[mask])
-    avg_dc_2 = np.mean(f_dc_2[mask])
-    
-    ambient_rgb = sh2rgb(np.array([avg_dc_0, avg_dc_1, avg_dc_2]))
-    
+    avg_dc = dc_sum / max(valid, 1)
+
+    ambient_rgb = sh2rgb(avg_dc)
+
     # Normalize to 0-1
     ambient_rgb = np.clip(ambient_rgb, 0, 1)
-    
-    # Directional analysis (1st band SH) ???
-    # Standard 3DGS PLY usually stores f_rest for higher bands.
-    # If present, we can estimate dominant direction.
-    # f_rest_0..2 (Y, Z, X bases usually) per channel.
-    # This is complex because SH is view-dependent.
-    # But statistical SH direction can hint at "brightest direction".
-    
-    # For now, let's just output Ambient Color.
     print(f"Estimated Scene Ambient: RGB{ambient_rgb}")
-    
+
+    # Directional analysis (1st band SH): statistical SH direction hints at the brightest direction.
+    sh_lighting = derive_sh_lighting(total_weight, weighted_dc, weighted_l1, splats)
+    if sh_lighting["dominant_direction"] is not None:
+        print(f"Dominant light direction: {np.round(sh_lighting['dominant_direction'], 3)}, "
+              f"intensity {sh_lighting['directional_intensity']:.4f}")
+    elif band1 is None:
+        print("PLY has no band-1 SH (f_rest); directional term skipped.")
+
     # Pack result
     light_data = {
+        "schema_version": PROBE_SCHEMA_VERSION,
         "source_ply": ply_path,
         "ambient_light": {
             "r": float(ambient_rgb[0]),
@@ -59,17 +171,33 @@ def estimate_lighting_from_gs(ply_path, output_json):
             "b": float(ambient_rgb[2])
         },
         "intensity": float(np.mean(ambient_rgb)),
-        "note": "Derived from 3DGS SH_DC average"
+        "sh_lighting": sh_lighting,
+        "note": "Derived from 3DGS SH_DC average; sh_lighting from weighted DC + band-1 SH moments"
     }
-    
+
+    if grid is not None:
+        grid_path = grid_path_for(output_json)
+        grid.save(grid_path)
+        light_data["probe_grid"] = {
+            "path": os.path.basename(grid_path),
+            "dims": [int(v) for v in grid.dims],
+            "origin": [float(v) for v in grid.origin],
+            "voxel_size": [float(v) for v in grid.voxel_size],
+            "occupied": grid.occupied(),
+        }
+        print(f"Saved {light_data['probe_grid']['dims']} probe grid ({grid.occupied()} occupied) to {grid_path}")
+
     with open(output_json, 'w') as f:
         json.dump(light_data, f, indent=4)
     print(f"Saved lighting estimation to {output_json}")
+    return light_data
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", required=True)
     parser.add_argument("--output", required=True)
+    parser.add_argument("--chunk_rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Splats aggregated per step (bounds peak memory)")
+    parser.add_argument("--probe_grid", type=int, default=0, help="Also build a spatial SH probe grid with this many voxels along the longest axis (0 = off)")
     args = parser.parse_args()
-    
-    estimate_lighting_from_gs(args.input, args.output)
+
+    estimate_lighting_from_gs(args.input, args.output, chunk_rows=args.chunk_rows, probe_grid=args.probe_grid)
@@ -161,6 +161,13 @@ HTML_TEMPLATE = """
             transition: 0.2s;
         }}
         .btn:hover {{ background: #4f46e5; filter: brightness(1.1); }}
+
+        .resource-table {{ width: 100%; border-collapse: collapse; font-size: 0.85rem; background: var(--card-bg); border-radius: 1rem; overflow: hidden; }}
+        .resource-table th, .resource-table td {{ padding: 0.6rem 1rem; text-align: right; border-bottom: 1px solid var(--card-border); }}
+        .resource-table th {{ color: var(--text-secondary); font-weight: 500; background: rgba(255, 255, 255, 0.03); }}
+        .resource-table td:first-child, .resource-table th:first-child,
+        .resource-table td:nth-child(2), .resource-table th:nth-child(2) {{ text-align: left; font-family: 'JetBrains Mono', monospace; }}
+        .resource-table tr.total td {{ color: var(--accent); font-weight: 600; }}
         
     </style>
 </head>
@@ -200,6 +207,11 @@ HTML_TEMPLATE = """
         </div>
     </div>
     
+    <div class="section">
+        <div class="section-title">步骤资源占用 (Resource Usage)</div>
+        {resource_table}
+    </div>
+
     <div style="margin-top: 4rem; text-align: center; color: var(--text-secondary); font-size: 0.8rem; border-top: 1px solid var(--card-border); padding-top: 2rem;">
         &copy; 2026 Movie Assetization Pipeline Project. Author: zhangxin. 严格遵循 GB/T 36369 标准。
     </div>
@@ -303,6 +315,9 @@ def _get_execution_result(asset_info):
         return res
     if status == "failed":
         return f"执行中断。错误信息: {asset_info.get('error_message', '未知错误')}。"
+    if status == "linked":
+        link = asset_info.get("linked_to") or {}
+        return f"跨帧去重：与 {link.get('session_id', '-')}/{link.get('asset_id', '-')} 为同一道具，复用其 3D 资产，未重复生成。"
     return "状态未知。"
 
 def _get_advice(asset_info):
@@ -317,9 +332,52 @@ def _get_advice(asset_info):
     
     if status == "failed":
         return "请检查输入切片的分辨率和遮罩完整性，或尝试切换生成后端（如从 TRELLIS 切换到 SAM3D）。"
+
+    if status == "linked":
+        return "如该裁剪实为不同道具，可关闭 --dedup_props 后重新生成。"
     
     return "继续观察管线后续步骤。"
 
+def _fmt(value, digits=1):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+def _build_resource_table(assets):
+    """Per-step per-asset rows plus a per-step summary (count, total time, worst peak RSS)."""
+    rows = ""
+    per_step = {}
+    for asset_info in assets:
+        for step_id, res in (asset_info.get("step_resources") or {}).items():
+            cpu = None
+            if res.get("cpu_user_s") is not None:
+                cpu = res.get("cpu_user_s", 0.0) + res.get("cpu_sys_s", 0.0)
+            rows += (
+                f"<tr><td>{step_id}</td><td>{asset_info.get('asset_id', 'unknown')}</td>"
+                f"<td>{res.get('source', '-')}</td><td>{_fmt(res.get('duration_s'), 2)}</td>"
+                f"<td>{_fmt(cpu, 2)}</td><td>{_fmt(res.get('peak_rss_mb'), 0)}</td>"
+                f"<td>{_fmt(res.get('io_read_mb'))} / {_fmt(res.get('io_write_mb'))}</td>"
+                f"<td>{_fmt(res.get('gpu_mem_peak_mb'), 0)}</td></tr>"
+            )
+            summary = per_step.setdefault(step_id, {"count": 0, "duration_s": 0.0, "peak_rss_mb": None})
+            summary["count"] += 1
+            summary["duration_s"] += res.get("duration_s") or 0.0
+            if res.get("peak_rss_mb") is not None:
+                summary["peak_rss_mb"] = max(summary["peak_rss_mb"] or 0.0, res["peak_rss_mb"])
+
+    if not rows:
+        return "<p style='color:#64748b; font-style:italic;'>清单中没有步骤资源采样记录。</p>"
+
+    for step_id, summary in sorted(per_step.items(), key=lambda item: -item[1]["duration_s"]):
+        rows += (
+            f"<tr class='total'><td>{step_id}</td><td>合计 ×{summary['count']}</td><td></td>"
+            f"<td>{_fmt(summary['duration_s'], 2)}</td><td></td><td>{_fmt(summary['peak_rss_mb'], 0)}</td>"
+            f"<td></td><td></td></tr>"
+        )
+    header = (
+        "<tr><th>步骤</th><th>资产</th><th>来源</th><th>耗时 (s)</th><th>CPU (s)</th>"
+        "<th>峰值内存 (MB)</th><th>读 / 写 (MB)</th><th>峰值显存 (MB)</th></tr>"
+    )
+    return f"<table class='resource-table'>{header}{rows}</table>"
+
 def generate_report(output_dir):
     session_id = os.path.basename(output_dir)
     manifest_path = os.path.join(output_dir, "manifest.json")
@@ -364,7 +422,7 @@ def generate_report(output_dir):
         
         # Status labels
         status_class = "success" if status == "success" else "failed" if status == "failed" else "warning"
-        status_text = "成功 (Standardized)" if status == "success" else "失败 (Failed)" if status == "failed" else "处理中"
+        status_text = {"success": "成功 (Standardized)", "failed": "失败 (Failed)", "linked": "已关联 (Linked)"}.get(status, "处理中")
         
         dcc_ok = import_check.get("import_ok")
         if dcc_ok is True: dcc_status = '<span style="color:var(--success)">✅ 通过</span>'
@@ -399,7 +457,8 @@ def generate_report(output_dir):
         amb_g=amb_g,
         amb_b=amb_b,
         light_json=light_json_str,
-        asset_cards=asset_cards
+        asset_cards=asset_cards,
+        resource_table=_build_resource_table(manifest_data.get("assets", []))
     )
 
     report_path = os.path.join(output_dir, "report.html")
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Make `src.*` and `pipeline_runner` importable when pytest is launched from anywhere.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Keep the persistent checksum cache (src/core/hashing.py) out of the user's home during tests.
+os.environ.setdefault("PIPELINE_CHECKSUM_CACHE", os.path.join(tempfile.mkdtemp(prefix="checksums-"), "checksums.sqlite3"))
@@ -0,0 +1,76 @@
+"""
+Stand-in for `blender -b -P <script> -- <args>` used by the import-check tests.
+
+Injects a minimal fake `bpy` module (GLB import reads vertex/face counts from the
+glTF JSON chunk) and runs the script with runpy, printing Blender-like log noise.
+Each process start is appended to $FAKE_BLENDER_LOG when that variable is set.
+"""
+import os
+import sys
+import json
+import types
+import struct
+import runpy
+
+
+def write_test_glb(path, vertices=3, faces=1):
+    """Write a GLB whose JSON chunk declares one mesh with the given counts."""
+    gltf = {
+        "asset": {"version": "2.0"},
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": 1}]}],
+        "accessors": [
+            {"componentType": 5126, "count": vertices, "type": "VEC3"},
+            {"componentType": 5125, "count": faces * 3, "type": "SCALAR"},
+        ],
+    }
+    chunk = json.dumps(gltf).encode("utf-8")
+    chunk += b" " * (-len(chunk) % 4)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sII", b"glTF", 2, 12 + 8 + len(chunk)))
+        f.write(struct.pack("<I4s", len(chunk), b"JSON"))
+        f.write(chunk)
+
+
+class _Objects(list):
+    def remove(self, obj, do_unlink=True):
+        list.remove(self, obj)
+
+
+def _make_bpy():
+    data = types.SimpleNamespace(objects=_Objects())
+
+    def read_factory_settings(use_empty=True):
+        data.objects.clear()
+
+    def gltf(filepath):
+        with open(filepath, "rb") as f:
+            magic, _, _ = struct.unpack("<4sII", f.read(12))
+            if magic != b"glTF":
+                raise RuntimeError("Bad glTF: file header is not glTF")
+            length, _ = struct.unpack("<I4s", f.read(8))
+            doc = json.loads(f.read(length))
+        print(f"glTF import: {filepath}")
+        for mesh in doc.get("meshes", []):
+            for primitive in mesh.get("primitives", []):
+                vertices = doc["accessors"][primitive["attributes"]["POSITION"]]["count"]
+                indices = doc["accessors"][primitive["indices"]]["count"] if "indices" in primitive else vertices
+                mesh_data = types.SimpleNamespace(vertices=[None] * vertices, polygons=[None] * (indices // 3))
+                data.objects.append(types.SimpleNamespace(type="MESH", data=mesh_data, material_slots=[]))
+
+    ops = types.SimpleNamespace(
+        wm=types.SimpleNamespace(read_factory_settings=read_factory_settings),
+        import_scene=types.SimpleNamespace(gltf=gltf),
+    )
+    return types.SimpleNamespace(data=data, ops=ops)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    script = argv[argv.index("-P") + 1]
+    if os.environ.get("FAKE_BLENDER_LOG"):
+        with open(os.environ["FAKE_BLENDER_LOG"], "a") as f:
+            f.write(f"{os.getpid()}\n")
+    print("Blender 4.2.0 (fake)", flush=True)
+    sys.modules["bpy"] = _make_bpy()
+    sys.argv = ["blender"] + argv
+    runpy.run_path(script, run_name="__main__")
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "assets"))
+import harvest_hero_assets  # noqa: E402
+
+
+def _wheels(shape=(1800, 2400)):
+    img = np.full((*shape, 4), (90, 110, 100, 255), np.uint8)
+    for cx in (700, 1700):
+        cv2.circle(img, (cx, 1000), 300, (20, 20, 20, 255), 40)
+    return img
+
+
+def test_circles_are_reported_in_crop_coordinates():
+    result = harvest_hero_assets.analyze_articulation("cart.png", None, image=_wheels())
+    assert result["type"] == "articulated" and result["circle_count"] >= 2
+    centers = np.array([c["center"] for c in result["circles"]])
+    for cx in (700, 1700):
+        assert np.min(np.hypot(centers[:, 0] - cx, centers[:, 1] - 1000)) < 25
+    assert all(240 <= c["radius"] <= 360 for c in result["circles"])
+
+
+def test_edgeless_crop_exits_before_hough(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("HoughCircles should not run")
+
+    monkeypatch.setattr(harvest_hero_assets.cv2, "HoughCircles", fail)
+    flat = np.full((800, 800, 4), 128, np.uint8)
+    result = harvest_hero_assets.analyze_articulation("flat.png", None, image=flat)
+    assert result == {"type": "static", "confidence": 0.99, "circle_count": 0, "circles": []}
@@ -0,0 +1,93 @@
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from src.core.asset_validator import validate_asset
+from src.core.ply_io import read_ply_header, memmap_element
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "assets"))
+from run_stub_backend import write_stub_ply, GS_PROPERTIES  # noqa: E402
+
+
+def _write_glb(path, positions, indices, interleave_pad=0):
+    """GLB with POSITION (optionally strided) and uint32 indices in the BIN chunk."""
+    positions = np.asarray(positions, dtype="<f4")
+    stride = 12 + interleave_pad
+    vertex_bytes = b"".join(row.tobytes() + b"\0" * interleave_pad for row in positions)
+    index_bytes = np.asarray(indices, dtype="<u4").tobytes()
+    bin_chunk = vertex_bytes + index_bytes
+    gltf = {
+        "asset": {"version": "2.0"},
+        "buffers": [{"byteLength": len(bin_chunk)}],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": len(vertex_bytes), "byteStride": stride},
+            {"buffer": 0, "byteOffset": len(vertex_bytes), "byteLength": len(index_bytes)},
+        ],
+        "accessors": [
+            {"bufferView": 0, "componentType": 5126, "count": len(positions), "type": "VEC3"},
+            {"bufferView": 1, "componentType": 5125, "count": len(indices), "type": "SCALAR"},
+        ],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": 1}]}],
+    }
+    json_chunk = json.dumps(gltf).encode("utf-8")
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    bin_chunk += b"\0" * (-len(bin_chunk) % 4)
+    total = 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sII", b"glTF", 2, total))
+        f.write(struct.pack("<I4s", len(json_chunk), b"JSON") + json_chunk)
+        f.write(struct.pack("<I4s", len(bin_chunk), b"BIN\0") + bin_chunk)
+
+
+QUAD = [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]]
+
+
+def test_glb_counts_nan_and_truncation(tmp_path):
+    good = tmp_path / "good.glb"
+    _write_glb(good, QUAD, [0, 1, 2, 0, 2, 3], interleave_pad=4)
+    report = validate_asset(str(good))
+    assert report["ok"], report["errors"]
+    assert report["stats"]["vertices"] == 4 and report["stats"]["faces"] == 2
+
+    nan = tmp_path / "nan.glb"
+    _write_glb(nan, QUAD[:3] + [[0, float("nan"), float("inf")]], [0, 1, 2, 0, 2, 3], interleave_pad=4)
+    report = validate_asset(str(nan))
+    assert not report["ok"] and report["nonfinite_values"] == 2
+
+    truncated = tmp_path / "truncated.glb"
+    truncated.write_bytes(good.read_bytes()[:-10])
+    report = validate_asset(str(truncated))
+    assert not report["ok"] and report["truncated"] and "truncated" in report["errors"]
+
+    assert validate_asset(str(tmp_path / "missing.glb"))["errors"] == ["missing_file"]
+
+
+def test_splat_ply_header_memmap_and_damage(tmp_path):
+    ply = tmp_path / "splat.ply"
+    write_stub_ply(str(ply), 16)
+    header = read_ply_header(str(ply))
+    vertex = memmap_element(header, "vertex")
+    assert header.element("vertex").property_names() == GS_PROPERTIES
+    assert vertex.shape == (16,) and np.isfinite(vertex["opacity"]).all()
+
+    report = validate_asset(str(ply))
+    assert report["ok"] and report["stats"]["kind"] == "3dgs" and report["stats"]["splats"] == 16
+
+    data = bytearray(ply.read_bytes())
+    struct.pack_into("<f", data, header.data_offset + 4, float("nan"))
+    nan_ply = tmp_path / "nan.ply"
+    nan_ply.write_bytes(bytes(data))
+    assert validate_asset(str(nan_ply))["nonfinite_values"] == 1
+
+    truncated = tmp_path / "truncated.ply"
+    truncated.write_bytes(bytes(data[:-30]))
+    report = validate_asset(str(truncated))
+    assert report["truncated"] and not report["ok"]
+
+    bad = tmp_path / "bad.ply"
+    bad.write_bytes(b"ply\nformat binary_little_endian 1.0\nelement vertex 3\n")
+    assert not validate_asset(str(bad))["ok"]
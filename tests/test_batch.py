@@ -0,0 +1,43 @@
+import json
+import os
+import shutil
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAME = os.path.join(PROJECT_ROOT, "tests", "data", "temp_inspect.png")
+
+
+def test_batch_writes_summary_and_resumes(tmp_path):
+    pytest.importorskip("cv2")
+    import pipeline_runner
+    from src.pipelines.dag import ResourceSlots
+
+    frames_dir = tmp_path / "frames"
+    frames_dir.mkdir()
+    for name in ("shot_0001.png", "shot_0002.png"):
+        shutil.copyfile(FRAME, frames_dir / name)
+    (frames_dir / "notes.txt").write_text("not a frame")
+
+    args = pipeline_runner.build_arg_parser().parse_args([
+        "--input-dir", str(frames_dir),
+        "--output_root", str(tmp_path / "out"),
+        "--skip_scene", "--asset_gen_backend", "stub", "--asset_type", "prop",
+        "--max_sessions", "2",
+    ])
+    inputs = pipeline_runner.collect_batch_inputs(args)
+    assert [os.path.basename(p) for p in inputs] == ["shot_0001.png", "shot_0002.png"]
+
+    runner = pipeline_runner.build_runner(args)
+    slots = ResourceSlots({"gpu": 1, "cpu": 2})
+    first = pipeline_runner.run_batch(args, inputs, runner, slots)
+
+    assert first["counts"] == {"total": 2, "completed": 2, "skipped": 0, "failed": 0}
+    assert first["step_totals"]["asset_gen"]["count"] >= 2
+    with open(tmp_path / "out" / "batch_manifest.json", encoding="utf-8") as f:
+        assert json.load(f)["counts"]["completed"] == 2
+    for session in ("shot_0001", "shot_0002"):
+        assert (tmp_path / "out" / session / "manifest.json").exists()
+
+    second = pipeline_runner.run_batch(args, inputs, runner, slots)
+    assert second["counts"]["skipped"] == 2
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+from src.core.blender_validator import BlenderValidator
+from fake_blender import write_test_glb
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_BLENDER = [sys.executable, os.path.join(PROJECT_ROOT, "tests", "fake_blender.py")]
+CHECK_SCRIPT = os.path.join(PROJECT_ROOT, "scripts", "check_import.py")
+
+
+@pytest.fixture
+def start_log(tmp_path, monkeypatch):
+    path = tmp_path / "starts.log"
+    monkeypatch.setenv("FAKE_BLENDER_LOG", str(path))
+    return lambda: path.read_text().split() if path.exists() else []
+
+
+def test_one_blender_serves_all_checks(tmp_path, start_log):
+    good = tmp_path / "good.glb"
+    broken = tmp_path / "broken.glb"
+    write_test_glb(good, vertices=8, faces=12)
+    broken.write_bytes(b"PK\x03\x04 truncated zip, not a glb")
+
+    validator = BlenderValidator(FAKE_BLENDER, CHECK_SCRIPT)
+    try:
+        results = [validator.check(str(path)) for path in (good, broken, good)]
+    finally:
+        validator.close()
+
+    assert results[0] == {"import_ok": True, "stats": {"mesh_objects": 1, "vertices": 8, "faces": 12, "materials": 0}}
+    assert results[1]["import_ok"] is False and "glTF" in results[1]["error"]
+    assert results[2] == results[0]
+    assert len(start_log()) == 1
+
+
+def test_crashed_server_restarts_and_broken_server_falls_back(tmp_path, start_log):
+    import pipeline_runner
+
+    glb = tmp_path / "asset.glb"
+    write_test_glb(glb)
+
+    validator = BlenderValidator(FAKE_BLENDER, CHECK_SCRIPT)
+    try:
+        assert validator.check(str(glb))["import_ok"]
+        validator.process.kill()
+        validator.process.wait()
+        assert validator.check(str(glb))["import_ok"]
+    finally:
+        validator.close()
+    assert len(start_log()) == 2
+
+    # A server that never becomes ready is disabled; the one-shot path still works.
+    dead = BlenderValidator([sys.executable, "-c", "import sys; sys.exit(1)"], CHECK_SCRIPT)
+    result = pipeline_runner._run_glb_import_check(str(glb), validator=dead, blender_cmd=FAKE_BLENDER)
+    assert dead.disabled
+    assert result["import_ok"] and result["returncode"] == 0 and result["stats"]["vertices"] == 3
@@ -0,0 +1,149 @@
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from src.core.runner_utils import StepRunner
+from src.pipelines.dag import DagExecutor, ResourceSlots, StepGraph, STATUS_DONE, STATUS_FAILED, STATUS_SKIPPED
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def sleep_runner(tmp_path):
+    script = tmp_path / "sleep_step.py"
+    script.write_text("import sys, time\ntime.sleep(float(sys.argv[1]))\n")
+    return StepRunner({"sleep": str(script)})
+
+
+def _sleep_node(runner, seconds):
+    def _run():
+        result = runner.run("sleep", "sleep", [str(seconds)], sys.executable)
+        assert result.success
+    return _run
+
+
+def _overlaps(a, b):
+    return a.started_at < b.finished_at and b.started_at < a.finished_at
+
+
+def test_independent_nodes_run_concurrently(sleep_runner):
+    graph = StepGraph()
+    graph.add("geometry", _sleep_node(sleep_runner, 0.6), resource="gpu")
+    graph.add("lighting", _sleep_node(sleep_runner, 0.6), resource="cpu")
+    graph.add("report", _sleep_node(sleep_runner, 0), deps=["geometry", "lighting"], resource="cpu")
+
+    summary = DagExecutor(ResourceSlots({"gpu": 1, "cpu": 2})).run(graph)
+
+    assert all(node.status == STATUS_DONE for node in graph.nodes.values())
+    assert _overlaps(graph["geometry"], graph["lighting"])
+    assert graph["report"].started_at >= max(graph["geometry"].finished_at, graph["lighting"].finished_at)
+    assert summary.wall_time_s < summary.busy_time_s
+
+
+def test_resource_limit_serializes_gpu_nodes(sleep_runner):
+    graph = StepGraph()
+    for index in range(3):
+        graph.add(f"asset_gen:{index}", _sleep_node(sleep_runner, 0.2), resource="gpu")
+
+    DagExecutor(ResourceSlots({"gpu": 1, "cpu": 4})).run(graph)
+
+    nodes = list(graph.nodes.values())
+    assert not any(_overlaps(a, b) for i, a in enumerate(nodes) for b in nodes[i + 1:])
+
+
+def test_queued_gpu_nodes_do_not_hold_pool_threads():
+    # More gpu nodes than pool threads: the ready cpu finalize of asset 0 must start while
+    # the gpu queue is still draining instead of waiting behind threads parked on the gpu slot.
+    graph = StepGraph()
+    for index in range(6):
+        graph.add(f"asset_gen:{index}", lambda: time.sleep(0.1), resource="gpu")
+    graph.add("finalize:0", lambda: None, deps=["asset_gen:0"], resource="cpu")
+
+    DagExecutor(ResourceSlots({"gpu": 1, "cpu": 1}), max_threads=2).run(graph)
+
+    assert all(node.status == STATUS_DONE for node in graph.nodes.values())
+    assert graph["finalize:0"].finished_at < graph["asset_gen:2"].finished_at
+
+
+def test_slots_shared_with_another_session_are_waited_for():
+    slots = ResourceSlots({"gpu": 1})
+    assert slots.try_acquire("gpu") and not slots.try_acquire("gpu")
+    graph = StepGraph()
+    graph.add("asset_gen:0", lambda: None, resource="gpu")
+
+    releaser = threading.Timer(0.2, slots.release, args=("gpu",))
+    releaser.start()
+    DagExecutor(slots).run(graph)
+    releaser.join()
+
+    assert graph["asset_gen:0"].status == STATUS_DONE
+    assert graph["asset_gen:0"].started_at - graph["asset_gen:0"].ready_at >= 0.15
+    assert slots.try_acquire("gpu")
+
+
+def test_failure_skips_dependents_but_not_independent_branches():
+    def _boom():
+        raise RuntimeError("harvest step failed")
+
+    graph = StepGraph()
+    graph.add("harvest", _boom, resource="cpu")
+    graph.add("report", lambda: None, deps=["harvest"])
+    graph.add("geometry", lambda: "ok", resource="gpu")
+
+    summary = DagExecutor().run(graph)
+
+    assert graph["harvest"].status == STATUS_FAILED
+    assert graph["report"].status == STATUS_SKIPPED
+    assert graph["geometry"].status == STATUS_DONE and graph["geometry"].result == "ok"
+    assert [node.name for node in summary.failed()] == ["harvest"]
+
+
+def test_nodes_added_at_runtime_gate_existing_dependents():
+    graph = StepGraph()
+    order = []
+
+    def _expand():
+        for index in range(3):
+            graph.add(f"asset:{index}", lambda i=index: (time.sleep(0.05), order.append(f"asset:{i}")),
+                      deps=["harvest"], resource="cpu", dependents=["report"])
+
+    graph.add("harvest", _expand, resource="cpu")
+    graph.add("report", lambda: order.append("report"), deps=["harvest"])
+
+    DagExecutor().run(graph)
+
+    assert order[-1] == "report" and len(order) == 4
+
+
+def test_pipeline_session_with_stub_backend(tmp_path):
+    pytest.importorskip("cv2")
+    pytest.importorskip("numpy")
+    import pipeline_runner
+
+    input_path = os.path.join(PROJECT_ROOT, "tests", "data", "temp_inspect.png")
+    args = pipeline_runner.build_arg_parser().parse_args([
+        "--input", input_path,
+        "--output_root", str(tmp_path / "out"),
+        "--skip_scene", "--asset_gen_backend", "stub", "--asset_type", "prop", "--no-cache",
+    ])
+    runner = pipeline_runner.build_runner(args)
+    ctx, summary = pipeline_runner.run_session(args, input_path, runner, ResourceSlots({"gpu": 1, "cpu": 2}))
+
+    assert not summary.failed()
+    with open(os.path.join(ctx.output_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    assets = manifest["assets"]
+    assert assets[0]["asset_id"] == "scene_001"
+    props = [asset for asset in assets if asset["asset_type"] == "prop"]
+    assert props and all(asset["status"] == "success" for asset in props)
+    assert all(asset["step_resources"]["asset_gen"]["peak_rss_mb"] > 0 for asset in props)
+    assert "harvest" in assets[0]["step_resources"]
+    with open(os.path.join(ctx.output_dir, "report.html"), encoding="utf-8") as f:
+        assert "resource-table" in f.read()
+    with open(os.path.join(ctx.output_dir, "trace.json"), encoding="utf-8") as f:
+        names = {event["name"] for event in json.load(f)["traceEvents"]}
+    assert {"harvest", "report", "routing", "validation", "extraction"} <= names
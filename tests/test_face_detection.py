@@ -0,0 +1,75 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+from src.metrics.face_detection import FaceDetectionCache, detect_faces_downscaled
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "assets"))
+import harvest_hero_assets  # noqa: E402
+
+
+class RecordingCascade:
+    """Stands in for cv2.CascadeClassifier: one face at a fixed spot of the image it sees."""
+
+    def __init__(self):
+        self.shapes = []
+
+    def detectMultiScale(self, gray, scale_factor, min_neighbors):
+        self.shapes.append(gray.shape)
+        h, w = gray.shape[:2]
+        return np.array([[w // 4, h // 4, w // 10, h // 10]])
+
+
+def test_detection_runs_downscaled_and_maps_boxes_back():
+    cascade = RecordingCascade()
+    faces = detect_faces_downscaled(np.zeros((2160, 3840), np.uint8), cascade, max_side=1280)
+    assert cascade.shapes == [(720, 1280)]
+    assert faces.tolist() == [[960, 540, 384, 216]]
+
+    small = detect_faces_downscaled(np.zeros((480, 640), np.uint8), cascade, max_side=1280)
+    assert cascade.shapes[-1] == (480, 640) and small.tolist() == [[160, 120, 64, 48]]
+
+
+def test_cache_is_keyed_by_frame_content_and_shared_on_disk(tmp_path):
+    frame = np.random.default_rng(0).integers(0, 255, (300, 400, 3), dtype=np.uint8)
+    cascade = RecordingCascade()
+    first = FaceDetectionCache(str(tmp_path)).detect(frame, cascade)
+    # A fresh cache (e.g. another worker process or a later run) reads the stored entry.
+    again = FaceDetectionCache(str(tmp_path))
+    assert again.detect(frame.copy(), cascade).tolist() == first.tolist()
+    assert len(cascade.shapes) == 1 and again.hits == 1
+
+    again.detect(frame[::-1].copy(), cascade)
+    assert len(cascade.shapes) == 2 and again.misses == 1
+
+
+def test_roi_hint_rerun_skips_face_detection(tmp_path):
+    img = cv2.imread(os.path.join(PROJECT_ROOT, "tests", "data", "temp_inspect.png"))
+    cache_dir = str(tmp_path / "faces")
+    harvest_hero_assets.segment_frame(img, str(tmp_path / "a"), face_cache_dir=cache_dir)
+    harvest_hero_assets.segment_frame(img, str(tmp_path / "b"), roi_hint="50,50,400,400", face_cache_dir=cache_dir)
+    cache = harvest_hero_assets.get_face_cache(cache_dir)
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+def test_disk_cache_is_capped_least_recently_used_first(tmp_path):
+    cascade = RecordingCascade()
+    frames = [np.full((40, 40), i, np.uint8) for i in range(6)]
+    cache = FaceDetectionCache(str(tmp_path), max_entries=4)
+    for i, frame in enumerate(frames):
+        cache.detect(frame, cascade)
+        path = cache._path(cache.key(frame))
+        os.utime(path, (i, i))
+    # Frame 0 is read back (its mtime refreshed) before the cap is enforced.
+    FaceDetectionCache(str(tmp_path)).detect(frames[0], cascade)
+    assert cache.prune() == 3
+
+    kept = FaceDetectionCache(str(tmp_path), max_entries=4)
+    for frame in (frames[0], frames[4], frames[5]):
+        kept.detect(frame, cascade)
+    assert kept.hits == 3
+    kept.detect(frames[1], cascade)
+    assert kept.misses == 1
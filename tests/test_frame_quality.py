@@ -0,0 +1,42 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+from src.metrics.frame_quality import estimate_noise, index_directory, score_frame, select_top_k
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENE = cv2.imread(os.path.join(PROJECT_ROOT, "tests", "data", "temp_inspect.png"))
+OTHER_SCENE = np.full((500, 500, 3), (150, 60, 140), np.uint8)
+cv2.rectangle(OTHER_SCENE, (100, 50), (400, 300), (20, 200, 200), -1)
+
+
+def test_metrics_track_blur_clipping_and_noise():
+    sharp, _ = score_frame(SCENE, detect_subject=False)
+    blurred, _ = score_frame(cv2.GaussianBlur(SCENE, (0, 0), 3), detect_subject=False)
+    clipped, _ = score_frame(np.where(np.arange(500)[None, :, None] < 250, 255, SCENE).astype(np.uint8), detect_subject=False)
+    assert blurred["sharpness"] < sharp["sharpness"] and blurred["score"] < sharp["score"]
+    assert sharp["clipped_ratio"] < 0.01 and abs(clipped["overexposed_ratio"] - 0.5) < 0.02
+
+    flat = np.full((200, 200), 128, np.uint8)
+    noisy = (flat + np.random.default_rng(2).normal(0, 5, flat.shape)).clip(0, 255).astype(np.uint8)
+    assert estimate_noise(flat) == 0.0 and abs(estimate_noise(noisy) - 5.0) < 0.5
+
+
+def test_directory_index_and_top_k_per_shot(tmp_path):
+    frames = [
+        cv2.GaussianBlur(SCENE, (0, 0), 2), SCENE, cv2.GaussianBlur(SCENE, (0, 0), 4),
+        OTHER_SCENE, cv2.GaussianBlur(OTHER_SCENE, (0, 0), 3),
+    ]
+    for i, frame in enumerate(frames):
+        cv2.imwrite(str(tmp_path / f"{i:04d}.png"), frame)
+
+    records, index = index_directory(str(tmp_path), workers=3)
+    assert [r["shot"] for r in records] == [0, 0, 0, 1, 1]
+    assert index["shot_count"] == 2 and index["ranked"][0]["rank"] == 1
+    with open(tmp_path / "frame_quality_index.json") as f:
+        assert len(json.load(f)["ranked"]) == 5
+
+    best = [os.path.basename(r["path"]) for r in select_top_k(records, 1)]
+    assert best == ["0001.png", "0003.png"]
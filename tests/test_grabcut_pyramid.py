@@ -0,0 +1,39 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "assets"))
+from harvest_hero_assets import segment_prop  # noqa: E402
+
+
+def _synthetic_frame(h=480, w=720):
+    rng = np.random.default_rng(0)
+    img = (rng.normal(0, 10, (h, w, 3)) + np.array([60, 110, 90])).clip(0, 255).astype(np.uint8)
+    cv2.ellipse(img, (330, 240), (180, 120), 15, 0, 360, (30, 40, 200), -1)
+    cv2.rectangle(img, (420, 150), (570, 330), (200, 180, 40), -1)
+    rect = (w // 10, h // 20, int(w * 0.8), int(h * 0.9))
+    return img, rect
+
+
+def test_pyramid_mask_matches_full_resolution():
+    img, rect = _synthetic_frame()
+    full = segment_prop(img, rect, working_resolution=0).astype(bool)
+    pyramid = segment_prop(img, rect, working_resolution=240).astype(bool)
+
+    assert pyramid.shape == full.shape and full.any()
+    iou = np.count_nonzero(full & pyramid) / np.count_nonzero(full | pyramid)
+    assert iou > 0.98
+    # Nothing may leak outside the ROI.
+    x, y, w, h = rect
+    outside = pyramid.copy()
+    outside[y:y + h, x:x + w] = False
+    assert not outside.any()
+
+
+def test_small_frames_keep_full_resolution_path():
+    img, rect = _synthetic_frame()
+    full = segment_prop(img, rect, working_resolution=0)
+    assert np.array_equal(segment_prop(img, rect, working_resolution=720), full)
@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "assets"))
+import harvest_hero_assets  # noqa: E402
+
+
+def _write_frame(path, shift=0):
+    rng = np.random.default_rng(shift)
+    img = (rng.normal(0, 10, (240, 360, 3)) + np.array([60, 110, 90])).clip(0, 255).astype(np.uint8)
+    cv2.ellipse(img, (170 + shift, 120), (90, 60), 0, 0, 360, (30, 40, 200), -1)
+    cv2.imwrite(str(path), img)
+    return str(path)
+
+
+def test_batch_writes_per_frame_and_consolidated_manifests(tmp_path, monkeypatch):
+    frames = [_write_frame(tmp_path / f"frame_{i}.png", shift=10 * i) for i in range(3)]
+    # Same stem in another directory must not overwrite the first frame's outputs.
+    os.makedirs(tmp_path / "other")
+    frames.append(_write_frame(tmp_path / "other" / "frame_0.png"))
+    missing = str(tmp_path / "missing.png")
+
+    loads = []
+    real_cascade = cv2.CascadeClassifier
+    monkeypatch.setattr(harvest_hero_assets, "_FACE_CASCADE", None)
+    monkeypatch.setattr(harvest_hero_assets.cv2, "CascadeClassifier",
+                        lambda path: loads.append(path) or real_cascade(path))
+
+    out = tmp_path / "props"
+    consolidated, failures = harvest_hero_assets.harvest_batch(frames + [missing], str(out), workers=1)
+
+    assert len(loads) == 1
+    assert [f["source_image"] for f in failures] == [missing]
+    assert sorted(os.listdir(out)) == ["frame_0", "frame_0_2", "frame_1", "frame_2", "harvest_manifest.json"]
+    with open(out / "harvest_manifest.json") as f:
+        assert json.load(f) == consolidated
+    assert {item["source_image"] for item in consolidated} == set(frames)
+    for item in consolidated:
+        with open(item["frame_manifest"]) as f:
+            frame_items = json.load(f)
+        assert item["id"] in {entry["id"] for entry in frame_items}
+        assert os.path.exists(item["path"])
+
+
+def test_batch_process_pool(tmp_path):
+    frames = [_write_frame(tmp_path / f"frame_{i}.png", shift=10 * i) for i in range(2)]
+    consolidated, failures = harvest_hero_assets.harvest_batch(frames, str(tmp_path / "props"), workers=2)
+    assert not failures
+    assert {item["source_image"] for item in consolidated} == set(frames)
@@ -0,0 +1,80 @@
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "assets"))
+import harvest_hero_assets  # noqa: E402
+
+
+def test_frame_decoded_once_and_each_png_encoded_once(tmp_path, monkeypatch):
+    img = (np.random.default_rng(0).normal(0, 10, (240, 360, 3)) + np.array([60, 110, 90])).clip(0, 255).astype(np.uint8)
+    cv2.ellipse(img, (170, 120), (90, 60), 0, 0, 360, (30, 40, 200), -1)
+    frame = str(tmp_path / "frame.png")
+    cv2.imwrite(frame, img)
+    probe = tmp_path / "lighting_probe.json"
+    probe.write_text(json.dumps({"ambient_light": {"r": 0.5, "g": 0.6, "b": 0.7}}))
+
+    reads, writes = [], []
+    real_imread, real_imwrite = cv2.imread, cv2.imwrite
+    monkeypatch.setattr(harvest_hero_assets.cv2, "imread", lambda *a: reads.append(a[0]) or real_imread(*a))
+    monkeypatch.setattr(harvest_hero_assets.cv2, "imwrite",
+                        lambda path, *a: writes.append((os.path.basename(path), a[1] if len(a) > 1 else None))
+                        or real_imwrite(path, *a))
+
+    out = tmp_path / "props"
+    items = harvest_hero_assets.harvest_frame(frame, str(out), lighting_probe=str(probe), png_compression=6,
+                                              raw_png_compression=0)
+
+    assert reads == [frame]
+    [item] = items
+    raw, relit = os.path.basename(item["raw_path"]), os.path.basename(item["path"])
+    assert relit == raw.replace(".png", "_relit.png")
+    assert writes == [("roi_preview.png", None),
+                      (raw, [cv2.IMWRITE_PNG_COMPRESSION, 0]),
+                      (relit, [cv2.IMWRITE_PNG_COMPRESSION, 6])]
+
+    # Same pixels as the file-based relighting path.
+    monkeypatch.undo()
+    legacy_raw = str(tmp_path / "legacy.png")
+    cv2.imwrite(legacy_raw, cv2.imread(item["raw_path"], cv2.IMREAD_UNCHANGED))
+    legacy = harvest_hero_assets.apply_relighting(legacy_raw, str(probe))
+    assert np.array_equal(cv2.imread(legacy, cv2.IMREAD_UNCHANGED), cv2.imread(item["path"], cv2.IMREAD_UNCHANGED))
+
+
+def _float_relight(img, ambient):
+    """Reference: the original float64 multiply-and-clip relighting."""
+    rgb = img[:, :, :3].astype(float) * np.array([ambient["b"], ambient["g"], ambient["r"]]) * 1.2
+    return np.dstack((np.clip(rgb, 0, 255).astype(np.uint8), img[:, :, 3]))
+
+
+def test_lut_relighting_matches_float_path():
+    img = np.random.default_rng(1).integers(0, 256, (64, 96, 4), dtype=np.uint8)
+    img[0, :4, :3] = [[0, 0, 0], [255, 255, 255], [212, 213, 214], [1, 2, 3]]
+    for ambient in ({"r": 0.35, "g": 0.42, "b": 0.61}, {"r": 1.0, "g": 1.0, "b": 1.0}, {"r": 1.7, "g": 0.0, "b": 0.833}):
+        relit, _ = harvest_hero_assets.relight_image(img, {"ambient_light": ambient})
+        assert relit.dtype == np.uint8
+        assert np.array_equal(relit, _float_relight(img, ambient))
+
+    # Crops relit with the same probe share one table.
+    harvest_hero_assets.relight_lut.cache_clear()
+    for _ in range(3):
+        harvest_hero_assets.relight_image(img, {"ambient_light": {"r": 0.5, "g": 0.5, "b": 0.5}})
+    assert harvest_hero_assets.relight_lut.cache_info().misses == 1
+
+
+def test_probe_direction_adds_lambert_term():
+    img = np.full((8, 8, 4), 100, np.uint8)
+    ambient = {"r": 0.5, "g": 0.5, "b": 0.5}
+    sh = {"ambient": ambient, "directional_color": {"r": 0.3, "g": 0.3, "b": 0.3}}
+    flat, _ = harvest_hero_assets.relight_image(img, {"ambient_light": ambient})
+    front, scale = harvest_hero_assets.relight_image(
+        img, {"ambient_light": ambient, "sh_lighting": dict(sh, dominant_direction=[0.0, 0.0, -1.0])})
+    back, _ = harvest_hero_assets.relight_image(
+        img, {"ambient_light": ambient, "sh_lighting": dict(sh, dominant_direction=[0.0, 0.0, 1.0])})
+    assert back[0, 0, 0] < flat[0, 0, 0] < front[0, 0, 0] and front[0, 0, 3] == 100
+    assert scale == pytest.approx([0.5 * 1.4] * 3)
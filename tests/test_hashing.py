@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import sys
+
+from src.core import hashing
+from src.core.hashing import ChecksumCache, file_digests
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "export"))
+import package_asset_gbt  # noqa: E402
+
+
+def _counting(monkeypatch):
+    calls = []
+    real = hashing.compute_digests
+
+    def compute(path, *args, **kwargs):
+        calls.append(path)
+        return real(path, *args, **kwargs)
+
+    monkeypatch.setattr(hashing, "compute_digests", compute)
+    return calls
+
+
+def test_single_pass_digests_are_cached_until_the_file_changes(tmp_path, monkeypatch):
+    data = os.urandom((3 << 20) + 17)
+    splat = tmp_path / "splat.ply"
+    splat.write_bytes(data)
+    calls = _counting(monkeypatch)
+    cache = ChecksumCache(str(tmp_path / "db" / "checksums.sqlite3"))
+
+    expected = {"md5": hashlib.md5(data).hexdigest(), "sha256": hashlib.sha256(data).hexdigest()}
+    assert file_digests(str(splat), cache) == expected
+    # A fresh handle on the same database (a later run) answers without reading the file.
+    assert file_digests(str(splat), ChecksumCache(cache.db_path)) == expected
+    assert len(calls) == 1
+
+    splat.write_bytes(data[:-1])
+    assert file_digests(str(splat), cache)["sha256"] == hashlib.sha256(data[:-1]).hexdigest()
+    assert len(calls) == 2 and file_digests(str(tmp_path / "missing.ply"), cache) is None
+
+
+def test_package_asset_hashes_input_once(tmp_path, monkeypatch):
+    splat = tmp_path / "props_3d" / "prop_0.ply"
+    splat.parent.mkdir()
+    splat.write_bytes(b"ply\n" + os.urandom(4096))
+    calls = _counting(monkeypatch)
+    output = tmp_path / "prop_0.json"
+
+    package_asset_gbt.package_asset(str(splat), str(output), "prop_0")
+    package_asset_gbt.package_asset(str(splat), str(output), "prop_0")
+    assert len(calls) == 1
+
+    with open(output) as f:
+        identifiers = {i["type"]: i["value"] for i in json.load(f)["system_metadata"]["referent_identifier"]}
+    assert identifiers["MD5"] == hashlib.md5(splat.read_bytes()).hexdigest()
+    assert identifiers["SHA256"] == hashlib.sha256(splat.read_bytes()).hexdigest()
+
+
+def test_cache_prunes_stale_and_excess_rows(tmp_path):
+    db_path = str(tmp_path / "checksums.sqlite3")
+    cache = ChecksumCache(db_path)
+    for i in range(5):
+        path = tmp_path / f"out_{i}.ply"
+        path.write_bytes(os.urandom(64))
+        file_digests(str(path), cache)
+    conn = cache._connect()
+    with conn:
+        conn.execute("UPDATE checksums SET last_used = last_used - ? WHERE path LIKE ?", (90 * 86400, "%out_0.ply"))
+        conn.execute("UPDATE checksums SET last_used = last_used - 60 WHERE path LIKE ?", ("%out_1.ply",))
+    cache.close()
+
+    # Reopening drops the row unused for 90 days, then the least recently used beyond the cap.
+    reopened = ChecksumCache(db_path, max_rows=3)
+    rows = [os.path.basename(p) for (p,) in reopened._connect().execute("SELECT path FROM checksums ORDER BY path")]
+    assert rows == ["out_2.ply", "out_3.ply", "out_4.ply"]
+
+
+def test_compute_checksum_still_returns_the_md5_string(tmp_path):
+    splat = tmp_path / "splat.ply"
+    splat.write_bytes(b"ply\n" + os.urandom(256))
+    assert package_asset_gbt.compute_checksum(str(splat)) == hashlib.md5(splat.read_bytes()).hexdigest()
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "assets"))
+from harvest_hero_assets import split_instances  # noqa: E402
+
+
+def _external_contours(mask, min_area):
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return [(cv2.contourArea(c), cv2.boundingRect(c)) for c in contours if cv2.contourArea(c) > min_area]
+
+
+def test_matches_external_contours_with_holes_and_islands():
+    mask = np.zeros((240, 360), np.uint8)
+    cv2.circle(mask, (80, 80), 60, 1, -1)
+    cv2.circle(mask, (80, 80), 35, 0, -1)     # hole ...
+    cv2.circle(mask, (80, 80), 20, 1, -1)     # ... with a large island inside it
+    cv2.rectangle(mask, (200, 0), (330, 90), 1, -1)   # touches the frame border
+    cv2.ellipse(mask, (250, 180), (80, 40), 0, 0, 360, 1, -1)
+    cv2.circle(mask, (20, 220), 4, 1, -1)     # noise below the area threshold
+    min_area = 240 * 360 * 0.005
+
+    instances = split_instances(mask, min_area)
+    assert [(i["area"], i["bbox"]) for i in instances] == _external_contours(mask, min_area)
+    assert len(instances) == 3
+
+    # The outline is filled, so the hole of the ring stays part of the instance.
+    ring = next(i for i in instances if i["bbox"][0] < 100)
+    filled = np.zeros_like(mask)
+    cv2.drawContours(filled, [ring["contour"]], -1, 1, thickness=cv2.FILLED)
+    assert filled[80, 80 - 28] == 1
+
+
+def test_empty_mask_has_no_instances():
+    assert split_instances(np.zeros((10, 10), np.uint8), 1.0) == []
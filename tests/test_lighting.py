@@ -0,0 +1,163 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from src.core.light_probes import SH_C1
+from src.core.ply_io import iter_column_chunks, read_ply_header
+
+plyfile = pytest.importorskip("plyfile")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "lighting"))
+import estimate_lighting  # noqa: E402
+
+GS_COLUMNS = (
+    ["x", "y", "z", "f_dc_0", "f_dc_1", "f_dc_2"]
+    + [f"f_rest_{i}" for i in range(45)]
+    + ["opacity"] + [f"scale_{i}" for i in range(3)] + [f"rot_{i}" for i in range(4)]
+)
+
+
+def _write_gs_ply(path, n=5000, byte_order="<", text=False, seed=0):
+    rng = np.random.default_rng(seed)
+    vertex = np.empty(n, dtype=[(name, byte_order + "f4") for name in GS_COLUMNS])
+    for name in GS_COLUMNS:
+        vertex[name] = rng.normal(0, 1, n)
+    vertex["f_dc_0"] += 0.8
+    element = plyfile.PlyElement.describe(vertex, "vertex")
+    plyfile.PlyData([element], text=text, byte_order=byte_order).write(str(path))
+    return vertex
+
+
+def _reference_ambient(vertex):
+    """The previous implementation: full PlyData read, unchunked means."""
+    mask = 1 / (1 + np.exp(-vertex["opacity"].astype(np.float32))) > 0.5
+    dc = np.array([np.mean(vertex[f"f_dc_{c}"][mask]) for c in range(3)])
+    return np.clip(estimate_lighting.sh2rgb(dc), 0, 1)
+
+
+@pytest.mark.parametrize("byte_order,text", [("<", False), (">", False), ("<", True)])
+def test_chunked_estimate_matches_full_read(tmp_path, byte_order, text):
+    ply_path = tmp_path / "scene.ply"
+    vertex = _write_gs_ply(ply_path, byte_order=byte_order, text=text)
+    light = estimate_lighting.estimate_lighting_from_gs(str(ply_path), str(tmp_path / "probe.json"), chunk_rows=777)
+    ambient = [light["ambient_light"][c] for c in "rgb"]
+    np.testing.assert_allclose(ambient, _reference_ambient(vertex), atol=1e-6)
+    with open(tmp_path / "probe.json") as f:
+        assert json.load(f)["ambient_light"] == light["ambient_light"]
+
+
+def test_column_chunks_copy_only_requested_columns(tmp_path):
+    ply_path = tmp_path / "scene.ply"
+    vertex = _write_gs_ply(ply_path, n=1000, byte_order=">")
+    chunks = list(iter_column_chunks(read_ply_header(str(ply_path)), ["opacity", "f_dc_2"], chunk_rows=300))
+    assert [len(c["opacity"]) for c in chunks] == [300, 300, 300, 100]
+    assert all(set(c) == {"opacity", "f_dc_2"} and c["opacity"].dtype.isnative for c in chunks)
+    np.testing.assert_array_equal(np.concatenate([c["f_dc_2"] for c in chunks]), vertex["f_dc_2"])
+
+
+def test_band1_moments_give_dominant_light_direction(tmp_path):
+    ply_path = tmp_path / "scene.ply"
+    rng = np.random.default_rng(3)
+    n = 4000
+    vertex = np.zeros(n, dtype=[(name, "<f4") for name in GS_COLUMNS])
+    vertex["opacity"] = 4.0
+    vertex["scale_0"] = vertex["scale_1"] = vertex["scale_2"] = rng.normal(-4, 0.5, n)
+    # Splats look brighter on view rays pointing down (+y), i.e. lit from above (-y).
+    for c in range(3):
+        vertex[f"f_rest_{c * 15}"] = -0.4 + rng.normal(0, 0.05, n)
+    plyfile.PlyData([plyfile.PlyElement.describe(vertex, "vertex")]).write(str(ply_path))
+
+    sh = estimate_lighting.estimate_lighting_from_gs(str(ply_path), str(tmp_path / "probe.json"), chunk_rows=999)["sh_lighting"]
+    np.testing.assert_allclose(sh["dominant_direction"], [0.0, -1.0, 0.0], atol=1e-3)
+    assert abs(sh["directional_intensity"] - 0.4 * SH_C1) < 1e-3
+    assert sh["splats"] == n and sh["ambient"]["r"] == pytest.approx(0.5)
+
+
+def test_probe_grid_separates_regions_and_relights_by_placement(tmp_path):
+    n = 6000
+    rng = np.random.default_rng(4)
+    vertex = np.zeros(n, dtype=[(name, "<f4") for name in GS_COLUMNS])
+    vertex["opacity"] = 4.0
+    vertex["scale_0"] = vertex["scale_1"] = vertex["scale_2"] = -4.0
+    left = np.arange(n) < n // 2
+    vertex["x"] = np.where(left, -2.0, 2.0) + rng.normal(0, 0.2, n)
+    vertex["y"] = rng.normal(0, 0.5, n)
+    vertex["z"] = 5.0 + rng.normal(0, 0.5, n)
+    vertex["f_dc_0"] = np.where(left, 1.5, -1.5)  # red on the left, dark red channel on the right
+    ply_path = tmp_path / "scene.ply"
+    plyfile.PlyData([plyfile.PlyElement.describe(vertex, "vertex")]).write(str(ply_path))
+
+    probe = tmp_path / "lighting_probe.json"
+    light = estimate_lighting.estimate_lighting_from_gs(str(ply_path), str(probe), chunk_rows=1000, probe_grid=8)
+    assert light["probe_grid"]["path"] == "lighting_probe_grid.npz" and light["probe_grid"]["occupied"] > 2
+    assert os.path.exists(tmp_path / "lighting_probe_grid.npz")
+
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "assets"))
+    import harvest_hero_assets
+
+    loaded = harvest_hero_assets.load_lighting_probe(str(probe))
+    near_left = harvest_hero_assets.probe_light_data(loaded, (-2.0, 0.0, 5.0))
+    near_right = harvest_hero_assets.probe_light_data(loaded, (2.0, 0.0, 5.0))
+    assert near_left["ambient_light"]["r"] == pytest.approx(estimate_lighting.sh2rgb(1.5), abs=1e-4)
+    assert near_right["ambient_light"]["r"] == pytest.approx(estimate_lighting.sh2rgb(-1.5), abs=1e-4)
+    assert harvest_hero_assets.probe_light_data(loaded, None) is loaded
+
+    img = np.full((4, 4, 4), 100, np.uint8)
+    _, left_scale = harvest_hero_assets.relight_image(img, loaded, placement=(-2.0, 0.0, 5.0))
+    _, right_scale = harvest_hero_assets.relight_image(img, loaded, placement=(2.0, 0.0, 5.0))
+    assert left_scale[2] > right_scale[2]
+
+
+def test_grid_probe_keeps_the_global_ambient_estimator(tmp_path):
+    n = 4000
+    rng = np.random.default_rng(5)
+    vertex = np.zeros(n, dtype=[(name, "<f4") for name in GS_COLUMNS])
+    vertex["opacity"] = 4.0
+    vertex["x"], vertex["y"], vertex["z"] = rng.normal(0, 1, (3, n))
+    # Large splats are bright, small ones dark: the weighted and unweighted means differ.
+    big = np.arange(n) < n // 4
+    vertex["scale_0"] = vertex["scale_1"] = vertex["scale_2"] = np.where(big, -1.0, -4.0)
+    vertex["f_dc_0"] = np.where(big, 1.5, -0.5)
+    ply_path = tmp_path / "scene.ply"
+    plyfile.PlyData([plyfile.PlyElement.describe(vertex, "vertex")]).write(str(ply_path))
+    probe = tmp_path / "lighting_probe.json"
+    light = estimate_lighting.estimate_lighting_from_gs(str(ply_path), str(probe), probe_grid=1)
+    assert light["sh_lighting"]["ambient"]["r"] > light["ambient_light"]["r"] + 0.1
+
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "assets"))
+    import harvest_hero_assets
+
+    loaded = harvest_hero_assets.load_lighting_probe(str(probe))
+    # A single voxel covers the whole scene: relighting from it must match the global probe.
+    local = harvest_hero_assets.probe_light_data(loaded, (0.0, 0.0, 0.0))
+    for c in "rgb":
+        assert local["ambient_light"][c] == pytest.approx(loaded["ambient_light"][c], abs=1e-3)
+
+
+def test_lighting_cache_hit_uses_sampled_fingerprint(tmp_path):
+    from src.core.runner_utils import StepRunner
+    from src.core.step_cache import StepCache
+
+    scene = tmp_path / "s1" / "scene.ply"
+    scene.parent.mkdir()
+    _write_gs_ply(scene, n=2000)
+    # A second session whose scene was restored from the step cache (size/mtime preserved).
+    (tmp_path / "s2").mkdir()
+    os.link(scene, tmp_path / "s2" / "scene.ply")
+
+    script = os.path.join(PROJECT_ROOT, "src", "steps", "lighting", "estimate_lighting.py")
+    runner = StepRunner({"lighting": script}, step_caches={"lighting": StepCache(tmp_path / "shared_cache")})
+    results = []
+    for session in ("s1", "s2"):
+        probe = tmp_path / session / "lighting_probe.json"
+        results.append(runner.run("lighting", "lighting", ["--input", str(tmp_path / session / "scene.ply"), "--output", str(probe)],
+                                  sys.executable, cache_inputs=[str(tmp_path / session / "scene.ply")],
+                                  cache_outputs=[str(probe)], cache_fingerprint="sampled"))
+    assert results[0].success and not results[0].cached
+    assert results[1].cached and results[1].duration_s < 1.0
+    with open(tmp_path / "s2" / "lighting_probe.json") as f:
+        assert json.load(f)["source_ply"] == str(tmp_path / "s2" / "scene.ply")
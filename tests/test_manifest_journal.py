@@ -0,0 +1,77 @@
+import json
+import os
+
+from src.core.runner_utils import ManifestManager, load_manifest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INPUT_IMAGE = os.path.join(PROJECT_ROOT, "tests", "data", "input_image.png")
+
+
+def _populate(manifest, count):
+    for i in range(count):
+        asset_id = f"prop_{i:03d}"
+        manifest.record_asset_start(asset_id, "prop", "stub", {"area": i}, {"seed": 1})
+        manifest.append_asset_run_logs(asset_id, [f"logs/{asset_id}.log"])
+        manifest.update_asset_fields(asset_id, {"import_check": {"status": "passed"}})
+        if i % 2:
+            manifest.record_asset_failure(asset_id, "gen_failed", "boom", f"logs/{asset_id}.err")
+        else:
+            manifest.record_asset_success(asset_id, [f"{asset_id}.glb"], manifest.get_asset_run_logs(asset_id))
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_journal_mode_compacts_to_same_manifest(tmp_path):
+    plain = ManifestManager(str(tmp_path / "plain.json"), "s", INPUT_IMAGE, ["run"])
+    journaled = ManifestManager(str(tmp_path / "journal.json"), "s", INPUT_IMAGE, ["run"],
+                                journal=True, checkpoint_every=7)
+    _populate(plain, 10)
+    _populate(journaled, 10)
+    journaled.close()
+
+    assert not os.path.exists(journaled.journal_path)
+    assert _read(journaled.path)["assets"] == _read(plain.path)["assets"]
+
+
+def test_load_manifest_replays_uncompacted_journal(tmp_path):
+    manifest = ManifestManager(str(tmp_path / "manifest.json"), "s", INPUT_IMAGE, ["run"],
+                               journal=True, checkpoint_every=1000)
+    _populate(manifest, 4)
+
+    # Nothing compacted yet: manifest.json still holds the initial empty asset list.
+    assert _read(manifest.path)["assets"] == []
+    with open(manifest.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"record": {"asset_id": "torn"')  # crash mid-append
+
+    replayed = load_manifest(manifest.path)
+    assert [a["asset_id"] for a in replayed["assets"]] == [f"prop_{i:03d}" for i in range(4)]
+    assert replayed["assets"] == manifest.get_assets()
+
+
+def test_output_checksums_are_computed_outside_the_lock(tmp_path, monkeypatch):
+    import threading
+    from src.core import runner_utils
+
+    manifest = ManifestManager(str(tmp_path / "manifest.json"), "s", INPUT_IMAGE, ["run"])
+    manifest.record_asset_start("prop_000", "prop", "stub", {}, {})
+    acquired = []
+
+    def try_lock():
+        acquired.append(manifest.lock.acquire(timeout=1))
+        if acquired[-1]:
+            manifest.lock.release()
+
+    def fake_sha256(path):
+        # Another finalize thread must be able to take the manifest lock meanwhile.
+        probe = threading.Thread(target=try_lock)
+        probe.start()
+        probe.join()
+        return "digest"
+
+    monkeypatch.setattr(runner_utils, "_compute_sha256", fake_sha256)
+    manifest.record_asset_success("prop_000", [str(tmp_path / "splat.ply")], [])
+    assert acquired == [True]
+    assert manifest.get_asset("prop_000")["output_checksums"] == {str(tmp_path / "splat.ply"): "digest"}
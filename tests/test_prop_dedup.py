@@ -0,0 +1,184 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from src.core.prop_dedup import PropDedupIndex, crop_signature, is_duplicate
+
+cv2 = pytest.importorskip("cv2")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAME = os.path.join(PROJECT_ROOT, "tests", "data", "temp_inspect.png")
+
+
+def _crop(color=(30, 40, 200), size=(200, 300), blur=0, offset=(0, 0)):
+    h, w = size
+    img = np.zeros((h, w, 4), np.uint8)
+    cx, cy = w // 2 + offset[0], h // 2 + offset[1]
+    cv2.ellipse(img, (cx, cy), (w // 3, h // 3), 0, 0, 360, (*color, 255), -1)
+    cv2.circle(img, (cx - w // 8, cy), h // 8, (220, 220, 220, 255), -1)
+    cv2.line(img, (cx - w // 4, cy + h // 6), (cx + w // 4, cy - h // 6), (10, 10, 10, 255), 3)
+    if blur:
+        img[:, :, :3] = cv2.GaussianBlur(img[:, :, :3], (0, 0), blur)
+    return img
+
+
+def test_signature_matches_same_prop_across_frames_only():
+    base = crop_signature(_crop())
+    rescaled = crop_signature(cv2.resize(_crop(offset=(3, 2)), (330, 220)))
+    other = crop_signature(_crop(color=(200, 160, 30)))
+    assert is_duplicate(base, rescaled)
+    assert not is_duplicate(base, other)
+    assert crop_signature(_crop(blur=3))["sharpness"] < base["sharpness"]
+
+
+def _candidate(asset_id, frame, img, area_ratio=0.2):
+    return {"asset_id": asset_id, "session_id": frame, "source_image": frame,
+            "area_ratio": area_ratio, "signature": crop_signature(img)}
+
+
+def test_index_picks_sharpest_representative_and_links_the_rest():
+    index = PropDedupIndex()
+    decisions = index.assign([
+        _candidate("blurry", "f1", _crop(blur=2)),
+        _candidate("sharp", "f2", _crop()),
+        _candidate("other_prop", "f3", _crop(color=(200, 160, 30))),
+    ])
+    assert decisions["sharp"] is None and decisions["other_prop"] is None
+    assert decisions["blurry"]["asset_id"] == "sharp" and decisions["blurry"]["session_id"] == "f2"
+
+    # Two instances of one frame are separate objects, even when identical.
+    later = index.assign([_candidate("twin_a", "f4", _crop()), _candidate("twin_b", "f4", _crop())])
+    assert later["twin_a"]["asset_id"] == "sharp" and later["twin_b"]["asset_id"] == "sharp"
+    same_frame = PropDedupIndex().assign([_candidate("a", "f5", _crop()), _candidate("b", "f5", _crop())])
+    assert same_frame == {"a": None, "b": None}
+
+    # Duplicates wait for their representative; once it failed they are re-assigned.
+    waiting = _candidate("retry", "f6", _crop())
+    assert index.assign([waiting])["retry"]["asset_id"] == "sharp"
+    assert index.wait_any([waiting], timeout=0.01) == []
+    index.resolve("f2", "sharp", False)
+    assert index.wait_any([waiting]) == [(waiting, "failure")]
+    assert index.relink(waiting) is None
+    index.resolve("f6", "retry", True)
+    assert index.assign([_candidate("again", "f7", _crop())])["again"]["asset_id"] == "retry"
+
+
+def test_sharper_duplicate_from_a_later_session_is_promoted():
+    index = PropDedupIndex()
+    assert index.assign([_candidate("blurry", "f1", _crop(blur=3))]) == {"blurry": None}
+    # A clearly better crop of the same prop is generated too and becomes the preferred representative.
+    assert index.assign([_candidate("sharp", "f2", _crop())]) == {"sharp": None}
+    later = index.assign([_candidate("copy", "f3", _crop(blur=1))])
+    assert later["copy"]["asset_id"] == "sharp"
+
+
+def test_registered_outcomes_of_earlier_runs_are_matched():
+    index = PropDedupIndex()
+    index.register(_candidate("sharp", "f1", _crop()))
+    index.register(_candidate("copy", "f2", _crop(blur=1)), linked_to={"session_id": "f1", "asset_id": "sharp"})
+    waiting = _candidate("copy", "f2", _crop(blur=1))
+    assert index.wait_any([waiting], timeout=0.01) == [(waiting, "success")]
+    assert index.assign([_candidate("later", "f3", _crop(blur=1))])["later"]["asset_id"] == "sharp"
+
+
+def test_batch_generates_duplicate_frames_once(tmp_path):
+    import pipeline_runner
+    from src.pipelines.dag import ResourceSlots
+
+    frames_dir = tmp_path / "frames"
+    frames_dir.mkdir()
+    for name in ("shot_0001.png", "shot_0002.png"):
+        shutil.copyfile(FRAME, frames_dir / name)
+
+    args = pipeline_runner.build_arg_parser().parse_args([
+        "--input-dir", str(frames_dir),
+        "--output_root", str(tmp_path / "out"),
+        "--skip_scene", "--asset_gen_backend", "stub", "--asset_type", "prop",
+        "--max_sessions", "1", "--dedup_props",
+    ])
+    inputs = pipeline_runner.collect_batch_inputs(args)
+    runner = pipeline_runner.build_runner(args)
+    batch = pipeline_runner.run_batch(args, inputs, runner, ResourceSlots({"gpu": 1, "cpu": 2}))
+
+    assert batch["counts"]["completed"] == 2
+    statuses = [session["assets"] for session in batch["sessions"]]
+    assert statuses[0].get("success", 0) >= 1 and "linked" not in statuses[0]
+    assert statuses[1] == {"linked": statuses[0]["success"]}
+
+    with open(tmp_path / "out" / "shot_0002" / "manifest.json", encoding="utf-8") as f:
+        linked = [a for a in json.load(f)["assets"] if a["status"] == "linked"]
+    assert linked[0]["linked_to"]["session_id"] == "shot_0001"
+    assert pipeline_runner._session_completed(str(tmp_path / "out" / "shot_0002"))
+
+
+def test_duplicates_are_generated_when_their_representative_fails(tmp_path, monkeypatch):
+    import pipeline_runner
+    from src.pipelines.dag import ResourceSlots
+
+    frames_dir = tmp_path / "frames"
+    frames_dir.mkdir()
+    for name in ("shot_0001.png", "shot_0002.png"):
+        shutil.copyfile(FRAME, frames_dir / name)
+
+    real_finalize = pipeline_runner._finalize_asset
+    finalized = []
+
+    def fail_first_representative(ctx, job):
+        finalized.append(job["asset_id"])
+        if len(finalized) > 1:
+            return real_finalize(ctx, job)
+        ctx.manifest.record_asset_failure(job["asset_id"], "OutputValidationError", "boom", None)
+
+    monkeypatch.setattr(pipeline_runner, "_finalize_asset", fail_first_representative)
+    args = pipeline_runner.build_arg_parser().parse_args([
+        "--input-dir", str(frames_dir),
+        "--output_root", str(tmp_path / "out"),
+        "--skip_scene", "--asset_gen_backend", "stub", "--asset_type", "prop",
+        "--max_sessions", "2", "--dedup_props",
+    ])
+    inputs = pipeline_runner.collect_batch_inputs(args)
+    runner = pipeline_runner.build_runner(args)
+    batch = pipeline_runner.run_batch(args, inputs, runner, ResourceSlots({"gpu": 1, "cpu": 2}))
+
+    # Whichever frame became the representative failed; its duplicate in the other frame is
+    # generated instead (re-queued from its link, or unmatched) and never left linked to a failure.
+    totals = {}
+    for session in batch["sessions"]:
+        for status, count in session["assets"].items():
+            totals[status] = totals.get(status, 0) + count
+    assert totals == {"failed": 1, "success": 1} and len(finalized) == 2
+
+
+def test_skipped_and_resumed_sessions_keep_their_dedup_decisions(tmp_path):
+    import pipeline_runner
+    from src.pipelines.dag import ResourceSlots
+
+    frames_dir = tmp_path / "frames"
+    frames_dir.mkdir()
+    shutil.copyfile(FRAME, frames_dir / "shot_0001.png")
+    argv = [
+        "--input-dir", str(frames_dir),
+        "--output_root", str(tmp_path / "out"),
+        "--skip_scene", "--asset_gen_backend", "stub", "--asset_type", "prop",
+        "--max_sessions", "1", "--dedup_props",
+    ]
+    args = pipeline_runner.build_arg_parser().parse_args(argv)
+    runner = pipeline_runner.build_runner(args)
+    pipeline_runner.run_batch(args, pipeline_runner.collect_batch_inputs(args), runner, ResourceSlots({"gpu": 1, "cpu": 2}))
+
+    # The first frame is complete and skipped; the new frame still links to its props.
+    shutil.copyfile(FRAME, frames_dir / "shot_0002.png")
+    args = pipeline_runner.build_arg_parser().parse_args(argv + ["--resume"])
+    batch = pipeline_runner.run_batch(args, pipeline_runner.collect_batch_inputs(args), runner, ResourceSlots({"gpu": 1, "cpu": 2}))
+    assert [session["status"] for session in batch["sessions"]] == ["skipped", "completed"]
+    assert batch["sessions"][1]["assets"] == {"linked": batch["sessions"][0]["assets"]["success"]}
+
+    # Resuming a session verifies its generated assets in place instead of generating them again.
+    input_path = str(frames_dir / "shot_0001.png")
+    ctx, summary = pipeline_runner.run_session(args, input_path, runner, ResourceSlots({"gpu": 1, "cpu": 2}),
+                                               dedup_index=PropDedupIndex())
+    assert not summary.failed()
+    assert not [name for name in ctx.graph.nodes if name.startswith("asset_gen:")]
@@ -0,0 +1,52 @@
+import os
+import sys
+import textwrap
+
+from src.core.resource_monitor import run_monitored
+from src.core.runner_utils import StepRunner
+from src.core.step_worker import WorkerPool
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_SCRIPT = os.path.join(PROJECT_ROOT, "src", "steps", "assets", "run_stub_backend.py")
+INPUT_IMAGE = os.path.join(PROJECT_ROOT, "tests", "data", "input_image.png")
+
+# Parent holds ~64MB and spawns a grandchild holding another ~64MB at the same time.
+TREE_SCRIPT = textwrap.dedent("""
+    import subprocess, sys, time
+    block = bytearray(64 * 1024 * 1024)
+    child = subprocess.Popen([sys.executable, "-c",
+                              "import time; b = bytearray(64 * 1024 * 1024); time.sleep(1.5)"])
+    deadline = time.time() + 0.3
+    while time.time() < deadline:
+        pass
+    child.wait()
+""")
+
+
+def test_run_monitored_samples_process_tree():
+    returncode, usage = run_monitored([sys.executable, "-c", TREE_SCRIPT], interval=0.1)
+
+    assert returncode == 0
+    assert usage["source"] == "proc"
+    assert usage["peak_rss_mb"] >= 120
+    assert usage["cpu_user_s"] + usage["cpu_sys_s"] > 0.2
+    assert usage["io_read_mb"] >= 0 and usage["io_write_mb"] >= 0
+
+
+def test_step_resources_for_subprocess_and_worker(tmp_path):
+    runner = StepRunner({"stub": STUB_SCRIPT}, worker_pool=WorkerPool(["stub"], idle_timeout=30))
+    plain = StepRunner({"stub": STUB_SCRIPT})
+    try:
+        results = [
+            r.run("stub", "stub", ["--input", INPUT_IMAGE, "--output", str(tmp_path / name)], sys.executable)
+            for r, name in ((plain, "subprocess"), (runner, "worker"))
+        ]
+    finally:
+        runner.close()
+
+    for result, source in zip(results, ("proc", "worker")):
+        assert result.success
+        assert result.resources["source"] == source
+        assert result.resources["peak_rss_mb"] > 0
+        assert result.resources["duration_s"] > 0
+        assert "cpu_user_s" in result.resources
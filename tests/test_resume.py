@@ -0,0 +1,42 @@
+import json
+import os
+
+import pytest
+
+from src.pipelines.dag import ResourceSlots
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_resume_reruns_only_unverified_assets(tmp_path):
+    pytest.importorskip("cv2")
+    pytest.importorskip("numpy")
+    import pipeline_runner
+
+    input_path = os.path.join(PROJECT_ROOT, "tests", "data", "temp_inspect.png")
+    argv = [
+        "--input", input_path,
+        "--output_root", str(tmp_path / "out"),
+        "--skip_scene", "--asset_gen_backend", "stub", "--asset_type", "prop", "--no-cache",
+    ]
+    args = pipeline_runner.build_arg_parser().parse_args(argv)
+    ctx, _ = pipeline_runner.run_session(args, input_path, pipeline_runner.build_runner(args), ResourceSlots({"gpu": 1, "cpu": 2}))
+    props = [a for a in ctx.manifest.get_assets() if a["asset_type"] == "prop"]
+    assert props and all(a["output_checksums"] for a in props)
+
+    # Simulate a damaged output of the first asset after an interrupted run.
+    damaged = props[0]
+    damaged_preview = os.path.join(damaged["parameters_snapshot"]["backend"]["asset_output_dir"], "preview.png")
+    with open(damaged_preview, "ab") as f:
+        f.write(b"garbage")
+
+    args = pipeline_runner.build_arg_parser().parse_args(argv + ["--resume"])
+    ctx, summary = pipeline_runner.run_session(args, input_path, pipeline_runner.build_runner(args), ResourceSlots({"gpu": 1, "cpu": 2}))
+
+    assert not summary.failed()
+    rerun = sorted(name.split(":", 1)[1] for name in ctx.graph.nodes if name.startswith("asset_gen:"))
+    assert rerun == [damaged["asset_id"]]
+    with open(os.path.join(ctx.output_dir, "manifest.json"), encoding="utf-8") as f:
+        assets = json.load(f)["assets"]
+    assert [a["asset_id"] for a in assets] == ["scene_001"] + [a["asset_id"] for a in props]
+    assert all(a["status"] == "success" for a in assets if a["asset_type"] == "prop")
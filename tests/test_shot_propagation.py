@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+
+from src.core.optical_flow import flow_magnitude
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "steps", "assets"))
+import harvest_hero_assets  # noqa: E402
+
+BACKGROUND = cv2.GaussianBlur(
+    (np.random.default_rng(0).normal(0, 25, (360, 540, 3)) + np.array([60, 110, 90])).clip(0, 255).astype(np.uint8),
+    (7, 7), 0)
+
+
+def _frame(i):
+    img, mask = BACKGROUND.copy(), np.zeros(BACKGROUND.shape[:2], np.uint8)
+    for target, value in ((img, (30, 40, 200)), (mask, 1)):
+        cv2.ellipse(target, (230 + 4 * i, 180 + 2 * i), (120, 80), 0, 0, 360, value, -1)
+    cv2.circle(img, (200 + 4 * i, 170 + 2 * i), 20, (200, 200, 60), -1)
+    return img, mask
+
+
+def test_flow_magnitude_matches_motion_script_formula():
+    a, _ = _frame(0)
+    b = np.roll(a, 8, axis=1)
+    gray = [cv2.resize(cv2.cvtColor(f, cv2.COLOR_BGR2GRAY), None, fx=0.25, fy=0.25) for f in (a, b)]
+    flow = cv2.calcOpticalFlowFarneback(gray[0], gray[1], None, 0.5, 3, 15, 3, 5, 1.2, 0)
+    expected = float(np.mean(np.sqrt(flow[..., 0]**2 + flow[..., 1]**2))) / 0.25
+    assert flow_magnitude(a, b) == expected
+
+
+def test_propagated_mask_follows_the_prop():
+    (img0, mask0), (img1, mask1) = _frame(0), _frame(1)
+    warped, confidence = harvest_hero_assets.propagate_mask(img0, mask0, img1)
+    iou = np.count_nonzero(warped & mask1) / np.count_nonzero(warped | mask1)
+    assert confidence > 0.9 and iou > 0.95
+
+
+def test_shot_runs_grabcut_on_anchor_and_after_cut_only(tmp_path):
+    paths = []
+    for i in range(4):
+        img, _ = _frame(i)
+        if i == 3:  # hard cut to an unrelated scene
+            img = np.full_like(img, (150, 60, 140))
+            cv2.rectangle(img, (100, 50), (300, 250), (20, 200, 200), -1)
+        paths.append(str(tmp_path / f"{i:04d}.png"))
+        cv2.imwrite(paths[-1], img)
+
+    out = tmp_path / "props"
+    consolidated, failures = harvest_hero_assets.harvest_shot(paths, str(out))
+    assert not failures
+    sources = {item["source_image"]: item["mask_source"] for item in consolidated}
+    assert [sources[p]["mode"] for p in paths] == ["grabcut", "propagated", "propagated", "grabcut"]
+    assert sources[paths[2]]["anchor_frame"] == paths[0] and sources[paths[2]]["confidence"] > 0.85
+    assert sources[paths[3]]["anchor_frame"] == paths[3]
+    with open(out / "0002" / "harvest_manifest.json") as f:
+        assert json.load(f)[0]["mask_source"]["mode"] == "propagated"
+
+
+def test_empty_refined_mask_falls_back_to_full_extraction(tmp_path, monkeypatch):
+    paths = []
+    for i in range(2):
+        paths.append(str(tmp_path / f"{i:04d}.png"))
+        cv2.imwrite(paths[-1], _frame(i)[0])
+
+    def refine_to_nothing(img, mask, band, rect):
+        return np.full(mask.shape, cv2.GC_BGD, np.uint8), None
+
+    monkeypatch.setattr(harvest_hero_assets, "_refine_boundary_band", refine_to_nothing)
+    consolidated, failures = harvest_hero_assets.harvest_shot(paths, str(tmp_path / "props"))
+    assert not failures
+    assert [item["mask_source"]["mode"] for item in consolidated] == ["grabcut", "grabcut"]
+
+
+def test_shot_flag_is_rejected_with_a_single_input(tmp_path):
+    import subprocess
+
+    script = os.path.join(PROJECT_ROOT, "src", "steps", "assets", "harvest_hero_assets.py")
+    result = subprocess.run([sys.executable, script, "--input", "frame.png", "--shot", "--output_dir", str(tmp_path)],
+                            capture_output=True, text=True)
+    assert result.returncode == 2 and "--shot" in result.stderr
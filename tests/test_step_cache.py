@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+import sys
+
+from src.core.runner_utils import StepRunner
+from src.core.step_cache import StepCache
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_SCRIPT = os.path.join(PROJECT_ROOT, "src", "steps", "assets", "run_stub_backend.py")
+INPUT_IMAGE = os.path.join(PROJECT_ROOT, "tests", "data", "input_image.png")
+
+
+def _run(runner, input_path, out_dir, log_dir):
+    return runner.run(
+        "stub", "stub", ["--input", str(input_path), "--output", str(out_dir)], sys.executable,
+        log_dir=str(log_dir), step_id="asset_gen", asset_id="prop_001",
+        cache_inputs=[str(input_path)], cache_outputs=[str(out_dir)],
+    )
+
+
+def test_cache_hit_materializes_outputs_in_new_session(tmp_path):
+    runner = StepRunner({"stub": STUB_SCRIPT}, cache=StepCache(tmp_path / "cache"))
+
+    first = _run(runner, INPUT_IMAGE, tmp_path / "s1" / "asset", tmp_path / "s1" / "logs")
+    second = _run(runner, INPUT_IMAGE, tmp_path / "s2" / "asset", tmp_path / "s2" / "logs")
+
+    assert first.success and not first.cached
+    assert second.success and second.cached
+    for name in ("splat.ply", "preview.png"):
+        assert (tmp_path / "s2" / "asset" / name).read_bytes() == (tmp_path / "s1" / "asset" / name).read_bytes()
+    assert "Stub backend wrote" in open(second.stdout_log).read()
+
+
+def test_changed_input_invalidates_entry(tmp_path):
+    runner = StepRunner({"stub": STUB_SCRIPT}, cache=StepCache(tmp_path / "cache"))
+    changed_input = tmp_path / "input.png"
+    shutil.copyfile(INPUT_IMAGE, changed_input)
+
+    _run(runner, changed_input, tmp_path / "s1", tmp_path / "logs")
+    changed_input.write_bytes(changed_input.read_bytes() + b"\0")
+    rerun = _run(runner, changed_input, tmp_path / "s2", tmp_path / "logs")
+
+    assert rerun.success and not rerun.cached
+
+
+def test_relocates_paths_in_json_outputs(tmp_path):
+    cache = StepCache(tmp_path / "cache")
+    origin = tmp_path / "s1" / "props"
+    origin.mkdir(parents=True)
+    (origin / "harvest_manifest.json").write_text(json.dumps([{"path": str(origin / "prop_relit.png")}]))
+    cache.store("ab" * 32, [str(origin)])
+
+    target = tmp_path / "s2" / "props"
+    assert cache.materialize("ab" * 32, [str(target)])
+    manifest = json.loads((target / "harvest_manifest.json").read_text())
+    assert manifest[0]["path"] == str(target / "prop_relit.png")
+
+
+def test_in_place_rewrite_of_large_output_does_not_corrupt_cache(tmp_path):
+    cache = StepCache(tmp_path / "cache")
+    payload = os.urandom(2 << 20)
+    origin = tmp_path / "s1" / "splat.ply"
+    origin.parent.mkdir()
+    origin.write_bytes(payload)
+    cache.store("cd" * 32, [str(origin)])
+
+    # A re-run into the same session truncates and rewrites its output.
+    with open(origin, "wb") as f:
+        f.write(b"rewritten!")
+    restored = tmp_path / "s2" / "splat.ply"
+    assert cache.materialize("cd" * 32, [str(restored)])
+    assert restored.read_bytes() == payload
+
+    with open(restored, "wb") as f:
+        f.write(b"rewritten!")
+    assert cache.materialize("cd" * 32, [str(tmp_path / "s3" / "splat.ply")])
+    assert (tmp_path / "s3" / "splat.ply").read_bytes() == payload
+
+
+def test_lru_eviction_respects_size_cap(tmp_path):
+    cache = StepCache(tmp_path / "cache", max_bytes=2500)
+    for index in range(3):
+        payload = tmp_path / f"out_{index}.bin"
+        payload.write_bytes(b"x" * 1000)
+        cache.store(f"{index:02d}" * 32, [str(payload)])
+        if index == 0:
+            # Age the first entry so it is the least recently used one.
+            os.utime(os.path.join(cache._entry_dir("00" * 32), "meta.json"), (0, 0))
+    assert not cache.contains("00" * 32)
+    assert cache.contains("01" * 32) and cache.contains("02" * 32)
+    assert cache.total_bytes() <= 2500
+
+
+def test_sampled_fingerprint_reads_bounded_blocks(tmp_path, monkeypatch):
+    from src.core import step_cache
+
+    big = tmp_path / "scene.ply"
+    big.write_bytes(os.urandom(3 << 20))
+    reads = []
+    real_open = open
+
+    class CountingFile:
+        def __init__(self, f):
+            self.f = f
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.f.close()
+
+        def seek(self, offset):
+            self.f.seek(offset)
+
+        def read(self, n):
+            data = self.f.read(n)
+            reads.append(len(data))
+            return data
+
+    monkeypatch.setattr(step_cache, "open", lambda path, mode="r": CountingFile(real_open(path, mode)), raising=False)
+    first = step_cache.sampled_fingerprint(str(big))
+    assert sum(reads) <= step_cache.FINGERPRINT_BLOCKS * step_cache.FINGERPRINT_BLOCK_BYTES
+    monkeypatch.undo()
+
+    os.link(big, tmp_path / "linked.ply")
+    assert step_cache.sampled_fingerprint(str(tmp_path / "linked.ply")) == first
+    with open(big, "r+b") as f:
+        f.write(b"\0" * 16)
+    assert step_cache.sampled_fingerprint(str(big)) != first
+
+
+def _dir_entry(tmp_path, cache, key):
+    origin = tmp_path / "s1" / "asset"
+    origin.mkdir(parents=True)
+    for name in ("a.bin", "b.bin"):
+        (origin / name).write_bytes(os.urandom(1024))
+    cache.store(key, [str(origin)])
+    return origin
+
+
+def test_entry_being_restored_is_not_evicted(tmp_path, monkeypatch):
+    cache = StepCache(tmp_path / "cache")
+    origin = _dir_entry(tmp_path, cache, "ef" * 32)
+    real_place = cache._place_file
+
+    def place_then_evict(src_file, dst_file, relocations):
+        real_place(src_file, dst_file, relocations)
+        cache.max_bytes = 0
+        cache.evict()  # another session storing a result meanwhile
+
+    monkeypatch.setattr(cache, "_place_file", place_then_evict)
+    target = tmp_path / "s2" / "asset"
+    assert cache.materialize("ef" * 32, [str(target)])
+    assert sorted(os.listdir(target)) == ["a.bin", "b.bin"]
+    assert (target / "b.bin").read_bytes() == (origin / "b.bin").read_bytes()
+
+
+def test_failed_restore_is_a_miss_without_partial_outputs(tmp_path, monkeypatch):
+    cache = StepCache(tmp_path / "cache")
+    _dir_entry(tmp_path, cache, "ef" * 32)
+    target = tmp_path / "s2" / "asset"
+    target.mkdir(parents=True)
+    (target / "stale.bin").write_bytes(b"old run")
+    real_place = cache._place_file
+    placed = []
+
+    def place_once(src_file, dst_file, relocations):
+        if placed:
+            raise FileNotFoundError(src_file)
+        placed.append(dst_file)
+        real_place(src_file, dst_file, relocations)
+
+    monkeypatch.setattr(cache, "_place_file", place_once)
+    assert not cache.materialize("ef" * 32, [str(target)])
+    assert placed and not target.exists()
+
+    monkeypatch.undo()
+    target.mkdir()
+    (target / "stale.bin").write_bytes(b"old run")
+    assert cache.materialize("ef" * 32, [str(target)])
+    assert sorted(os.listdir(target)) == ["a.bin", "b.bin"]
@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import time
+
+from src.core.runner_utils import StepRunner
+from src.core.step_worker import WorkerPool
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_SCRIPT = os.path.join(PROJECT_ROOT, "src", "steps", "assets", "run_stub_backend.py")
+INPUT_IMAGE = os.path.join(PROJECT_ROOT, "tests", "data", "input_image.png")
+
+
+def _run_stub(runner, tmp_path, name, extra_args=()):
+    out_dir = tmp_path / name
+    result = runner.run(
+        f"stub {name}", "stub",
+        ["--input", INPUT_IMAGE, "--output", str(out_dir)] + list(extra_args),
+        sys.executable,
+        log_dir=str(tmp_path / "logs"), step_id="asset_gen", asset_id=name,
+    )
+    info_path = out_dir / "stub_run.json"
+    info = json.loads(info_path.read_text()) if info_path.exists() else None
+    return result, info
+
+
+def test_worker_loads_model_once_across_jobs(tmp_path):
+    pool = WorkerPool(["stub"], idle_timeout=30)
+    runner = StepRunner({"stub": STUB_SCRIPT}, worker_pool=pool)
+    try:
+        first, first_info = _run_stub(runner, tmp_path, "a")
+        second, second_info = _run_stub(runner, tmp_path, "b")
+    finally:
+        runner.close()
+
+    assert first.success and second.success
+    assert first.via_worker and second.via_worker
+    assert first_info["pid"] == second_info["pid"]
+    assert first_info["model_loaded_at"] == second_info["model_loaded_at"]
+    assert second_info["model_jobs"] == 2
+    assert "Stub backend wrote" in open(second.stdout_log).read()
+
+
+def test_failed_job_keeps_worker_healthy(tmp_path):
+    pool = WorkerPool(["stub"], idle_timeout=30)
+    runner = StepRunner({"stub": STUB_SCRIPT}, worker_pool=pool)
+    try:
+        failed, _ = _run_stub(runner, tmp_path, "bad", ["--fail"])
+        worker = next(iter(pool.workers.values()))
+        status = worker.ping()
+    finally:
+        runner.close()
+
+    assert not failed.success and failed.returncode == 3
+    assert status["ok"] and status["jobs_done"] == 1
+
+
+def test_idle_worker_shuts_down_and_respawns(tmp_path):
+    pool = WorkerPool(["stub"], idle_timeout=0.5)
+    runner = StepRunner({"stub": STUB_SCRIPT}, worker_pool=pool)
+    try:
+        _, first_info = _run_stub(runner, tmp_path, "a")
+        worker = next(iter(pool.workers.values()))
+        deadline = time.time() + 10
+        while worker.process.poll() is None and time.time() < deadline:
+            time.sleep(0.1)
+        assert worker.process.poll() is not None
+        _, second_info = _run_stub(runner, tmp_path, "b")
+    finally:
+        runner.close()
+
+    assert second_info["warm"] and second_info["pid"] != first_info["pid"]
+
+
+def test_falls_back_to_subprocess_without_worker_hooks(tmp_path):
+    plain_script = tmp_path / "plain_step.py"
+    plain_script.write_text("import sys\nprint('plain')\nsys.exit(0)\n")
+    pool = WorkerPool(["plain"], idle_timeout=30)
+    runner = StepRunner({"plain": str(plain_script)}, worker_pool=pool)
+    try:
+        result = runner.run("plain", "plain", [], sys.executable)
+    finally:
+        runner.close()
+
+    assert result.success and not result.via_worker
+    assert not pool.supports("plain")
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from src.core.runner_utils import StepRunner
+from src.core.tracing import TraceRecorder, activate, span
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD_SCRIPT = textwrap.dedent("""
+    import sys
+    sys.path.insert(0, sys.argv[1])
+    from src.core.tracing import span
+    with span("load", model="tiny"):
+        with span("infer"):
+            pass
+""")
+
+
+def _events(path):
+    with open(path, encoding="utf-8") as f:
+        return [e for e in json.load(f)["traceEvents"] if e["ph"] == "X"]
+
+
+def test_step_runner_spans_and_child_sink_are_merged(tmp_path):
+    script = tmp_path / "child_step.py"
+    script.write_text(CHILD_SCRIPT)
+    recorder = TraceRecorder(str(tmp_path / "trace.json"))
+    runner = StepRunner({"child": str(script)})
+
+    with activate(recorder), span("node", cat="node"):
+        result = runner.run("child step", "child", [PROJECT_ROOT], sys.executable, step_id="child", asset_id="a1")
+    recorder.save()
+
+    assert result.success
+    events = {e["name"]: e for e in _events(recorder.path)}
+    assert set(events) == {"node", "child step", "load", "infer"}
+    step, load = events["child step"], events["load"]
+    assert step["args"]["asset_id"] == "a1" and step["args"]["returncode"] == 0
+    assert load["pid"] != step["pid"] and load["args"]["model"] == "tiny"
+    # Child spans nest inside the step span on the shared wall-clock timeline.
+    assert step["ts"] <= load["ts"] and load["ts"] + load["dur"] <= step["ts"] + step["dur"]
+    assert not os.path.exists(recorder.sink_path)
+
+
+def test_span_without_tracer_or_sink_is_noop(tmp_path):
+    env = {k: v for k, v in os.environ.items() if k != "PIPELINE_TRACE_SINK"}
+    completed = subprocess.run([sys.executable, "-c", CHILD_SCRIPT, PROJECT_ROOT], env=env, cwd=tmp_path)
+    assert completed.returncode == 0
+    assert os.listdir(tmp_path) == []